@@ -6,6 +6,7 @@ def premium_dashboard():
 def home():
     return send_from_directory('.', 'index_premium.html')#!/usr/bin/env python3
 import os
+import sys
 import threading
 import time
 import uuid
@@ -15,14 +16,16 @@ import email
 from email.message import EmailMessage
 from datetime import datetime, timedelta
 from flask import Flask, request, jsonify, render_template_string
-from openai import OpenAI
+# openai_client liegt in deployment/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deployment'))
+from openai_client import create_client
 from dotenv import load_dotenv
 
 # Environment Variables laden
 load_dotenv()
 
 app = Flask(__name__)
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+client = create_client()
 assistant_id = os.getenv('ASSISTANT_ID')
 
 # Email Configuration
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 import os
+import sys
 from flask import Flask, request, jsonify
-from openai import OpenAI
+# openai_client liegt in deployment/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deployment'))
+from openai_client import create_client
 from dotenv import load_dotenv
 import uuid, time
 from datetime import datetime
@@ -10,7 +13,7 @@ load_dotenv()
 app = Flask(__name__)
 sessions = {}
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = create_client()
 ASSISTANT_ID = os.getenv("ASSISTANT_ID")
 
 @app.route("/")
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import os
+import sys
 import threading
 import time
 import uuid
@@ -9,15 +10,24 @@ import email
 from email.message import EmailMessage
 from datetime import datetime, timedelta
 from flask import Flask, request, jsonify, render_template_string, Response
-from openai import OpenAI
+# openai_client, run_waiter und context_manager liegen in deployment/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deployment'))
+from openai_client import create_client
 from dotenv import load_dotenv
+from run_waiter import RunWaiter, RunFailed
+from context_manager import ContextManager, chat_summarizer
 
 # Environment Variables laden
 load_dotenv()
 
 app = Flask(__name__)
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+client = create_client()
 assistant_id = os.getenv('ASSISTANT_ID')
+run_waiter = RunWaiter()
+
+# Verlauf im Prompt: letzte Turns als Text, ältere als laufende Zusammenfassung pro Phase
+context_manager = ContextManager(chat_summarizer(client, os.getenv('AI_CHAT_MODEL', 'gpt-4o-mini')),
+                                 keep_turns=int(os.getenv('AI_CONTEXT_TURNS', 3)), fields=('type', 'content'))
 
 # Email Configuration
 EMAIL_CONFIG = {
@@ -798,7 +808,8 @@ def coaching_session(session_id):
            'progress': 0,
            'created_at': datetime.now().isoformat(),
            'mode': 'ai_mode',
-           'learning_style': None
+           'learning_style': None,
+           'thread_id': None  # wird beim ersten Chat-Turn angelegt
        }
    
    session = sessions[session_id]
@@ -1111,7 +1122,8 @@ def chat(session_id):
        session['messages'].append({
            'type': 'user',
            'content': user_message,
-           'timestamp': datetime.now().isoformat()
+           'timestamp': datetime.now().isoformat(),
+           'phase': session['phase']
        })
        
        # Lernstil erkennen
@@ -1132,7 +1144,10 @@ def chat(session_id):
        # Fortschritt berechnen
        progress = calculate_progress(session_id, user_message)
        
-       # AI-Antwort generieren
+       # Verlauf liegt im Session-Thread; ältere Turns nur noch als Zusammenfassung
+       summary, recent = context_manager.build(session)
+       
+       # AI-Kontext als Run-Instruktion (wird nicht im Thread gespeichert)
        context = f"""
        Du bist ein professioneller Ruhestandscoach. Der Coachee ist in Phase {session['phase']} von 5 ({COACHING_PHASES[session['phase']]}).
        
@@ -1146,32 +1161,40 @@ def chat(session_id):
        Phase 4: Umsetzungsplanung - Konkrete Schritte definieren
        Phase 5: Erfolgskontrolle - Fortschritt messen und anpassen
        
-       Letzte Nachrichten: {session['messages'][-3:] if len(session['messages']) > 3 else session['messages']}
+       {summary}
        
        Antworten Sie einfühlsam, strukturiert und an den Lernstil angepasst. Bei >= 75% Fortschritt, leiten Sie zur nächsten Phase über.
        """
        
-       # OpenAI API Call
-       thread = client.beta.threads.create()
+       # Thread pro Session: beim ersten Turn anlegen, danach wiederverwenden
+       thread_id = session.get('thread_id')
+       if not thread_id:
+           thread_id = client.beta.threads.create().id
+           session['thread_id'] = thread_id
        
        client.beta.threads.messages.create(
-           thread_id=thread.id,
+           thread_id=thread_id,
            role="user",
-           content=f"{context}\n\nCoachee: {user_message}"
+           content=user_message
        )
        
        run = client.beta.threads.runs.create(
-           thread_id=thread.id,
-           assistant_id=assistant_id
+           thread_id=thread_id,
+           assistant_id=assistant_id,
+           additional_instructions=context,
+           truncation_strategy={'type': 'last_messages', 'last_messages': len(recent)}
        )
        
-       # Warten auf Antwort
-       while run.status in ['queued', 'in_progress']:
-           time.sleep(1)
-           run = client.beta.threads.runs.retrieve(thread_id=thread.id, run_id=run.id)
+       # Warten auf Antwort (Backoff mit Deadline, hängende Runs werden abgebrochen)
+       try:
+           run = run_waiter.wait(client, thread_id, run)
+       except RunFailed as e:
+           print(f"⚠️ {e}")
+           run = e.run
        
        if run.status == 'completed':
-           messages = client.beta.threads.messages.list(thread_id=thread.id)
+           # Nur die Antwort dieses Runs laden
+           messages = client.beta.threads.messages.list(thread_id=thread_id, run_id=run.id, limit=1, order='desc')
            ai_response = messages.data[0].content[0].text.value
        else:
            ai_response = "Entschuldigung, ich hatte ein technisches Problem. Können Sie Ihre Frage wiederholen?"
@@ -1180,8 +1203,10 @@ def chat(session_id):
        session['messages'].append({
            'type': 'assistant',
            'content': ai_response,
-           'timestamp': datetime.now().isoformat()
+           'timestamp': datetime.now().isoformat(),
+           'phase': session['phase']
        })
+       context_manager.after_turn(session)
        
        return jsonify({
            'response': ai_response,
@@ -1,17 +1,22 @@
 #!/usr/bin/env python3
 import os
+import sys
 from flask import Flask, request, jsonify
-from openai import OpenAI
+# openai_client und run_waiter liegen in deployment/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deployment'))
+from openai_client import create_client
 from dotenv import load_dotenv
 import uuid, time
 from datetime import datetime
+from run_waiter import RunWaiter
 
 load_dotenv()
 app = Flask(__name__)
 sessions = {}
 
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+client = create_client()
 ASSISTANT_ID = os.getenv('ASSISTANT_ID')
+run_waiter = RunWaiter()
 
 def create_session():
     sid = str(uuid.uuid4())[:8]
@@ -37,14 +42,9 @@ def get_ai_response(thread_id, message):
             assistant_id=ASSISTANT_ID
         )
         
-        while run.status in ['queued', 'in_progress']:
-            time.sleep(1)
-            run = client.beta.threads.runs.retrieve(
-                thread_id=thread_id,
-                run_id=run.id
-            )
+        run = run_waiter.wait(client, thread_id, run)
         
-        messages = client.beta.threads.messages.list(thread_id=thread_id)
+        messages = client.beta.threads.messages.list(thread_id=thread_id, run_id=run.id, limit=1, order='desc')
         
         for msg in messages.data:
             if msg.role == 'assistant':
@@ -1,11 +1,15 @@
 
 #!/usr/bin/env python3
 import os
+import sys
 from flask import Flask, request, jsonify
-from openai import OpenAI
+# openai_client und run_waiter liegen in deployment/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'deployment'))
+from openai_client import create_client
 from dotenv import load_dotenv
 import uuid, time
 from datetime import datetime
+from run_waiter import RunWaiter
 
 # Load environment variables
 load_dotenv()
@@ -14,8 +18,9 @@ app = Flask(__name__)
 sessions = {}
 
 # OpenAI Client mit Ihren echten Credentials
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+client = create_client()
 ASSISTANT_ID = os.getenv('ASSISTANT_ID')
+run_waiter = RunWaiter()
 
 def create_session():
     sid = str(uuid.uuid4())[:8]
@@ -48,15 +53,10 @@ def get_ai_response(thread_id, message):
         )
         
         # Warten bis Run fertig ist
-        while run.status in ['queued', 'in_progress']:
-            time.sleep(1)
-            run = client.beta.threads.runs.retrieve(
-                thread_id=thread_id,
-                run_id=run.id
-            )
+        run = run_waiter.wait(client, thread_id, run)
         
         # Messages abrufen
-        messages = client.beta.threads.messages.list(thread_id=thread_id)
+        messages = client.beta.threads.messages.list(thread_id=thread_id, run_id=run.id, limit=1, order='desc')
         
         # Neueste Assistant-Message finden
         for msg in messages.data:
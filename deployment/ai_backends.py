@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""AI-Backends für den Coaching-Chat: Assistants-Threads oder Chat Completions mit lokalem Kontext
+
+Beide Backends bieten dieselbe Schnittstelle:
+    respond(session, message, cancel=None) -> Antworttext (oder None)
+    stream(session, message, cancel=None)  -> Iterator über Text-Deltas
+    record_turn(session, message, reply)   -> Turn ohne Modellaufruf festhalten (Antwort aus dem Cache)
+Fehler werden als Exceptions weitergereicht; get_ai_response macht daraus die Fehlerantwort.
+`cancel` (threading.Event) bricht den Turn ab (RunCancelled), ebenso das Schliessen des Streams
+durch den Aufrufer; über der Deadline gibt es RunTimeout. In beiden Fällen läuft bei OpenAI nichts weiter.
+
+Mit einem ContextManager (context_manager.py) gehen nur die letzten Turns wörtlich an das Modell,
+ältere Turns als Zusammenfassung. `on_usage(session, usage)` erhält nach jedem abgeschlossenen Run
+die Token-Usage ({'model', 'prompt_tokens', 'completion_tokens', 'seconds'}).
+"""
+import socket
+import threading
+import time
+
+from hedging import FINAL_STATUSES
+from run_waiter import RunCancelled, RunTimeout
+
+
+def _usage(model, usage, started):
+    """Usage-Objekt der API als Dict für on_usage"""
+    return {'model': model, 'prompt_tokens': usage.prompt_tokens, 'completion_tokens': usage.completion_tokens,
+            'seconds': round(time.monotonic() - started, 3)}
+
+
+def _interrupt(stream):
+    """Stream aus einem anderen Thread beenden - close() allein weckt ein blockiertes recv() nicht auf"""
+    try:
+        sock = stream.response.extensions['network_stream'].get_extra_info('socket')
+        if sock is not None:
+            sock.shutdown(socket.SHUT_RDWR)
+    except (AttributeError, KeyError, OSError):
+        pass
+    stream.close()
+
+
+class _StreamWatchdog:
+    """Bricht einen Stream unabhängig von eintreffenden Events ab (cancel gesetzt oder Deadline)
+
+    Ein Run, der in queued hängt, oder eine stockende Chat Completion schickt nichts - Prüfungen in der
+    Schleife über den Stream greifen dann nie. Der Watchdog ruft `stop(outcome)` auf (Run abbrechen oder
+    Verbindung schliessen); die Schleife wirft danach mit check() die passende Exception.
+    """
+
+    def __init__(self, deadline, cancel, stop, interval=0.25):
+        self.deadline = deadline
+        self.cancel = cancel
+        self.outcome = None  # 'abandoned' oder 'timeout', sobald der Watchdog ausgelöst hat
+        self._stop = stop
+        self._interval = interval
+        self._done = threading.Event()
+        threading.Thread(target=self._watch, daemon=True, name='stream-watchdog').start()
+
+    def _watch(self):
+        deadline_at = time.monotonic() + self.deadline
+        while not self._done.is_set():
+            if self.cancel is not None and self.cancel.is_set():
+                self.outcome = 'abandoned'
+            elif time.monotonic() >= deadline_at:
+                self.outcome = 'timeout'
+            else:
+                self._done.wait(min(self._interval, max(0.0, deadline_at - time.monotonic())))
+                continue
+            self._stop(self.outcome)
+            return
+
+    def check(self, what):
+        """Nach dem Auslösen RunCancelled/RunTimeout werfen; `what` benennt den Turn ('Run run_…')"""
+        if self.outcome == 'abandoned':
+            raise RunCancelled(f"{what} abgebrochen - Antwort wird nicht mehr gebraucht", None)
+        if self.outcome == 'timeout':
+            raise RunTimeout(f"{what} nach {self.deadline}s abgebrochen", None)
+
+    def close(self):
+        self._done.set()
+
+
+class AssistantsBackend:
+    """OpenAI Assistants: Message in den Session-Thread, Run starten, Antwort des Runs lesen
+
+    Der Phase-Kontext geht als additional_instructions an den Run und landet nicht im Thread.
+    Mit `hedging` (hedging.HedgedWaiter) startet respond() bei langer queued-Zeit einen zweiten Run.
+    """
+
+    name = 'assistants'
+    uses_threads = True
+
+    def __init__(self, client, assistant_id, run_waiter, phase_context, context=None, on_usage=None, hedging=None):
+        self.client = client
+        self.assistant_id = assistant_id
+        self.run_waiter = run_waiter
+        self.phase_context = phase_context  # (session) -> Kontext-Text der aktuellen Phase
+        self.context = context
+        self.on_usage = on_usage
+        self.hedging = hedging
+        self._adopting = {}  # Session-Thread -> Event, gesetzt sobald die Hedge-Antwort im Thread steht
+        self._lock = threading.Lock()
+
+    def add_user_message(self, session, message):
+        """Schreibt nur die User-Nachricht in den Thread"""
+        self.wait_adopted(session['thread_id'])
+        self.client.beta.threads.messages.create(
+            thread_id=session['thread_id'],
+            role="user",
+            content=message
+        )
+
+    def record_turn(self, session, message, reply):
+        """User-Nachricht und fertige Antwort in den Thread schreiben, damit spätere Runs sie sehen"""
+        self.add_user_message(session, message)
+        self.client.beta.threads.messages.create(
+            thread_id=session['thread_id'],
+            role="assistant",
+            content=reply
+        )
+
+    def run_options(self, session, message):
+        """Phase-Kontext als Run-Instruktion; mit ContextManager Verlauf kürzen und Zusammenfassung anhängen"""
+        instructions = self.phase_context(session)
+        options = {}
+        if self.context:
+            summary, recent = self.context.build(session, message)
+            options['truncation_strategy'] = {'type': 'last_messages', 'last_messages': len(recent) + 1}
+            if summary:
+                instructions += f"\n\n{summary}"
+        options['additional_instructions'] = instructions
+        return options
+
+    def respond(self, session, message, cancel=None):
+        thread_id = session['thread_id']
+        self.add_user_message(session, message)
+
+        started = time.monotonic()
+        options = self.run_options(session, message)
+        run = self.client.beta.threads.runs.create(
+            thread_id=thread_id,
+            assistant_id=self.assistant_id,
+            **options
+        )
+        primary = run
+        if self.hedging:
+            thread_id, run = self.hedging.wait(
+                self.client, thread_id, run,
+                launch_hedge=lambda: self.launch_hedge(session, message, options),
+                finish_hedge=self.delete_thread,
+                cancel=cancel
+            )
+        else:
+            run = self.run_waiter.wait(self.client, thread_id, run, cancel=cancel)
+        if self.on_usage and run.usage:
+            self.on_usage(session, _usage(run.model, run.usage, started))
+
+        # Nur die neueste Message dieses Runs laden - konstante Grösse unabhängig von der Thread-Länge
+        messages = self.client.beta.threads.messages.list(thread_id=thread_id, run_id=run.id, limit=1, order='desc')
+        reply = next((msg.content[0].text.value for msg in messages.data if msg.role == 'assistant'), None)
+
+        if thread_id != session['thread_id']:
+            # Der Hedge hat gewonnen: Antwort in den Session-Thread übernehmen, Hedge-Thread aufräumen
+            if reply:
+                self.adopt_reply(session['thread_id'], primary.id, reply)
+            self.delete_thread(thread_id)
+        return reply
+
+    def adopt_reply(self, thread_id, run_id, reply):
+        """Hedge-Antwort in den Session-Thread schreiben, sobald der abgebrochene erste Run einen Endstatus hat
+
+        Solange der Run noch aktiv ist, lehnt die API neue Messages im Thread ab. Der Turn wartet nicht
+        darauf - erst die nächste Nachricht in diesen Thread wartet in wait_adopted().
+        """
+        done = threading.Event()
+        with self._lock:
+            self._adopting[thread_id] = done
+
+        def adopt():
+            waiter = self.run_waiter
+            deadline_at = time.monotonic() + waiter.deadline
+            interval = waiter.initial_interval
+            try:
+                while True:
+                    run = self.client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run_id)
+                    if run.status in FINAL_STATUSES or time.monotonic() >= deadline_at:
+                        break
+                    time.sleep(interval)
+                    interval = min(interval * waiter.backoff, waiter.max_interval)
+                self.client.beta.threads.messages.create(thread_id=thread_id, role="assistant", content=reply)
+            except Exception as e:
+                print(f"⚠️ Hedge-Antwort konnte nicht in Thread {thread_id} übernommen werden: {e}")
+            finally:
+                with self._lock:
+                    if self._adopting.get(thread_id) is done:
+                        del self._adopting[thread_id]
+                done.set()
+        threading.Thread(target=adopt, daemon=True).start()
+
+    def wait_adopted(self, thread_id):
+        """Wartet, bis eine übernommene Hedge-Antwort im Thread steht - hält die Reihenfolge der Turns"""
+        with self._lock:
+            done = self._adopting.get(thread_id)
+        if done is not None:
+            done.wait(self.run_waiter.deadline)
+
+    def launch_hedge(self, session, message, options):
+        """Zweiter Versuch in einem frischen Thread mit dem Verlauf, den auch der erste Run sieht"""
+        last = options.get('truncation_strategy', {}).get('last_messages', 21) - 1
+        history = session['messages'][-last:] if last > 0 else []
+        messages = [{'role': 'assistant' if m['sender'] == 'assistant' else 'user', 'content': m['message']}
+                    for m in history if m['message']]
+        messages.append({'role': 'user', 'content': message})
+
+        thread = self.client.beta.threads.create(messages=messages)
+        run = self.client.beta.threads.runs.create(thread_id=thread.id, assistant_id=self.assistant_id, **options)
+        return thread.id, run
+
+    def delete_thread(self, thread_id):
+        """Hedge-Thread im Hintergrund löschen - kostet den Turn keine Latenz"""
+        def delete():
+            try:
+                self.client.beta.threads.delete(thread_id)
+            except Exception as e:
+                print(f"⚠️ Hedge-Thread {thread_id} konnte nicht gelöscht werden: {e}")
+        threading.Thread(target=delete, daemon=True).start()
+
+    def stream(self, session, message, cancel=None):
+        thread_id = session['thread_id']
+        self.add_user_message(session, message)
+
+        events = self.client.beta.threads.runs.create(
+            thread_id=thread_id,
+            assistant_id=self.assistant_id,
+            stream=True,
+            **self.run_options(session, message)
+        )
+        started = time.monotonic()
+        run_id, finished, stopped = None, False, False
+
+        def stop(outcome):
+            # Läuft im Watchdog-Thread: Run abbrechen (der Stream endet mit thread.run.cancelled),
+            # vor thread.run.created bleibt nur, die Verbindung zu schliessen
+            nonlocal stopped
+            if run_id:
+                stopped = True
+                self.run_waiter.cancel(self.client, thread_id, run_id, started, outcome)
+            else:
+                _interrupt(events)
+
+        watchdog = _StreamWatchdog(self.run_waiter.deadline, cancel, stop)
+        try:
+            for event in events:
+                watchdog.check(f"Run {run_id}")
+                if event.event == 'thread.run.created':
+                    run_id = event.data.id
+                elif event.event == 'thread.message.delta':
+                    for block in event.data.delta.content or []:
+                        if block.type == 'text' and block.text and block.text.value:
+                            yield block.text.value
+                elif event.event == 'thread.run.completed':
+                    finished = True
+                    if self.on_usage and event.data.usage:
+                        self.on_usage(session, _usage(event.data.model, event.data.usage, started))
+                elif event.event in ['thread.run.failed', 'thread.run.expired', 'thread.run.cancelled']:
+                    finished = True
+                    raise RuntimeError(f"Run {event.data.status}")
+            watchdog.check(f"Run {run_id}")
+        except Exception:
+            watchdog.check(f"Run {run_id}")  # Abbruch durch den Watchdog statt Fehler des geschlossenen Streams
+            raise
+        finally:
+            watchdog.close()
+            # Auch bei GeneratorExit (Client hat die Verbindung geschlossen): Run nicht weiterlaufen lassen
+            if run_id and not finished and not stopped:
+                self.run_waiter.cancel(self.client, thread_id, run_id, started, watchdog.outcome or 'abandoned')
+            events.close()
+
+
+class ChatCompletionsBackend:
+    """Chat Completions: Verlauf aus session['messages'], ein einziger Streaming-Request pro Turn"""
+
+    name = 'chat'
+    uses_threads = False
+
+    def __init__(self, client, model, system_prompt, phase_context, context=None, history_messages=40, deadline=90,
+                 on_usage=None):
+        self.client = client
+        self.model = model
+        self.system_prompt = system_prompt
+        self.phase_context = phase_context
+        self.context = context
+        self.deadline = deadline
+        self.on_usage = on_usage
+        self.history_messages = history_messages  # ohne ContextManager: maximale Anzahl Verlaufs-Nachrichten
+
+    def record_turn(self, session, message, reply):
+        """Nichts zu tun - der Verlauf liegt in session['messages'] (finish_turn)"""
+
+    def build_messages(self, session, message):
+        """System-Prompt + Phase-Kontext, danach der gespeicherte Verlauf und die neue Nachricht"""
+        system = f"{self.system_prompt}\n\nKONTEXT: {self.phase_context(session)}"
+        if self.context:
+            summary, history = self.context.build(session, message)
+            if summary:
+                system += f"\n\n{summary}"
+        else:
+            history = session['messages'][-self.history_messages:]
+
+        messages = [{'role': 'system', 'content': system}]
+        for item in history:
+            role = 'assistant' if item['sender'] == 'assistant' else 'user'
+            messages.append({'role': role, 'content': item['message']})
+        messages.append({'role': 'user', 'content': message})
+        return messages
+
+    def respond(self, session, message, cancel=None):
+        return ''.join(self.stream(session, message, cancel)) or None
+
+    def stream(self, session, message, cancel=None):
+        # Mit include_usage bringt ein letzter Chunk (ohne choices) die Usage mit
+        options = {'stream_options': {'include_usage': True}} if self.on_usage else {}
+        chunks = self.client.chat.completions.create(
+            model=self.model,
+            messages=self.build_messages(session, message),
+            stream=True,
+            **options
+        )
+        started = time.monotonic()
+        # Auch ohne eintreffende Chunks: Verbindung aus dem Watchdog-Thread schliessen, das beendet den Stream
+        watchdog = _StreamWatchdog(self.deadline, cancel, lambda outcome: _interrupt(chunks))
+
+        try:
+            for chunk in chunks:
+                watchdog.check('Chat-Turn')
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if chunk.usage and self.on_usage:
+                    self.on_usage(session, _usage(chunk.model, chunk.usage, started))
+            watchdog.check('Chat-Turn')
+        except Exception:
+            watchdog.check('Chat-Turn')  # Abbruch durch den Watchdog statt Fehler der geschlossenen Verbindung
+            raise
+        finally:
+            watchdog.close()
+            # Verbindung schliessen - OpenAI stoppt dann die Generierung
+            chunks.close()
+
+
+def create_backend(name, **options):
+    """Backend nach Namen (AI_BACKEND) erzeugen"""
+    if name == ChatCompletionsBackend.name:
+        return ChatCompletionsBackend(options['client'], options['model'], options['system_prompt'],
+                                      options['phase_context'], options.get('context'),
+                                      deadline=options['run_waiter'].deadline, on_usage=options.get('on_usage'))
+    if name == AssistantsBackend.name:
+        return AssistantsBackend(options['client'], options['assistant_id'], options['run_waiter'],
+                                 options['phase_context'], options.get('context'), options.get('on_usage'),
+                                 options.get('hedging'))
+    raise ValueError(f"Unbekanntes AI-Backend: {name}")
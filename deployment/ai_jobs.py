@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Asynchrone AI-Jobs: Warteschlange mit begrenztem Worker-Pool für OpenAI-Runs
+
+Mit `shared` (shared_state.SharedState) ist der Job-Status in allen gunicorn-Workern abrufbar und
+abbrechbar - ausgeführt wird ein Job weiterhin in dem Prozess, der ihn angenommen hat.
+"""
+import threading
+import queue
+import uuid
+import time
+from collections import deque
+
+from run_waiter import _percentile
+
+
+class _SharedCancel(threading.Event):
+    """Cancel-Event, das auch Abbrüche aus anderen Workern sieht (fragt höchstens alle `interval` s nach)"""
+
+    def __init__(self, shared, job_id, interval=1.0):
+        super().__init__()
+        self.shared = shared
+        self.job_id = job_id
+        self.interval = interval
+        self._next_check = 0.0
+
+    def is_set(self):
+        if not super().is_set() and time.monotonic() >= self._next_check:
+            self._next_check = time.monotonic() + self.interval
+            if self.shared.cancel_requested(self.job_id):
+                self.set()
+        return super().is_set()
+
+
+class AIJobQueue:
+    """Nimmt Chat-Turns entgegen und führt sie mit höchstens `workers` parallelen Threads aus"""
+
+    def __init__(self, workers=4, keep_finished=600, shared=None):
+        self.workers = max(1, workers)
+        self.keep_finished = keep_finished  # Sekunden, die fertige Jobs abrufbar bleiben
+        self.shared = shared
+        self.jobs = {}
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = 0
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0}
+        self._cancel_events = {}  # job_id -> threading.Event für cancellable Jobs
+        self._wait_times = deque(maxlen=1000)
+        self._run_times = deque(maxlen=1000)
+
+    def submit(self, func, *args, cancellable=False, **kwargs):
+        """Job einreihen und sofort die Job-ID zurückgeben
+
+        Mit cancellable=True bekommt func ein threading.Event als `cancel`-Argument,
+        das cancel(job_id) setzt.
+        """
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            'id': job_id,
+            'status': 'queued',
+            'created': time.time(),
+            'started': None,
+            'finished': None,
+            'result': None,
+            'error': None
+        }
+
+        if cancellable:
+            kwargs['cancel'] = _SharedCancel(self.shared, job_id) if self.shared else threading.Event()
+
+        with self._lock:
+            self._cleanup()
+            self.jobs[job_id] = job
+            if cancellable:
+                self._cancel_events[job_id] = kwargs['cancel']
+            self._stats['submitted'] += 1
+            self._start_workers()
+            published = dict(job)
+        self._publish(published, 'submitted')
+
+        self._queue.put((job_id, func, args, kwargs))
+        return job_id
+
+    def get(self, job_id):
+        """Aktuellen Stand eines Jobs (Kopie) oder None"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            info = dict(job) if job else None
+        if info is None:
+            # Job eines anderen Workers: Stand aus dem gemeinsamen Zustand (ohne Warteposition)
+            return self.shared.get_job(job_id) if self.shared else None
+
+        info['position'] = self._position(job_id) if info['status'] == 'queued' else 0
+        return info
+
+    def cancel(self, job_id):
+        """Wartenden Job verwerfen bzw. laufendem Job das Cancel-Event setzen; False wenn schon fertig"""
+        published = event = None
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job and job['finished']:
+                return False
+            if job and job['status'] == 'queued':
+                job['status'] = 'cancelled'
+                job['finished'] = time.time()
+                self._stats['cancelled'] += 1
+                published = dict(job)
+            elif job:
+                event = self._cancel_events.get(job_id)
+
+        if not job:
+            return self._cancel_remote(job_id)
+        if published:
+            self._publish(published, 'cancelled')
+            return True
+
+        if not event:
+            return False
+        event.set()
+        return True
+
+    def metrics(self):
+        """Kennzahlen für die Dimensionierung der Worker"""
+        cluster = self._cluster_counters()
+        with self._lock:
+            waits = sorted(self._wait_times)
+            runs = sorted(self._run_times)
+            return {
+                'workers': self.workers,
+                'queue_depth': self._queue.qsize(),
+                'running': self._running,
+                'submitted': self._stats['submitted'],
+                'completed': self._stats['completed'],
+                'failed': self._stats['failed'],
+                'cancelled': self._stats['cancelled'],
+                'wait_avg': round(sum(waits) / len(waits), 3) if waits else 0,
+                'wait_p95': round(_percentile(waits, 95), 3),
+                'wait_max': round(waits[-1], 3) if waits else 0,
+                'run_avg': round(sum(runs) / len(runs), 3) if runs else 0,
+                'run_p95': round(_percentile(runs, 95), 3),
+                'cluster': cluster
+            }
+
+    def _start_workers(self):
+        # Worker erst beim ersten Job starten (gunicorn forkt nach dem Import)
+        self._threads = [t for t in self._threads if t.is_alive()]
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"ai-job-worker-{len(self._threads) + 1}")
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job_id, func, args, kwargs = self._queue.get()
+            started = time.time()
+            # Abbruch über einen anderen Worker (Redis) vor dem Lock abfragen
+            remote_cancel = self.shared is not None and self.shared.cancel_requested(job_id)
+
+            published = None
+            with self._lock:
+                job = self.jobs.get(job_id)
+                if job and job['status'] == 'queued' and remote_cancel:
+                    job['status'] = 'cancelled'
+                    job['finished'] = started
+                    self._stats['cancelled'] += 1
+                    published = (dict(job), 'cancelled')
+                skip = job is not None and job['status'] == 'cancelled'
+                if skip:
+                    # Vor dem Start abgebrochen - Worker gleich wieder freigeben
+                    self._cancel_events.pop(job_id, None)
+                else:
+                    if job:
+                        job['status'] = 'running'
+                        job['started'] = started
+                        self._wait_times.append(started - job['created'])
+                        published = (dict(job), None)
+                    self._running += 1
+            if published:
+                self._publish(*published)
+            if skip:
+                self._queue.task_done()
+                continue
+
+            try:
+                result, error = func(*args, **kwargs), None
+            except Exception as e:
+                result, error = None, str(e)
+                print(f"❌ AI-Job {job_id} Fehler: {e}")
+
+            finished = time.time()
+            event = kwargs.get('cancel')
+            cancelled = event is not None and event.is_set()
+            with self._lock:
+                self._running -= 1
+                self._run_times.append(finished - started)
+                self._stats['cancelled' if cancelled else 'failed' if error else 'completed'] += 1
+                self._cancel_events.pop(job_id, None)
+                if job:
+                    job['status'] = 'cancelled' if cancelled else 'failed' if error else 'done'
+                    job['finished'] = finished
+                    job['result'] = result
+                    job['error'] = error
+                    published = dict(job)
+            if job:
+                self._publish(published, 'cancelled' if cancelled else 'failed' if error else 'completed')
+
+            self._queue.task_done()
+
+    def _position(self, job_id):
+        with self._queue.mutex:
+            for index, item in enumerate(self._queue.queue):
+                if item[0] == job_id:
+                    return index + 1
+        return 0
+
+    def _publish(self, job, counter=None):
+        # Ohne Lock aufrufen, mit einer Kopie des Jobs - Redis-I/O hält sonst alle Worker und Web-Handler auf.
+        # Ein Redis-Fehler darf den Job selbst nicht stoppen
+        if not self.shared:
+            return
+        try:
+            self.shared.put_job(job, self.keep_finished)
+            if counter:
+                self.shared.incr(f"jobs_{counter}")
+        except Exception as e:
+            print(f"⚠️ Job-Status {job['id']} nicht geteilt: {e}")
+
+    def _cancel_remote(self, job_id):
+        if not self.shared:
+            return False
+        job = self.shared.get_job(job_id)
+        if not job or job['finished']:
+            return False
+        self.shared.request_cancel(job_id, self.keep_finished)
+        return True
+
+    def _cluster_counters(self):
+        """Job-Zähler über alle Worker (nur mit shared)"""
+        if not self.shared:
+            return None
+        return {name[len('jobs_'):]: value for name, value in self.shared.counters().items()
+                if name.startswith('jobs_')}
+
+    def _cleanup(self):
+        limit = time.time() - self.keep_finished
+        expired = [jid for jid, job in self.jobs.items() if job['finished'] and job['finished'] < limit]
+        for jid in expired:
+            del self.jobs[jid]
+            self._cancel_events.pop(jid, None)
+
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import os
 import sys
-from coaching_webapp_real import app, start_email_monitor
+from coaching_webapp_real import app, start_email_monitor, thread_pool
 
 # Production-Konfiguration
 if os.environ.get('FLASK_ENV') == 'production':
@@ -14,6 +14,9 @@ if __name__ == '__main__':
     # E-Mail Monitor starten
     start_email_monitor()
     
+    # OpenAI-Threads für neue Sessions vorwärmen
+    thread_pool.start()
+    
     # Produktionsserver
     app.run(
         host='0.0.0.0',
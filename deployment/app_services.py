@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Dienste der Coaching-Web-App, einmal pro Prozess aufgebaut
+
+coaching_webapp_real.py enthält die App zweimal hintereinander (beide Hälften laufen beim Import).
+Alles, was Threads startet, Dateien oder Verbindungen hält oder atexit-Hooks registriert, entsteht deshalb
+hier: beide Hälften importieren dieselben Objekte, statt je eigene zu bauen. Konfiguration über
+Umgebungsvariablen (.env wird geladen).
+
+    from app_services import sessions, client, ai_jobs, thread_pool, transcript_log
+    on_shutdown('email_monitor', stop_email_monitor)   # statt atexit.register - zählt pro Name einmal
+"""
+import atexit
+import os
+
+from dotenv import load_dotenv
+
+from ai_jobs import AIJobQueue
+from context_manager import ContextManager, chat_summarizer
+from hedging import HedgePolicy
+from openai_client import create_client
+from rate_limiter import RateLimiter, in_lane
+from response_cache import ResponseCache
+from run_waiter import RunWaiter
+from session_store import create_session_store
+from shared_state import SharedState, connect
+from thread_pool import WarmThreadPool
+from transcript_log import open_log
+from turn_scheduler import TurnScheduler
+from usage_tracker import UsageTracker
+
+load_dotenv()
+
+# Sessions: 'sqlite' (dauerhaft, WAL, aktive Sessions im LRU-Cache), 'redis' (gemeinsam für alle
+# gunicorn-Worker, REDIS_URL; 'memory://' = In-Memory-Stand-in), 'spill' (im Speicher, kalte Sessions
+# komprimiert in SESSION_SPILL_DIR) oder 'memory' (unbegrenzt, gehen bei Neustart verloren).
+# Im Speicher bleiben höchstens SESSION_CACHE_SIZE Sessions bzw. geschätzt SESSION_CACHE_MB; wer länger als
+# SESSION_IDLE_SECONDS ruht, wird verdrängt und beim nächsten Zugriff nachgeladen.
+SESSION_STORE = os.getenv('SESSION_STORE', 'sqlite')
+redis_client = connect(os.getenv('REDIS_URL', 'redis://localhost:6379/0')) if SESSION_STORE == 'redis' else None
+# Job-Status und Zähler über alle Worker (nur mit Redis)
+shared_state = SharedState(redis_client) if redis_client else None
+sessions = create_session_store(
+    SESSION_STORE,
+    path=os.getenv('SESSION_DB', '/tmp/coaching_sessions.db'),
+    directory=os.getenv('SESSION_SPILL_DIR', '/tmp/coaching_spill'),
+    client=redis_client,
+    cache_size=int(os.getenv('SESSION_CACHE_SIZE', 1000)),
+    cache_mb=float(os.getenv('SESSION_CACHE_MB', 256)),
+    idle_seconds=float(os.getenv('SESSION_IDLE_SECONDS', 1800))
+)
+if hasattr(sessions, 'close'):
+    atexit.register(sessions.close)
+
+# OPENAI_BASE_URL zeigt optional auf einen lokalen Stand-in (fake_assistants.py)
+# Gemeinsames Rate-Limit für alle OpenAI-Requests - die SQLite-Datei teilen sich alle gunicorn-Worker
+rate_limiter = RateLimiter(
+    os.getenv('OPENAI_RATE_LIMIT_DB', '/tmp/openai_rate_limit.db'),
+    rpm=int(os.getenv('OPENAI_RPM', 500)),
+    tpm=int(os.getenv('OPENAI_TPM', 200000))
+)
+# Ein Client pro Prozess für Web-Handler, Thread-Pool und E-Mail-Monitor (Pool/Timeouts: openai_client.py)
+client = create_client(event_hooks=rate_limiter.event_hooks())
+ASSISTANT_ID = os.getenv("ASSISTANT_ID")
+
+# AI-Backend: 'assistants' (OpenAI-Threads) oder 'chat' (Chat Completions, Verlauf lokal)
+AI_BACKEND = os.getenv('AI_BACKEND', 'assistants')
+AI_CHAT_MODEL = os.getenv('AI_CHAT_MODEL', 'gpt-4o-mini')
+AI_SYSTEM_PROMPT = os.getenv('AI_SYSTEM_PROMPT', 'Du bist ein einfühlsamer, strukturierter Ruhestandscoach '
+                             'von Allenspach Coaching und arbeitest mit dem 8-Aufträge-System.')
+
+# Job-Warteschlange: Chat-Turns laufen in einem begrenzten Worker-Pool statt im Flask-Thread
+AI_WORKERS = int(os.getenv('AI_WORKERS', 4))
+ai_jobs = AIJobQueue(workers=AI_WORKERS, shared=shared_state)
+
+# Run-Polling mit Backoff; Runs über der Deadline werden abgebrochen
+run_waiter = RunWaiter(deadline=float(os.getenv('AI_RUN_DEADLINE', 90)))
+
+# Hedging: hängt ein Run länger als das Perzentil der queued-Zeiten, startet ein zweiter Versuch
+# (nur Assistants ohne Streaming; AI_HEDGE_MAX_RATE begrenzt den Anteil gehedgter Turns)
+AI_HEDGE = os.getenv('AI_HEDGE', 'false').lower() == 'true'
+hedge_policy = HedgePolicy(
+    percentile=float(os.getenv('AI_HEDGE_PERCENTILE', 95)),
+    min_delay=float(os.getenv('AI_HEDGE_MIN_DELAY', 2)),
+    max_rate=float(os.getenv('AI_HEDGE_MAX_RATE', 0.1))
+) if AI_HEDGE else None
+
+# Token-Verbrauch und Kosten pro Session, Phase, Kanal und Tag (/api/usage, /dashboard)
+usage_tracker = UsageTracker(max_sessions=int(os.getenv('USAGE_MAX_SESSIONS', 10000)))
+
+# Pro Session höchstens ein Run; Nachrichten, die währenddessen eintreffen, gehen gebündelt in den Folge-Run.
+# Mit Redis gilt das über alle Worker (Sperre pro Session, länger als die Run-Deadline)
+turn_scheduler = TurnScheduler(
+    shared=shared_state,
+    lock_ttl=run_waiter.deadline + 30,
+    refresh=lambda session: sessions.get(session['id'])
+)
+
+# Vorgewärmte Threads für create_session (THREAD_POOL_HIGH=0 schaltet den Pool ab)
+thread_pool = WarmThreadPool(
+    create=in_lane('batch', lambda: client.beta.threads.create().id),
+    delete=in_lane('batch', lambda thread_id: client.beta.threads.delete(thread_id)),
+    low=int(os.getenv('THREAD_POOL_LOW', 2)),
+    high=int(os.getenv('THREAD_POOL_HIGH', 5)) if AI_BACKEND == 'assistants' else 0
+)
+atexit.register(thread_pool.shutdown)
+
+# Transkripte append-only auf Platte (TRANSCRIPT_DIR leer = aus); Export und Dashboard lesen sie per mmap.
+# Ein Verzeichnis gehört einem Prozess - er sieht nur die eigenen Turns. Mit Redis (mehrere Worker) daher
+# standardmässig aus; transcript_records() fällt auf den Session-Store zurück, wenn dem Log Turns fehlen.
+TRANSCRIPT_DIR = os.getenv('TRANSCRIPT_DIR', '' if SESSION_STORE == 'redis' else '/tmp/coaching_transcripts')
+transcript_log = None
+if TRANSCRIPT_DIR:
+    try:
+        transcript_log = open_log(TRANSCRIPT_DIR,
+                                  segment_bytes=int(os.getenv('TRANSCRIPT_SEGMENT_MB', 64)) * 1024 * 1024)
+        atexit.register(transcript_log.close)
+    except BlockingIOError:
+        print(f"⚠️ Transkript-Log {TRANSCRIPT_DIR} wird schon von einem anderen Prozess geschrieben")
+
+# Kontext begrenzen: letzte AI_CONTEXT_TURNS Turns wörtlich, ältere als Zusammenfassung (0 = aus)
+AI_CONTEXT_TURNS = int(os.getenv('AI_CONTEXT_TURNS', 6))
+context_manager = ContextManager(
+    in_lane('batch', chat_summarizer(
+        client, AI_CHAT_MODEL,
+        on_usage=lambda phase, usage: usage_tracker.record(None, phase, channel='summary', **usage)
+    )),
+    keep_turns=AI_CONTEXT_TURNS,
+    save=sessions.save
+) if AI_CONTEXT_TURNS else None
+
+# Antwort-Cache für Eröffnungs-Turns im Web (z.B. Lernstil-Abfrage); AI_CACHE_SIZE=0 schaltet ab
+AI_CACHE_SIZE = int(os.getenv('AI_CACHE_SIZE', 500))
+response_cache = ResponseCache(
+    max_entries=AI_CACHE_SIZE,
+    ttl=float(os.getenv('AI_CACHE_TTL', 6 * 3600)),
+    # Ähnliche statt gleicher Nachrichten nur auf Wunsch und nur für kurze Grüsse (AI_CACHE_FUZZY=0.9)
+    fuzzy=float(os.getenv('AI_CACHE_FUZZY', 0)) or None,
+    fuzzy_max_chars=int(os.getenv('AI_CACHE_FUZZY_MAX_CHARS', 30))
+) if AI_CACHE_SIZE else None
+
+# Shutdown-Hooks der App pro Name: die zweite Hälfte ersetzt den Hook der ersten statt ihn zu verdoppeln.
+# Zuletzt registriert, läuft also vor dem Schliessen von Store, Thread-Pool und Transkript-Log
+_shutdown_hooks = {}
+
+
+def on_shutdown(name, hook):
+    _shutdown_hooks[name] = hook
+
+
+@atexit.register
+def _run_shutdown_hooks():
+    for hook in reversed(list(_shutdown_hooks.values())):
+        hook()
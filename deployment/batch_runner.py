@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Parallele Abarbeitung eines Rückstaus (z.B. ungelesene E-Mails) mit begrenzter Parallelität
+
+    results, stats = run_parallel(answer, inquiries, concurrency=4, cancel=stop_event)
+
+Jeder Worker läuft in einer Kopie des aufrufenden contextvars-Kontexts - die Rate-Limit-Spur
+(rate_limiter.in_lane) gilt also auch für die Requests der Worker. Beim Herunterfahren wartet
+join_workers() auf alle noch laufenden Worker (die Threads sind Daemons).
+"""
+import contextvars
+import threading
+import time
+import weakref
+
+_workers = weakref.WeakSet()  # laufende Worker-Threads aller run_parallel-Aufrufe
+
+
+def join_workers(timeout):
+    """Auf laufende Worker warten, höchstens timeout Sekunden insgesamt; liefert die Anzahl noch laufender"""
+    deadline = time.monotonic() + timeout
+    for thread in list(_workers):
+        thread.join(max(0.0, deadline - time.monotonic()))
+    return sum(1 for thread in list(_workers) if thread.is_alive())
+
+
+def run_parallel(func, items, concurrency=4, cancel=None):
+    """func(item) für alle items mit höchstens `concurrency` Threads
+
+    Liefert (results, stats); results in der Reihenfolge von items, je
+    {'item', 'result', 'error', 'seconds'}. Nach `cancel` (threading.Event) startet kein neues item
+    mehr (error='cancelled'); laufende Aufrufe reagieren selbst darauf.
+    """
+    items = list(items)
+    results = [{'item': item, 'result': None, 'error': 'cancelled', 'seconds': 0.0} for item in items]
+    concurrency = max(1, min(concurrency, len(items) or 1))
+    pending = iter(range(len(items)))
+    lock = threading.Lock()
+    started = time.monotonic()
+
+    def worker():
+        while not (cancel is not None and cancel.is_set()):
+            with lock:
+                index = next(pending, None)
+            if index is None:
+                return
+            item_started = time.monotonic()
+            try:
+                results[index].update(result=func(items[index]), error=None)
+            except Exception as e:
+                results[index]['error'] = f"{type(e).__name__}: {e}"
+            results[index]['seconds'] = round(time.monotonic() - item_started, 3)
+
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(worker,), name=f'batch-{i}')
+               for i in range(concurrency)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+        _workers.add(thread)
+    for thread in threads:
+        thread.join()
+
+    seconds = time.monotonic() - started
+    done = [r for r in results if r['error'] != 'cancelled']
+    stats = {
+        'items': len(items),
+        'ok': sum(1 for r in done if r['error'] is None),
+        'failed': sum(1 for r in done if r['error'] is not None),
+        'cancelled': len(items) - len(done),
+        'concurrency': concurrency,
+        'seconds': round(seconds, 3),
+        'per_minute': round(len(done) / seconds * 60, 1) if seconds else 0.0
+    }
+    return results, stats
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Benchmark: Assistants-Threads vs. Chat Completions mit lokalem Kontext
+
+Beide Backends laufen mit demselben OpenAI-SDK gegen den Fake-Assistants-Server und gleicher
+Modell-Zeit (queued + in_progress). Gemessen werden Turn-Latenz, Time-to-first-Token und
+API-Requests pro Turn. Mit --context-turns läuft der ContextManager mit (Token-Ersparnis).
+
+    python bench_backends.py --sessions 10 --turns 6 --json results/backends.json
+    python bench_backends.py --turns 20 --context-turns 4
+"""
+import argparse
+import json
+import os
+import time
+
+from openai import OpenAI
+
+from ai_backends import AssistantsBackend, ChatCompletionsBackend
+from context_manager import ContextManager, chat_summarizer
+from bench_load import MESSAGES, summarize
+from fake_assistants import start_server, REPLY_TEMPLATES
+from run_waiter import RunWaiter
+
+SYSTEM_PROMPT = "Du bist ein empathischer Ruhestandscoach."
+
+
+def phase_context(session):
+    return f"Du bist ein Ruhestandscoach. Aktuelle Phase: {session['phase']}/5"
+
+
+def make_backend(name, client, context):
+    if name == 'chat':
+        return ChatCompletionsBackend(client, 'gpt-4o-mini', SYSTEM_PROMPT, phase_context, context)
+    return AssistantsBackend(client, 'asst_fake', RunWaiter(), phase_context, context)
+
+
+def run_backend(name, fake, args):
+    client = OpenAI(api_key='fake', base_url=fake.base_url)
+    context = ContextManager(chat_summarizer(client, 'gpt-4o-mini'),
+                             keep_turns=args.context_turns) if args.context_turns else None
+    backend = make_backend(name, client, context)
+
+    # Sessions vorbereiten (Thread-Erstellung zählt nicht zur Turn-Latenz, siehe Thread-Pool)
+    sessions = []
+    for _ in range(args.sessions):
+        thread_id = client.beta.threads.create().id if backend.uses_threads else None
+        sessions.append({'id': str(len(sessions)), 'thread_id': thread_id, 'phase': 1, 'messages': []})
+    fake.reset_stats()
+
+    turns, first_tokens = [], []
+    for turn in range(args.turns):
+        for session in sessions:
+            message = MESSAGES[turn % len(MESSAGES)]
+            started = time.perf_counter()
+            if args.stream:
+                parts = []
+                for delta in backend.stream(session, message):
+                    if not parts:
+                        first_tokens.append(time.perf_counter() - started)
+                    parts.append(delta)
+                reply = ''.join(parts)
+            else:
+                reply = backend.respond(session, message)
+            turns.append(time.perf_counter() - started)
+
+            session['messages'].append({'sender': 'user', 'message': message})
+            session['messages'].append({'sender': 'assistant', 'message': reply or ''})
+            if context:
+                context.after_turn(session)
+
+    stats = fake.stats()
+    turns_total = args.sessions * args.turns
+    return {
+        'turns': summarize(turns),
+        'first_token': summarize(first_tokens) if args.stream else None,
+        'requests_per_turn': round(stats['total'] / turns_total, 2),
+        'requests': stats['requests'],
+        'context': context.metrics() if context else None
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=5)
+    parser.add_argument('--turns', type=int, default=4, help='Turns pro Session')
+    parser.add_argument('--backends', nargs='+', default=['assistants', 'chat'], choices=['assistants', 'chat'])
+    parser.add_argument('--context-turns', type=int, default=0, help='ContextManager mit K wörtlichen Turns (0 = aus)')
+    parser.add_argument('--no-stream', dest='stream', action='store_false', help='respond() statt stream() messen')
+    parser.add_argument('--fake-latency', default='lognormal:0.03,0.5')
+    parser.add_argument('--fake-queued', default='uniform:0.1,0.5')
+    parser.add_argument('--fake-in-progress', default='lognormal:1.0,0.4')
+    parser.add_argument('--fake-token-delay', default='fixed:0.01')
+    parser.add_argument('--json', help='Ergebnisse als JSON in diese Datei schreiben')
+    args = parser.parse_args()
+
+    fake = start_server(latency=args.fake_latency, queued=args.fake_queued, in_progress=args.fake_in_progress,
+                        token_delay=args.fake_token_delay, templates=REPLY_TEMPLATES)
+    results = {name: run_backend(name, fake, args) for name in args.backends}
+    fake.shutdown()
+
+    mode = 'stream' if args.stream else 'respond'
+    print(f"📊 Backend-Vergleich ({args.sessions} Sessions × {args.turns} Turns, {mode})")
+    for name, data in results.items():
+        line = f"⏱️ {name:<11} Turn p50={data['turns']['p50_ms']}ms p95={data['turns']['p95_ms']}ms"
+        if data['first_token']:
+            line += f" | erstes Token p50={data['first_token']['p50_ms']}ms p95={data['first_token']['p95_ms']}ms"
+        print(f"{line} | {data['requests_per_turn']} Requests/Turn")
+        if data['context']:
+            ctx = data['context']
+            print(f"🧠 {'':<11} Tokens {ctx['tokens_full']} → {ctx['tokens_sent']} "
+                  f"({ctx['savings_rate']:.1%} gespart, {ctx['summaries']} Zusammenfassungen)")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or '.', exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'backends', 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'config': {k: v for k, v in vars(args).items() if k != 'json'}, 'results': results}, f, indent=2)
+        print(f"💾 Ergebnisse gespeichert: {args.json}")
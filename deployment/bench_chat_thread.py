@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Benchmark: /chat/<session_id> aus coaching_webapp_real_broken.py - neuer Thread pro Nachricht vs. Session-Thread
+
+Bildet die OpenAI-Aufrufe beider Varianten mit dem echten SDK gegen den Fake-Assistants-Server nach
+und misst Turn-Latenz sowie API-Requests pro Turn.
+
+    python bench_chat_thread.py --sessions 5 --turns 6 --json results/chat_thread.json
+"""
+import argparse
+import json
+import os
+import time
+
+from openai import OpenAI
+
+from bench_load import MESSAGES, summarize
+from fake_assistants import start_server, REPLY_TEMPLATES
+from run_waiter import RunWaiter
+
+CONTEXT = "Du bist ein professioneller Ruhestandscoach. Der Coachee ist in Phase 1 von 5 (Standortbestimmung)."
+
+
+def thread_per_message(client, waiter, session, message):
+    """Bisheriges Verhalten: jeder Turn in einem frischen Thread, Verlauf im Prompt"""
+    recent = session['messages'][-3:]
+    thread = client.beta.threads.create()
+    client.beta.threads.messages.create(thread_id=thread.id, role='user',
+                                        content=f"{CONTEXT}\nLetzte Nachrichten: {recent}\n\nCoachee: {message}")
+    run = client.beta.threads.runs.create(thread_id=thread.id, assistant_id='asst_fake')
+    waiter.wait(client, thread.id, run)
+    return client.beta.threads.messages.list(thread_id=thread.id).data[0].content[0].text.value
+
+
+def session_thread(client, waiter, session, message):
+    """Neues Verhalten: Thread einmal pro Session, Kontext als Run-Instruktion"""
+    if not session.get('thread_id'):
+        session['thread_id'] = client.beta.threads.create().id
+    thread_id = session['thread_id']
+    client.beta.threads.messages.create(thread_id=thread_id, role='user', content=message)
+    run = client.beta.threads.runs.create(thread_id=thread_id, assistant_id='asst_fake', additional_instructions=CONTEXT)
+    run = waiter.wait(client, thread_id, run)
+    messages = client.beta.threads.messages.list(thread_id=thread_id, run_id=run.id, limit=1, order='desc')
+    return messages.data[0].content[0].text.value
+
+
+def run_variant(turn_fn, fake, args):
+    client = OpenAI(api_key='fake', base_url=fake.base_url)
+    waiter = RunWaiter()
+    sessions = [{'messages': []} for _ in range(args.sessions)]
+    fake.reset_stats()
+
+    latencies = []
+    for turn in range(args.turns):
+        for session in sessions:
+            message = MESSAGES[turn % len(MESSAGES)]
+            started = time.perf_counter()
+            reply = turn_fn(client, waiter, session, message)
+            latencies.append(time.perf_counter() - started)
+            session['messages'] += [{'type': 'user', 'content': message}, {'type': 'assistant', 'content': reply}]
+
+    stats = fake.stats()
+    return {
+        'turns': summarize(latencies),
+        'requests_per_turn': round(stats['total'] / (args.sessions * args.turns), 2),
+        'threads_created': stats['requests'].get('POST /threads', 0),
+        'requests': stats['requests']
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=5)
+    parser.add_argument('--turns', type=int, default=6, help='Turns pro Session')
+    parser.add_argument('--fake-latency', default='lognormal:0.05,0.5')
+    parser.add_argument('--fake-queued', default='uniform:0.1,0.5')
+    parser.add_argument('--fake-in-progress', default='lognormal:1.0,0.4')
+    parser.add_argument('--json', help='Ergebnisse als JSON in diese Datei schreiben')
+    args = parser.parse_args()
+
+    fake = start_server(latency=args.fake_latency, queued=args.fake_queued, in_progress=args.fake_in_progress,
+                        templates=REPLY_TEMPLATES)
+    results = {'thread_per_message': run_variant(thread_per_message, fake, args),
+               'session_thread': run_variant(session_thread, fake, args)}
+    fake.shutdown()
+
+    print(f"📊 /chat/<session_id>: {args.sessions} Sessions × {args.turns} Turns")
+    for name, data in results.items():
+        print(f"⏱️ {name:<18} p50={data['turns']['p50_ms']}ms p95={data['turns']['p95_ms']}ms | "
+              f"{data['requests_per_turn']} Requests/Turn | {data['threads_created']} Threads")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or '.', exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'chat_thread', 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'config': {k: v for k, v in vars(args).items() if k != 'json'}, 'results': results}, f, indent=2)
+        print(f"💾 Ergebnisse gespeichert: {args.json}")
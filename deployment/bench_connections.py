@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Benchmark: Verbindungs-Wiederverwendung des OpenAI-Clients bei stoßweiser Last
+
+Vergleicht gegen den Fake-Assistants-Server (mit simuliertem TCP/TLS-Handshake pro neuer Verbindung):
+  new_client      - neuer Client (und damit neue Verbindung) pro Request
+  small_keepalive - geteilter Client, aber nur 2 Keep-Alive-Verbindungen (Bursts bauen neu auf)
+  shared_pool     - geteilter Client aus openai_client.create_client() mit den Standard-Einstellungen
+
+    python bench_connections.py --bursts 10 --concurrency 20 --json results/connections.json
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+from bench_load import summarize
+from fake_assistants import start_server
+from openai_client import create_client, client_settings
+
+
+def run_burst(get_client, concurrency, latencies, errors):
+    def one():
+        client, owned = get_client()
+        started = time.perf_counter()
+        try:
+            client.beta.threads.create()
+        except Exception as e:
+            errors.append(type(e).__name__)
+        finally:
+            latencies.append(time.perf_counter() - started)
+            if owned:
+                client.close()
+
+    threads = [threading.Thread(target=one) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def run_variant(name, fake, args):
+    if name == 'new_client':
+        get_client = lambda: (create_client(api_key='fake', base_url=fake.base_url, max_retries=0), True)
+        shared = None
+    else:
+        overrides = {'max_keepalive': 2} if name == 'small_keepalive' else {}
+        shared = create_client(api_key='fake', base_url=fake.base_url, max_retries=0, **overrides)
+        get_client = lambda: (shared, False)
+
+    fake.reset_stats()
+    latencies, errors = [], []
+    started = time.perf_counter()
+    for _ in range(args.bursts):
+        run_burst(get_client, args.concurrency, latencies, errors)
+        time.sleep(args.pause)
+    elapsed = time.perf_counter() - started - args.bursts * args.pause
+    if shared:
+        shared.close()
+
+    stats = fake.stats()
+    return {
+        'requests': summarize(latencies),
+        'connections': stats['connections'],
+        'requests_per_connection': round(stats['total'] / max(1, stats['connections']), 1),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'errors': len(errors)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bursts', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=20, help='gleichzeitige Requests pro Burst')
+    parser.add_argument('--pause', type=float, default=0.2, help='Pause zwischen Bursts (Sekunden)')
+    parser.add_argument('--fake-latency', default='lognormal:0.03,0.3')
+    parser.add_argument('--fake-handshake', default='uniform:0.05,0.15', help='Kosten pro neuer Verbindung')
+    parser.add_argument('--json', help='Ergebnisse als JSON in diese Datei schreiben')
+    args = parser.parse_args()
+
+    fake = start_server(latency=args.fake_latency, handshake=args.fake_handshake)
+    results = {name: run_variant(name, fake, args) for name in ('new_client', 'small_keepalive', 'shared_pool')}
+    fake.shutdown()
+
+    print(f"📊 Verbindungen: {args.bursts} Bursts × {args.concurrency} Requests, Handshake {args.fake_handshake}")
+    for name, data in results.items():
+        print(f"⏱️ {name:<16} p50={data['requests']['p50_ms']}ms p95={data['requests']['p95_ms']}ms | "
+              f"{data['connections']} Verbindungen ({data['requests_per_connection']} Req/Verb.) | "
+              f"{data['throughput_rps']} Req/s | {data['errors']} Fehler")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or '.', exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'connections', 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'config': {k: v for k, v in vars(args).items() if k != 'json'},
+                       'client_settings': client_settings(), 'results': results}, f, indent=2)
+        print(f"💾 Ergebnisse gespeichert: {args.json}")
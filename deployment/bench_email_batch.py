@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Benchmark: E-Mail-Rückstau einzeln (bisher) vs. parallel mit gesammeltem Versand
+
+Startet den Fake-Assistants-Server und die App in diesem Prozess; IMAP und SMTP sind lokale
+Stand-ins mit simulierter Verbindungs- und Versandzeit.
+
+    python bench_email_batch.py --emails 20 --concurrency 1 4 8 --json results/email_batch.json
+"""
+import argparse
+import json
+import os
+import time
+
+from bench_load import MESSAGES
+from fake_assistants import start_server, REPLY_TEMPLATES, Distribution
+
+
+class FakeMailbox:
+    """IMAP-Stand-in: nur die Flags, die check_email_inbox setzt"""
+
+    def __init__(self):
+        self.seen = set()
+
+    def store(self, msg_id, command, flag):
+        self.seen.add(msg_id)
+
+
+class FakeSMTP:
+    """SMTP-Stand-in: Verbindungsaufbau (STARTTLS + Login) und Versand kosten Zeit"""
+
+    connections = 0
+    sent = 0
+
+    def __init__(self, connect, send):
+        self.send = send
+        FakeSMTP.connections += 1
+        time.sleep(connect.sample())
+
+    def send_message(self, msg):
+        time.sleep(self.send.sample())
+        FakeSMTP.sent += 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def inquiries(count):
+    return [{'msg_id': str(i).encode(), 'sender': f"coachee{i}@example.ch", 'subject': 'Coaching Anfrage',
+             'body': f"{MESSAGES[i % len(MESSAGES)]} (Anfrage {i})"} for i in range(count)]
+
+
+def one_by_one(app, mail, backlog):
+    """Bisheriges Verhalten: pro E-Mail Session + Run, dann eigene SMTP-Verbindung"""
+    started = time.monotonic()
+    for inquiry in backlog:
+        session, ai_response = app.answer_email_inquiry(inquiry)
+        app.send_coaching_email(inquiry['sender'], f"Re: {inquiry['subject']}", ai_response,
+                                f"http://localhost:8080/coaching-session/{session['id']}")
+        mail.store(inquiry['msg_id'], '+FLAGS', '\\Seen')
+    total = time.monotonic() - started
+    return {'answered': len(backlog), 'total_s': round(total, 2), 'per_minute': round(len(backlog) / total * 60, 1)}
+
+
+def run_variant(app, name, concurrency, args):
+    FakeSMTP.connections = FakeSMTP.sent = 0
+    mail = FakeMailbox()
+    backlog = inquiries(args.emails)
+    if name == 'one_by_one':
+        result = one_by_one(app, mail, backlog)
+    else:
+        app.EMAIL_BATCH_CONCURRENCY = concurrency
+        batch = app.answer_email_backlog(mail, backlog)
+        result = {k: batch[k] for k in ('answered', 'ai_s', 'send_s', 'total_s', 'per_minute')}
+    return {**result, 'concurrency': concurrency, 'smtp_connections': FakeSMTP.connections,
+            'sent': FakeSMTP.sent, 'marked_seen': len(mail.seen)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--emails', type=int, default=20, help='Grösse des Rückstaus')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--fake-latency', default='lognormal:0.05,0.5')
+    parser.add_argument('--fake-queued', default='uniform:0.1,0.5')
+    parser.add_argument('--fake-in-progress', default='lognormal:1.0,0.4')
+    parser.add_argument('--smtp-connect', default='uniform:0.3,0.6', help='STARTTLS + Login pro Verbindung')
+    parser.add_argument('--smtp-send', default='uniform:0.02,0.08', help='Versand pro Nachricht')
+    parser.add_argument('--json', help='Ergebnisse als JSON in diese Datei schreiben')
+    args = parser.parse_args()
+
+    fake = start_server(latency=args.fake_latency, queued=args.fake_queued, in_progress=args.fake_in_progress,
+                        templates=REPLY_TEMPLATES)
+    os.environ.update(OPENAI_BASE_URL=fake.base_url, AI_CACHE_SIZE='0', THREAD_POOL_HIGH='0')
+    os.environ.setdefault('OPENAI_API_KEY', 'fake')
+    os.environ.setdefault('ASSISTANT_ID', 'asst_fake')
+
+    import coaching_webapp_real as app
+    connect, send = Distribution(args.smtp_connect), Distribution(args.smtp_send)
+    app.smtp_connect = lambda: FakeSMTP(connect, send)
+
+    results = {'one_by_one': run_variant(app, 'one_by_one', 1, args)}
+    for concurrency in args.concurrency:
+        results[f"batch_{concurrency}"] = run_variant(app, 'batch', concurrency, args)
+    fake.shutdown()
+
+    print(f"📊 E-Mail-Rückstau: {args.emails} Anfragen")
+    for name, data in results.items():
+        print(f"⏱️ {name:<12} {data['total_s']}s | {data['per_minute']} E-Mails/min | "
+              f"{data['smtp_connections']} SMTP-Verbindungen | {data['answered']} beantwortet")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or '.', exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'email_batch', 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'config': {k: v for k, v in vars(args).items() if k != 'json'}, 'results': results}, f, indent=2)
+        print(f"💾 Ergebnisse gespeichert: {args.json}")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Benchmark: Tail-Latenz von get_ai_response mit und ohne Hedging bei gelegentlich hängenden Runs
+
+Der Fake-Assistants-Server lässt einen Anteil Runs lange in queued stehen ('tail'-Verteilung).
+Beide Varianten beantworten dieselben Turns über den AssistantsBackend; verglichen werden p50/p95/p99,
+Hedge-Anteil, Gewinner und die zusätzlich gestarteten Runs.
+
+    python bench_hedging.py --sessions 8 --turns 15 --json results/hedging.json
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+from openai import OpenAI
+
+from ai_backends import AssistantsBackend
+from bench_load import MESSAGES, summarize
+from fake_assistants import start_server, REPLY_TEMPLATES
+from hedging import HedgePolicy, HedgedWaiter
+from run_waiter import RunWaiter
+
+
+def phase_context(session):
+    return f"Du bist ein Ruhestandscoach. Aktuelle Phase: {session['phase']}/5"
+
+
+def run_variant(hedged, fake, args):
+    client = OpenAI(api_key='fake', base_url=fake.base_url, max_retries=0)
+    waiter = RunWaiter()
+    policy = HedgePolicy(percentile=args.percentile, min_delay=args.min_delay, max_rate=args.max_rate,
+                         min_samples=args.min_samples) if hedged else None
+    backend = AssistantsBackend(client, 'asst_fake', waiter, phase_context,
+                                hedging=HedgedWaiter(waiter, policy) if policy else None)
+
+    sessions = [{'id': str(i), 'thread_id': client.beta.threads.create().id, 'phase': 1, 'messages': []}
+                for i in range(args.sessions)]
+    fake.reset_stats()
+    latencies, lock = [], threading.Lock()
+
+    def coachee(session):
+        for turn in range(args.turns):
+            message = MESSAGES[turn % len(MESSAGES)]
+            started = time.perf_counter()
+            reply = backend.respond(session, message)
+            with lock:
+                latencies.append(time.perf_counter() - started)
+            session['messages'] += [{'sender': 'user', 'message': message},
+                                    {'sender': 'assistant', 'message': reply or ''}]
+
+    threads = [threading.Thread(target=coachee, args=(s,)) for s in sessions]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    requests = fake.stats()['requests']
+    turns = args.sessions * args.turns
+    return {
+        'turns': summarize(latencies),
+        'runs_per_turn': round(requests.get('POST /threads/{id}/runs', 0) / turns, 3),
+        'hedging': policy.metrics() if policy else None
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=8, help='gleichzeitige Coachees')
+    parser.add_argument('--turns', type=int, default=15, help='Turns pro Coachee')
+    parser.add_argument('--percentile', type=float, default=95)
+    parser.add_argument('--min-delay', type=float, default=1.0)
+    parser.add_argument('--max-rate', type=float, default=0.1)
+    parser.add_argument('--min-samples', type=int, default=20)
+    parser.add_argument('--fake-latency', default='lognormal:0.03,0.3')
+    parser.add_argument('--fake-queued', default='tail:0.3,0.05,10', help='Median, Ausreisser-Anteil, Ausreisser-Dauer')
+    parser.add_argument('--fake-in-progress', default='lognormal:1.0,0.3')
+    parser.add_argument('--json', help='Ergebnisse als JSON in diese Datei schreiben')
+    args = parser.parse_args()
+
+    fake = start_server(latency=args.fake_latency, queued=args.fake_queued, in_progress=args.fake_in_progress,
+                        templates=REPLY_TEMPLATES)
+    results = {'no_hedging': run_variant(False, fake, args), 'hedging': run_variant(True, fake, args)}
+    fake.shutdown()
+
+    print(f"📊 Hedging: {args.sessions} Coachees × {args.turns} Turns, queued {args.fake_queued}")
+    for name, data in results.items():
+        hedging = data['hedging']
+        extra = (f" | Hedges {hedging['hedged']} ({hedging['hedge_rate']:.0%}), gewonnen {hedging['hedge_wins']}, "
+                 f"gespart ~{hedging['saved_s']}s, Schwelle {hedging['threshold_s']}s") if hedging else ''
+        print(f"⏱️ {name:<11} p50={data['turns']['p50_ms']}ms p95={data['turns']['p95_ms']}ms "
+              f"p99={data['turns']['p99_ms']}ms | {data['runs_per_turn']} Runs/Turn{extra}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or '.', exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'hedging', 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'config': {k: v for k, v in vars(args).items() if k != 'json'}, 'results': results}, f, indent=2)
+        print(f"💾 Ergebnisse gespeichert: {args.json}")
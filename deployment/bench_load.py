@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Lastgenerator: N gleichzeitige Coachees gegen /coaching und /api/intelligent-chat
+
+Ohne --target startet das Skript den Fake-Assistants-Server und die Flask-App selbst
+(alles lokal, kein Netzwerk). Ergebnisse als JSON für den Vergleich zwischen Releases:
+
+    python bench_load.py --coachees 50 --turns 5 --json results/load.json
+    python bench_load.py --target http://localhost:8080 --coachees 20 --stream
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+
+MESSAGES = [
+    "Hallo, ich gehe nächstes Jahr in Pension und weiss nicht, was dann kommt.",
+    "Ich lerne eher visuell, mit Bildern und Übersichten.",
+    "Meine Ausgangssituation: 35 Jahre im gleichen Betrieb, das Team ist mir wichtig.",
+    "Ehrlich gesagt machen mir die Gefühle rund um den Abschied zu schaffen.",
+    "Mein Herzenswunsch wäre, mehr Zeit mit meinen Enkeln und im Garten zu verbringen.",
+    "Welche Schritte könnte ich jetzt schon planen?"
+]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def summarize(latencies):
+    return {
+        'count': len(latencies),
+        'avg_ms': round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'max_ms': round(max(latencies) * 1000, 1) if latencies else 0
+    }
+
+
+def get_json(url, timeout=30):
+    with urllib.request.urlopen(url, timeout=timeout) as r:
+        return json.loads(r.read())
+
+
+class Coachee(threading.Thread):
+    """Simulierter Coachee: Session öffnen, dann mehrere Turns nacheinander"""
+
+    def __init__(self, target, turns, think_time, stream, results):
+        super().__init__(daemon=True)
+        self.target = target
+        self.turns = turns
+        self.think_time = think_time
+        self.stream = stream
+        self.results = results
+
+    def run(self):
+        try:
+            started = time.perf_counter()
+            with urllib.request.urlopen(f"{self.target}/coaching", timeout=60) as r:
+                html = r.read().decode('utf-8')
+            self.results.record('session', time.perf_counter() - started)
+            session_id = re.search(r"const sessionId = '(\w+)'", html).group(1)
+        except Exception as e:
+            self.results.error('session', e)
+            return
+
+        for turn in range(self.turns):
+            payload = {'session_id': session_id, 'message': MESSAGES[turn % len(MESSAGES)]}
+            if self.stream:
+                payload['stream'] = True
+            request = urllib.request.Request(f"{self.target}/api/intelligent-chat",
+                                             data=json.dumps(payload).encode('utf-8'),
+                                             headers={'Content-Type': 'application/json'})
+            try:
+                started = time.perf_counter()
+                with urllib.request.urlopen(request, timeout=300) as r:
+                    if self.stream:
+                        first = r.readline()
+                        self.results.record('first_token', time.perf_counter() - started)
+                        body = first + r.read()
+                        reply = json.loads(body.decode('utf-8').strip().split('\n\n')[-1][6:])['response']
+                    else:
+                        reply = json.loads(r.read())['response']
+                self.results.record('turn', time.perf_counter() - started)
+                if reply.startswith('Fehler'):
+                    self.results.error('turn', reply)
+            except (urllib.error.URLError, OSError, ValueError, KeyError) as e:
+                self.results.error('turn', e)
+
+            time.sleep(self.think_time)
+
+
+class Results:
+    def __init__(self):
+        self.latencies = {'session': [], 'turn': [], 'first_token': []}
+        self.errors = {'session': 0, 'turn': 0}
+        self.error_samples = []
+        self._lock = threading.Lock()
+
+    def record(self, kind, seconds):
+        with self._lock:
+            self.latencies[kind].append(seconds)
+
+    def error(self, kind, detail):
+        with self._lock:
+            self.errors[kind] += 1
+            if len(self.error_samples) < 10:
+                self.error_samples.append(f"{kind}: {detail}"[:200])
+
+
+def start_local_stack(args):
+    """Fake-Assistants-Server + Flask-App in diesem Prozess starten"""
+    from fake_assistants import start_server, REPLY_TEMPLATES
+    from werkzeug.serving import make_server
+
+    fake = start_server(latency=args.fake_latency, queued=args.fake_queued, in_progress=args.fake_in_progress,
+                        token_delay=args.fake_token_delay, failure_rate=args.fake_failure_rate,
+                        templates=REPLY_TEMPLATES)
+    os.environ['OPENAI_BASE_URL'] = fake.base_url
+    os.environ.setdefault('OPENAI_API_KEY', 'fake')
+    os.environ.setdefault('ASSISTANT_ID', 'asst_fake')
+
+    import coaching_webapp_real
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, coaching_webapp_real.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    coaching_webapp_real.thread_pool.start()
+    return f"http://127.0.0.1:{server.server_port}", fake, coaching_webapp_real
+
+
+def run_load(args):
+    fake = app_module = None
+    target = args.target.rstrip('/') if args.target else None
+    if not target:
+        target, fake, app_module = start_local_stack(args)
+
+    stats_before = get_json(f"{target}/api/stats")
+    memory_samples = [(0.0, stats_before['sessions_bytes'])]
+    results = Results()
+    coachees = [Coachee(target, args.turns, args.think_time, args.stream, results) for _ in range(args.coachees)]
+
+    started = time.perf_counter()
+    for coachee in coachees:
+        coachee.start()
+        # Coachees gleichmässig über die Ramp-up-Zeit verteilen
+        if args.ramp_up:
+            time.sleep(args.ramp_up / len(coachees))
+
+    while any(c.is_alive() for c in coachees):
+        time.sleep(args.sample_interval)
+        memory_samples.append((round(time.perf_counter() - started, 2), get_json(f"{target}/api/stats")['sessions_bytes']))
+    duration = time.perf_counter() - started
+    stats_after = get_json(f"{target}/api/stats")
+
+    turns_total = len(results.latencies['turn']) + results.errors['turn']
+    report = {
+        'benchmark': 'load',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {k: v for k, v in vars(args).items() if k != 'json'},
+        'duration_s': round(duration, 2),
+        'throughput_turns_per_s': round(len(results.latencies['turn']) / duration, 2),
+        'sessions': summarize(results.latencies['session']),
+        'turns': summarize(results.latencies['turn']),
+        'first_token': summarize(results.latencies['first_token']) if args.stream else None,
+        'errors': results.errors,
+        'error_rate': round(results.errors['turn'] / turns_total, 4) if turns_total else 0,
+        'error_samples': results.error_samples,
+        'memory': {
+            'sessions_before': stats_before['sessions'],
+            'sessions_after': stats_after['sessions'],
+            'bytes_before': stats_before['sessions_bytes'],
+            'bytes_after': stats_after['sessions_bytes'],
+            'bytes_per_session': round((stats_after['sessions_bytes'] - stats_before['sessions_bytes'])
+                                       / max(1, stats_after['sessions'] - stats_before['sessions'])),
+            'samples': memory_samples
+        },
+        'server': {k: stats_after[k] for k in ('jobs', 'runs', 'thread_pool', 'rate_limit') if k in stats_after}
+    }
+    if fake:
+        # Vorgewärmte Threads löschen, solange der Fake-Server noch läuft
+        app_module.thread_pool.shutdown()
+        report['fake_api'] = fake.stats()
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', help='Basis-URL einer laufenden App (sonst lokaler Stack)')
+    parser.add_argument('--coachees', type=int, default=20)
+    parser.add_argument('--turns', type=int, default=4, help='Turns pro Coachee')
+    parser.add_argument('--think-time', type=float, default=0.5, help='Pause zwischen Turns in Sekunden')
+    parser.add_argument('--ramp-up', type=float, default=2.0, help='Sekunden bis alle Coachees gestartet sind')
+    parser.add_argument('--stream', action='store_true', help='Streaming-Modus nutzen und Time-to-first-Token messen')
+    parser.add_argument('--sample-interval', type=float, default=1.0, help='Intervall für Speicher-Samples')
+    parser.add_argument('--fake-latency', default='lognormal:0.03,0.5')
+    parser.add_argument('--fake-queued', default='uniform:0.1,0.5')
+    parser.add_argument('--fake-in-progress', default='lognormal:1.5,0.4')
+    parser.add_argument('--fake-token-delay', default='fixed:0.02')
+    parser.add_argument('--fake-failure-rate', type=float, default=0.0)
+    parser.add_argument('--json', help='Ergebnisse als JSON in diese Datei schreiben')
+    args = parser.parse_args()
+
+    report = run_load(args)
+
+    print(f"🧪 Lasttest: {args.coachees} Coachees × {args.turns} Turns in {report['duration_s']}s")
+    print(f"🚀 Durchsatz: {report['throughput_turns_per_s']} Turns/s")
+    for name in ('sessions', 'turns', 'first_token'):
+        data = report[name]
+        if data:
+            print(f"⏱️ {name:<12} n={data['count']:<5} p50={data['p50_ms']}ms p95={data['p95_ms']}ms p99={data['p99_ms']}ms")
+    print(f"❌ Fehler: {report['errors']} (Quote {report['error_rate']:.2%})")
+    memory = report['memory']
+    print(f"🧠 sessions-Dict: {memory['bytes_before']} → {memory['bytes_after']} Bytes "
+          f"({memory['bytes_per_session']} Bytes/Session)")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or '.', exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Ergebnisse gespeichert: {args.json}")
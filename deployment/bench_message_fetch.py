@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Benchmark: Antwort nach einem Run laden - ganze Seite vs. nur die neueste Message des Runs
+
+Misst Payload-Grösse und Latenz (JSON-Serialisierung + Parsen + Suche, optional simulierte
+Übertragung) in Abhängigkeit von der Thread-Länge gegen die lokale Assistants-Nachbildung.
+
+    python bench_message_fetch.py --lengths 10 50 200 1000 --turns 200 --mbit 20
+"""
+import argparse
+import json
+import time
+
+from fake_assistants import FakeAssistants
+
+USER_MESSAGE = ("KONTEXT: Du bist ein Ruhestandscoach. Aktuelle Phase: 2/5\n\n"
+                "USER: Ich merke, dass mich der Abschied von meinem Team mehr beschäftigt als gedacht. " * 2)
+
+
+def fetch_page(api, thread_id, run_id):
+    """Bisheriges Verhalten: Standard-Seite laden und erste Assistant-Message suchen"""
+    body = json.dumps(api.list_messages(thread_id))
+    for msg in json.loads(body)['data']:
+        if msg['role'] == 'assistant':
+            return body, msg['content'][0]['text']['value']
+
+
+def fetch_run_scoped(api, thread_id, run_id):
+    """Neues Verhalten: run_id-Filter, limit=1, neueste zuerst"""
+    body = json.dumps(api.list_messages(thread_id, run_id=run_id, limit=1, order='desc'))
+    data = json.loads(body)['data']
+    return body, data[0]['content'][0]['text']['value'] if data else None
+
+
+def measure(api, thread_id, fetch, turns, mbit):
+    sizes, latencies = [], []
+    for _ in range(turns):
+        api.create_message(thread_id, 'user', USER_MESSAGE)
+        run = api.create_run(thread_id, 'asst_fake')
+
+        started = time.perf_counter()
+        body, _ = fetch(api, thread_id, run['id'])
+        elapsed = time.perf_counter() - started
+
+        # Übertragungszeit bei gegebener Bandbreite dazurechnen
+        if mbit:
+            elapsed += len(body.encode('utf-8')) * 8 / (mbit * 1_000_000)
+
+        sizes.append(len(body.encode('utf-8')))
+        latencies.append(elapsed * 1000)
+
+    latencies.sort()
+    return {
+        'bytes_avg': round(sum(sizes) / len(sizes)),
+        'latency_ms_avg': round(sum(latencies) / len(latencies), 3),
+        'latency_ms_p95': round(latencies[int(0.95 * (len(latencies) - 1))], 3)
+    }
+
+
+def run_benchmark(lengths, turns, mbit):
+    results = []
+    for length in lengths:
+        row = {'thread_length': length}
+        for name, fetch in (('page', fetch_page), ('run_scoped', fetch_run_scoped)):
+            api = FakeAssistants()
+            thread_id = api.create_thread()['id']
+
+            # Thread auf die gewünschte Länge bringen (je Turn eine User- und eine Assistant-Message)
+            for _ in range(length // 2):
+                api.create_message(thread_id, 'user', USER_MESSAGE)
+                api.create_run(thread_id, 'asst_fake')
+
+            row[name] = measure(api, thread_id, fetch, turns, mbit)
+        results.append(row)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--lengths', type=int, nargs='+', default=[2, 10, 50, 200, 1000])
+    parser.add_argument('--turns', type=int, default=100, help='gemessene Turns pro Thread-Länge')
+    parser.add_argument('--mbit', type=float, default=0, help='simulierte Bandbreite in Mbit/s (0 = aus)')
+    parser.add_argument('--json', help='Ergebnisse zusätzlich als JSON in diese Datei schreiben')
+    args = parser.parse_args()
+
+    results = run_benchmark(args.lengths, args.turns, args.mbit)
+
+    print(f"📊 Message-Abruf nach Run-Ende ({args.turns} Turns je Länge)")
+    print(f"{'Thread':>8} | {'Seite Bytes':>12} {'ms avg':>8} {'ms p95':>8} | {'Run Bytes':>10} {'ms avg':>8} {'ms p95':>8}")
+    for row in results:
+        page, scoped = row['page'], row['run_scoped']
+        print(f"{row['thread_length']:>8} | {page['bytes_avg']:>12} {page['latency_ms_avg']:>8} {page['latency_ms_p95']:>8}"
+              f" | {scoped['bytes_avg']:>10} {scoped['latency_ms_avg']:>8} {scoped['latency_ms_p95']:>8}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'message_fetch', 'turns': args.turns, 'mbit': args.mbit, 'results': results}, f, indent=2)
+        print(f"💾 Ergebnisse gespeichert: {args.json}")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""Benchmark: Speicher über eine simulierte Woche - unbegrenzter Memory-Store vs. begrenztes Hot-Set
+
+Spielt pro Tag neue Sessions mit einigen Turns über den Tag verteilt ab, dazu Rückkehrer aus den
+Vortagen (werden aus dem Auslagerungs-Speicher nachgeladen). Die Woche läuft im Zeitraffer
+(--day-seconds echte Sekunden pro Tag); die Leerlaufgrenze wird mit demselben Faktor gestaucht.
+Gemessen werden am Ende jedes Tages der belegte Speicher (tracemalloc), die Grösse des Hot-Sets sowie
+Verdrängungen und Nachladevorgänge, ausserdem die Latenz von get() über die ganze Woche. Vom Speicher
+abgezogen wird, was der Benchmark selbst mitschreibt (IDs aller Sessions, Latenzen). Kommt der Lauf
+mit dem Zeitraffer nicht mit, ist 'lag_s' gross und Leerlaufzeiten werden zu lang - --day-seconds erhöhen.
+
+    python bench_session_eviction.py --days 7 --sessions-per-day 2000 --json results/session_eviction.json
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+
+from bench_load import MESSAGES, summarize
+from models import Message, Sender, Session
+from session_store import create_session_store
+
+ANSWER = 'Danke für deine Offenheit - lass uns genauer hinschauen, was dir dabei wichtig ist. ' * 5
+
+
+def day_events(day, args, known, rng):
+    """(Zeitpunkt im Tag 0..1, Session-ID) für alle Turns des Tages"""
+    events = []
+    for index in range(args.sessions_per_day):
+        session_id = f"d{day}s{index:06d}"
+        start = rng.random() * 0.9
+        events += [(start + turn * 0.01, session_id) for turn in range(args.turns)]
+    for session_id in rng.sample(known, min(len(known), int(args.sessions_per_day * args.return_rate))):
+        start = rng.random() * 0.9
+        events += [(start + turn * 0.01, session_id) for turn in range(2)]
+    return sorted(events)
+
+
+def run(name, args, directory):
+    idle_seconds = args.idle_minutes * 60 / 86400 * args.day_seconds
+    store = create_session_store(name, path=os.path.join(directory, 'sessions.db'),
+                                 directory=os.path.join(directory, 'spill'), cache_size=args.cache_size,
+                                 cache_mb=args.cache_mb, idle_seconds=idle_seconds)
+    rng = random.Random(42)
+    known, reads, days = [], array('d'), []
+    gc.collect()
+    tracemalloc.start()
+    for day in range(args.days):
+        started, lag = time.monotonic(), 0.0
+        for at, session_id in day_events(day, args, known, rng):
+            delay = started + at * args.day_seconds - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            lag = max(lag, -delay)
+            t = time.perf_counter()
+            session = store.get(session_id)
+            reads.append(time.perf_counter() - t)
+            if session is None:
+                session = Session(session_id, f"thread_{session_id}")
+                store.add(session)
+                known.append(session_id)
+            phase = session['current_phase']
+            session['messages'].extend([
+                Message(Sender.USER, f"{rng.choice(MESSAGES)} ({session_id})", phase=phase),
+                Message(Sender.ASSISTANT, ANSWER, phase=phase)
+            ])
+            store.save(session)
+        del session
+        gc.collect()
+        metrics = store.metrics()
+        hot = metrics.get('hot_set', {})
+        bookkeeping = sys.getsizeof(known) + sum(map(sys.getsizeof, known)) + sys.getsizeof(reads)
+        days.append({
+            'day': day + 1,
+            'sessions': metrics['sessions'],
+            'memory_mb': round((tracemalloc.get_traced_memory()[0] - bookkeeping) / 1e6, 1),
+            'lag_s': round(lag, 2),
+            'hot': hot.get('hot', metrics['sessions']),
+            'hot_mb': hot.get('hot_mb'),
+            'evicted': hot.get('evicted', 0),
+            'evicted_idle': hot.get('evicted_idle', 0),
+            'evicted_memory': hot.get('evicted_memory', 0),
+            'reloads': metrics.get('reloads', 0)
+        })
+    tracemalloc.stop()
+    if hasattr(store, 'close'):
+        store.close()
+    return {'days': days, 'get': summarize(reads),
+            'growth_mb': round(days[-1]['memory_mb'] - days[0]['memory_mb'], 1)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stores', nargs='+', default=['memory', 'spill', 'sqlite'])
+    parser.add_argument('--days', type=int, default=7)
+    parser.add_argument('--sessions-per-day', type=int, default=2000)
+    parser.add_argument('--turns', type=int, default=6, help='Turns pro neuer Session')
+    parser.add_argument('--return-rate', type=float, default=0.2, help='Rückkehrer pro Tag, Anteil der neuen')
+    parser.add_argument('--day-seconds', type=float, default=10, help='echte Sekunden pro simuliertem Tag')
+    parser.add_argument('--cache-size', type=int, default=1000)
+    parser.add_argument('--cache-mb', type=float, default=16)
+    parser.add_argument('--idle-minutes', type=float, default=30)
+    parser.add_argument('--dir', help='Verzeichnis für Spill-Dateien und DB (Standard: temporär)')
+    parser.add_argument('--json', help='Ergebnisse als JSON in diese Datei schreiben')
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.stores:
+        with tempfile.TemporaryDirectory() as tmp:
+            results[name] = run(name, args, args.dir or tmp)
+
+    print(f"📊 {args.days} Tage × {args.sessions_per_day} neue Sessions ({args.turns} Turns, "
+          f"{args.return_rate:.0%} Rückkehrer) | Hot-Set {args.cache_size} Sessions / {args.cache_mb} MB, "
+          f"Leerlauf {args.idle_minutes} min")
+    for name, data in results.items():
+        curve = ' → '.join(str(day['memory_mb']) for day in data['days'])
+        last = data['days'][-1]
+        print(f"💾 {name:<6} Speicher pro Tag (MB): {curve} | Zuwachs {data['growth_mb']} MB | "
+              f"max. Verzug {max(day['lag_s'] for day in data['days'])}s | "
+              f"Hot {last['hot']} | verdrängt {last['evicted']} (Leerlauf {last['evicted_idle']}, "
+              f"Speicher {last['evicted_memory']}) | nachgeladen {last['reloads']} | "
+              f"get p50={data['get']['p50_ms']}ms p99={data['get']['p99_ms']}ms")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or '.', exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'session_eviction', 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'config': {k: v for k, v in vars(args).items() if k != 'json'}, 'results': results}, f, indent=2)
+        print(f"💾 Ergebnisse gespeichert: {args.json}")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Benchmark: Speicher pro Session - bisherige verschachtelte Dicts vs. __slots__-Modell (models.py)
+
+Baut dieselben synthetischen Sessions (Texte pro Nachricht eindeutig, wie im Betrieb) einmal als Dicts
+(wie create_session/finish_turn bisher, ISO-Zeitstempel pro Nachricht) und einmal als Session/Message
+und misst den belegten Speicher mit tracemalloc. 'ohne Texte' zieht den Speicher der Nachrichtentexte ab,
+der in beiden Varianten gleich ist.
+
+    python bench_session_memory.py --sessions 10000 --messages 50 --json results/session_memory.json
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from bench_load import MESSAGES
+from models import Message, Sender, Session
+
+
+def texts(index, count):
+    return [f"{MESSAGES[i % len(MESSAGES)]} (Session {index}, Nachricht {i})" for i in range(count)]
+
+
+def dict_session(index, messages):
+    session = {'id': f"{index:08x}", 'thread_id': f"thread_{index:024x}", 'current_phase': 1,
+               'phase_progress': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}, 'total_progress': 0, 'messages': [],
+               'created': datetime.now()}
+    for i, text in enumerate(messages):
+        session['messages'].append({'sender': 'user' if i % 2 == 0 else 'assistant', 'message': text,
+                                    'timestamp': datetime.now().isoformat(), 'phase': 1 + i * 5 // len(messages)})
+    session['phase_progress'][1] = 50
+    session['total_progress'] = 10.0
+    return session
+
+
+def model_session(index, messages):
+    session = Session(f"{index:08x}", f"thread_{index:024x}")
+    for i, text in enumerate(messages):
+        session['messages'].append(Message(Sender.USER if i % 2 == 0 else Sender.ASSISTANT, text,
+                                           phase=1 + i * 5 // len(messages)))
+    session['phase_progress'][1] = 50
+    session['total_progress'] = 10.0
+    return session
+
+
+def measure(build, args):
+    """Belegter Speicher für alle Sessions; die Texte entstehen vor dem Start der Messung"""
+    all_texts = [texts(index, args.messages) for index in range(args.sessions)]
+    text_bytes = sum(sys.getsizeof(text) for batch in all_texts for text in batch)
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    sessions = {}
+    for index, batch in enumerate(all_texts):
+        session = build(index, batch)
+        sessions[session['id']] = session
+    build_s = time.perf_counter() - started
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessions, all_texts
+    gc.collect()
+    return {
+        'total_mb': round((used + text_bytes) / 1e6, 1),
+        'structure_mb': round(used / 1e6, 1),
+        'per_session_kb': round((used + text_bytes) / args.sessions / 1024, 1),
+        'per_session_structure_kb': round(used / args.sessions / 1024, 1),
+        'per_message_bytes': round(used / (args.sessions * args.messages)),
+        'build_s': round(build_s, 2)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--messages', type=int, default=50, help='Nachrichten pro Session')
+    parser.add_argument('--json', help='Ergebnisse als JSON in diese Datei schreiben')
+    args = parser.parse_args()
+
+    results = {'dicts': measure(dict_session, args), 'slots': measure(model_session, args)}
+    results['saved_per_session_kb'] = round(results['dicts']['per_session_kb'] - results['slots']['per_session_kb'], 1)
+
+    print(f"📊 Speicher: {args.sessions} Sessions × {args.messages} Nachrichten")
+    for name in ('dicts', 'slots'):
+        data = results[name]
+        print(f"💾 {name:<6} {data['total_mb']} MB gesamt ({data['per_session_kb']} KB/Session) | ohne Texte "
+              f"{data['structure_mb']} MB ({data['per_session_structure_kb']} KB/Session, "
+              f"{data['per_message_bytes']} B/Nachricht) | Aufbau {data['build_s']}s")
+    print(f"✅ Ersparnis: {results['saved_per_session_kb']} KB pro Session")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or '.', exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'session_memory', 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'config': {k: v for k, v in vars(args).items() if k != 'json'}, 'results': results}, f, indent=2)
+        print(f"💾 Ergebnisse gespeichert: {args.json}")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Benchmark: Lese-/Schreiblatenz des SQLite-Session-Stores bei 10k und 100k Sessions
+
+Legt synthetische Sessions mit einigen Turns an (wie create_session + finish_turn) und misst danach
+Turn-Schreibvorgänge, kalte Reads (Session nicht im Cache, aus SQLite geladen) und warme Reads (Cache).
+
+    python bench_session_store.py --sessions 10000 100000 --json results/session_store.json
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from bench_load import MESSAGES, summarize
+from session_store import SQLiteSessionStore
+
+
+def synthetic_session(index, turns):
+    session = {'id': f"s{index:07d}", 'thread_id': f"thread_{index}", 'current_phase': 1,
+               'phase_progress': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}, 'total_progress': 0, 'messages': [],
+               'created': datetime.now()}
+    for turn in range(turns):
+        add_turn(session, turn)
+    return session
+
+
+def add_turn(session, turn):
+    now = datetime.now().isoformat()
+    session['messages'].extend([
+        {'sender': 'user', 'message': MESSAGES[turn % len(MESSAGES)], 'timestamp': now,
+         'phase': session['current_phase']},
+        {'sender': 'assistant', 'message': 'Danke für deine Offenheit. ' * 12, 'timestamp': now,
+         'phase': session['current_phase']}
+    ])
+    session['phase_progress'][session['current_phase']] = min(100, 25 * (turn + 1))
+    session['total_progress'] = sum(session['phase_progress'].values()) / 5
+
+
+def run_size(count, args, directory):
+    path = os.path.join(directory, f"sessions_{count}.db")
+    store = SQLiteSessionStore(path, cache_size=args.cache_size)
+
+    started = time.perf_counter()
+    for index in range(count):
+        store.add(synthetic_session(index, args.turns))
+    fill_s = time.perf_counter() - started
+    store = SQLiteSessionStore(path, cache_size=args.cache_size)  # wie nach einem Neustart: Cache leer
+
+    ids = [f"s{i:07d}" for i in random.sample(range(count), args.samples)]
+
+    cold = []
+    for session_id in ids:
+        t = time.perf_counter()
+        store.get(session_id)
+        cold.append(time.perf_counter() - t)
+
+    warm = []
+    for session_id in ids[-args.cache_size:]:  # die zuletzt geladenen liegen im Cache
+        t = time.perf_counter()
+        store.get(session_id)
+        warm.append(time.perf_counter() - t)
+
+    writes = []
+    for turn, session_id in enumerate(ids):
+        session = store.get(session_id)
+        add_turn(session, args.turns + turn)
+        t = time.perf_counter()
+        store.save(session)
+        writes.append(time.perf_counter() - t)
+
+    metrics = store.metrics()
+    size = sum(os.path.getsize(path + suffix) for suffix in ('', '-wal') if os.path.exists(path + suffix))
+    return {
+        'sessions': count,
+        'messages': metrics['messages'],
+        'fill_s': round(fill_s, 1),
+        'fill_per_s': round(count / fill_s),
+        'db_mb': round(size / 1e6, 1),
+        'cold_read': summarize(cold),
+        'warm_read': summarize(warm),
+        'turn_write': summarize(writes)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--turns', type=int, default=5, help='Turns pro synthetischer Session')
+    parser.add_argument('--samples', type=int, default=2000, help='gemessene Reads/Writes pro Grösse')
+    parser.add_argument('--cache-size', type=int, default=1000)
+    parser.add_argument('--dir', help='Verzeichnis für die DB-Dateien (Standard: temporär)')
+    parser.add_argument('--json', help='Ergebnisse als JSON in diese Datei schreiben')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {str(count): run_size(count, args, args.dir or tmp) for count in args.sessions}
+
+    print(f"📊 SQLite-Session-Store: {args.turns} Turns pro Session, {args.samples} Stichproben")
+    for data in results.values():
+        print(f"⏱️ {data['sessions']:>7} Sessions ({data['db_mb']} MB): "
+              f"kalt p50={data['cold_read']['p50_ms']}ms p99={data['cold_read']['p99_ms']}ms | "
+              f"Cache p50={data['warm_read']['p50_ms']}ms | "
+              f"Turn schreiben p50={data['turn_write']['p50_ms']}ms p99={data['turn_write']['p99_ms']}ms | "
+              f"Aufbau {data['fill_per_s']}/s")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or '.', exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'session_store', 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'config': {k: v for k, v in vars(args).items() if k != 'json'}, 'results': results}, f, indent=2)
+        print(f"💾 Ergebnisse gespeichert: {args.json}")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Benchmark: Thread-Wachstum pro Turn - Phase-Kontext in jeder Message vs. als Run-Instruktion
+
+Misst gegen die lokale Assistants-Nachbildung, wie viele Tokens im Thread gespeichert werden
+und wie viele Prompt-Tokens jeder Run verrechnet.
+
+    python bench_thread_growth.py --turns 50 --checkpoints 1 10 25 50
+"""
+import argparse
+import json
+import os
+
+from fake_assistants import FakeAssistants, estimate_tokens
+from bench_load import MESSAGES
+
+os.environ.setdefault('OPENAI_API_KEY', 'fake')
+from coaching_webapp_real import PHASE_PROMPTS  # noqa: E402
+
+# Bisheriger Kontext, der jeder User-Message vorangestellt wurde
+LEGACY_PHASE_CONTEXT = """
+Du bist ein Ruhestandscoach. Aktuelle Phase: {phase}/5
+Führe systematisch durch das 8-Aufträge-System. Verwende Du-Form und Guillemets « ».
+Beginne mit Lernstil-Abfrage bei neuen Sessions.
+    """
+
+
+def prefix_turn(api, thread_id, message, phase):
+    """Bisheriges Verhalten: KONTEXT-Block in jeder User-Message"""
+    api.create_message(thread_id, 'user', f"KONTEXT: {LEGACY_PHASE_CONTEXT.format(phase=phase)}\n\nUSER: {message}")
+    return api.create_run(thread_id, 'asst_fake')
+
+
+def instructions_turn(api, thread_id, message, phase):
+    """Neues Verhalten: nur die Nachricht im Thread, Phase-Prompt als additional_instructions"""
+    api.create_message(thread_id, 'user', message)
+    return api.create_run(thread_id, 'asst_fake', additional_instructions=PHASE_PROMPTS[phase])
+
+
+def measure(turn_fn, turns, phase_every):
+    api = FakeAssistants()
+    thread_id = api.create_thread()['id']
+    rows, billed = [], 0
+    for turn in range(1, turns + 1):
+        phase = min(5, 1 + (turn - 1) // phase_every)
+        run = turn_fn(api, thread_id, MESSAGES[(turn - 1) % len(MESSAGES)], phase)
+        usage = api.runs[run['id']]['usage']
+        billed += usage['prompt_tokens']
+        stored = sum(estimate_tokens(m['content'][0]['text']['value']) for m in api.messages[thread_id])
+        rows.append({'turn': turn, 'thread_tokens': stored, 'prompt_tokens': usage['prompt_tokens'],
+                     'prompt_tokens_total': billed})
+    return rows
+
+
+def run_benchmark(turns, phase_every):
+    results = {name: measure(fn, turns, phase_every)
+               for name, fn in (('prefix', prefix_turn), ('instructions', instructions_turn))}
+    growth = {name: round(rows[-1]['thread_tokens'] / turns, 1) for name, rows in results.items()}
+    return results, growth
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--turns', type=int, default=50)
+    parser.add_argument('--phase-every', type=int, default=10, help='Turns pro Phase')
+    parser.add_argument('--checkpoints', type=int, nargs='+', default=[1, 5, 10, 25, 50])
+    parser.add_argument('--json', help='Ergebnisse zusätzlich als JSON in diese Datei schreiben')
+    args = parser.parse_args()
+
+    results, growth = run_benchmark(args.turns, args.phase_every)
+
+    print(f"📊 Thread-Wachstum über {args.turns} Turns")
+    print(f"{'Turn':>6} | {'Präfix Thread':>14} {'Prompt':>8} {'Σ Prompt':>10} | "
+          f"{'Instr. Thread':>14} {'Prompt':>8} {'Σ Prompt':>10}")
+    for turn in args.checkpoints:
+        if turn > args.turns:
+            continue
+        old, new = results['prefix'][turn - 1], results['instructions'][turn - 1]
+        print(f"{turn:>6} | {old['thread_tokens']:>14} {old['prompt_tokens']:>8} {old['prompt_tokens_total']:>10} | "
+              f"{new['thread_tokens']:>14} {new['prompt_tokens']:>8} {new['prompt_tokens_total']:>10}")
+    print(f"📈 Thread-Tokens pro Turn: Präfix {growth['prefix']} → Instruktion {growth['instructions']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'thread_growth', 'turns': args.turns, 'growth_per_turn': growth,
+                       'results': results}, f, indent=2)
+        print(f"💾 Ergebnisse gespeichert: {args.json}")
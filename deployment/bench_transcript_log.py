@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Benchmark: Transkript-Log - Append pro Turn, Lesen ganzer Transkripte, Neustart und Kompaktierung
+
+Schreibt synthetische Turns (Frage + Antwort) für viele Sessions verschachtelt ins Log, wie sie im
+Betrieb eintreffen, öffnet es danach neu (Index-Aufbau wie nach einem Neustart) und misst das Lesen
+ganzer Transkripte über mmap. Zum Schluss wird ein Teil der Sessions vergessen und kompaktiert.
+
+    python bench_transcript_log.py --sessions 10000 --turns 10 --json results/transcript_log.json
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from bench_load import MESSAGES, summarize
+from models import Message, Sender
+from transcript_log import TranscriptLog
+
+
+def run(args, directory):
+    log = TranscriptLog(directory, segment_bytes=args.segment_mb * 1024 * 1024)
+    ids = [f"s{i:07d}" for i in range(args.sessions)]
+    answer = 'Danke für deine Offenheit. ' * 12
+
+    appends = []
+    started = time.perf_counter()
+    for turn in range(args.turns):
+        for session_id in ids:
+            messages = [Message(Sender.USER, MESSAGES[turn % len(MESSAGES)], phase=1),
+                        Message(Sender.ASSISTANT, answer, phase=1)]
+            t = time.perf_counter()
+            log.append(session_id, messages)
+            appends.append(time.perf_counter() - t)
+    fill_s = time.perf_counter() - started
+    log.close()
+
+    started = time.perf_counter()
+    log = TranscriptLog(directory, segment_bytes=args.segment_mb * 1024 * 1024)
+    load_s = time.perf_counter() - started
+
+    reads = []
+    for session_id in random.sample(ids, min(args.samples, len(ids))):
+        t = time.perf_counter()
+        size = sum(len(text) for *_, text in log.records(session_id))
+        reads.append(time.perf_counter() - t)
+    assert size > 0
+
+    for session_id in random.sample(ids, int(len(ids) * args.forget)):
+        log.forget(session_id)
+    started = time.perf_counter()
+    reclaimed = log.compact()
+    compact_s = time.perf_counter() - started
+    metrics = log.metrics()
+    log.close()
+    return {
+        'records': args.sessions * args.turns * 2,
+        'segments': metrics['segments'],
+        'log_mb': round(metrics['bytes'] / 1e6, 1),
+        'append_per_s': round(args.sessions * args.turns / fill_s),
+        'append': summarize(appends),
+        'load_s': round(load_s, 2),
+        'read_transcript': summarize(reads),
+        'compact_s': round(compact_s, 2),
+        'reclaimed_mb': round(reclaimed / 1e6, 1)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=10000)
+    parser.add_argument('--turns', type=int, default=10, help='Turns pro Session')
+    parser.add_argument('--segment-mb', type=int, default=16)
+    parser.add_argument('--samples', type=int, default=2000, help='gelesene Transkripte')
+    parser.add_argument('--forget', type=float, default=0.6, help='Anteil vergessener Sessions vor der Kompaktierung')
+    parser.add_argument('--dir', help='Verzeichnis für die Segmente (Standard: temporär)')
+    parser.add_argument('--json', help='Ergebnisse als JSON in diese Datei schreiben')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(args, args.dir or tmp)
+
+    print(f"📊 Transkript-Log: {args.sessions} Sessions × {args.turns} Turns, {results['segments']} Segmente "
+          f"({results['log_mb']} MB)")
+    print(f"✍️ Append p50={results['append']['p50_ms']}ms p99={results['append']['p99_ms']}ms "
+          f"({results['append_per_s']} Turns/s)")
+    print(f"📜 Transkript lesen p50={results['read_transcript']['p50_ms']}ms "
+          f"p99={results['read_transcript']['p99_ms']}ms | Neustart (Index) {results['load_s']}s")
+    print(f"🧹 Kompaktierung {results['compact_s']}s, {results['reclaimed_mb']} MB freigegeben")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or '.', exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump({'benchmark': 'transcript_log', 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'config': {k: v for k, v in vars(args).items() if k != 'json'}, 'results': results}, f, indent=2)
+        print(f"💾 Ergebnisse gespeichert: {args.json}")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Circuit Breaker für die OpenAI-Abhängigkeit: bei hoher Fehler- oder Langsam-Quote sofort ablehnen
+
+Zustände: closed (normal) -> open (alle Aufrufe abgelehnt) -> half_open (einzelne Probe-Aufrufe)
+-> closed bei Erfolg bzw. wieder open bei Fehler.
+"""
+import threading
+import time
+from collections import deque
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Aufruf abgelehnt, weil der Breaker offen ist"""
+
+    def __init__(self, message, retry_in):
+        super().__init__(message)
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Gleitendes Fenster der letzten Aufrufe; löst bei Fehler- oder Langsam-Quote aus"""
+
+    def __init__(self, name='openai', window=20, min_calls=5, failure_rate=0.5, slow_call=20.0, slow_rate=0.5,
+                 open_for=30.0, half_open_probes=1, ignore=(), on_close=None):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call  # Sekunden, ab denen ein erfolgreicher Aufruf als langsam zählt
+        self.slow_rate = slow_rate
+        self.open_for = open_for
+        self.half_open_probes = half_open_probes
+        self.ignore = ignore  # Exceptions, die nichts über die Abhängigkeit aussagen (z.B. Abbruch durch Client)
+        self.on_close = on_close  # () -> None, nach der Erholung (half_open -> closed)
+        self.state = CLOSED
+        self._calls = deque(maxlen=window)  # (ok, seconds)
+        self._lock = threading.Lock()
+        self._opened_at = 0.0
+        self._changed_at = time.time()
+        self._probes = 0
+        self._stats = {'trips': 0, 'rejected': 0, 'successes': 0, 'failures': 0, 'slow': 0, 'recoveries': 0}
+        self._last_trip = None
+
+    def allow(self):
+        """Darf ein Aufruf raus? Reserviert im half_open-Zustand einen Probe-Platz"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_for:
+                self._set_state(HALF_OPEN)
+                self._probes = 0
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self._stats['rejected'] += 1
+            return False
+
+    def call(self, func, *args, **kwargs):
+        """func über den Breaker aufrufen; wirft CircuitOpen, solange er offen ist"""
+        if not self.allow():
+            raise CircuitOpen(f"Circuit '{self.name}' offen", self.retry_in())
+        started = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except self.ignore:
+            self.release()
+            raise
+        except Exception:
+            self.record(False, time.monotonic() - started)
+            raise
+        self.record(True, time.monotonic() - started)
+        return result
+
+    def record(self, ok, seconds):
+        """Ergebnis eines durchgelassenen Aufrufs melden"""
+        recovered = False
+        with self._lock:
+            slow = ok and seconds >= self.slow_call
+            self._stats['successes' if ok else 'failures'] += 1
+            self._stats['slow'] += slow
+
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if ok and not slow:
+                    self._calls.clear()
+                    self._set_state(CLOSED)
+                    self._stats['recoveries'] += 1
+                    recovered = True
+                else:
+                    self._trip('Probe fehlgeschlagen' if not ok else 'Probe zu langsam')
+            else:
+                self._calls.append((ok, seconds))
+                if self.state == CLOSED and len(self._calls) >= self.min_calls:
+                    failures = sum(1 for c_ok, _ in self._calls if not c_ok) / len(self._calls)
+                    slow_calls = sum(1 for c_ok, s in self._calls if c_ok and s >= self.slow_call) / len(self._calls)
+                    if failures >= self.failure_rate:
+                        self._trip(f"Fehlerquote {failures:.0%}")
+                    elif slow_calls >= self.slow_rate:
+                        self._trip(f"Langsam-Quote {slow_calls:.0%} (>= {self.slow_call}s)")
+
+        if recovered and self.on_close:
+            self.on_close()
+
+    def release(self):
+        """Durchgelassener Aufruf ohne Aussage (z.B. vom Client abgebrochen) - Probe-Platz freigeben"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def retry_in(self):
+        with self._lock:
+            if self.state != OPEN:
+                return 0
+            return round(max(0.0, self.open_for - (time.monotonic() - self._opened_at)), 1)
+
+    def metrics(self):
+        retry_in = self.retry_in()
+        with self._lock:
+            calls = list(self._calls)
+            return {
+                'name': self.name,
+                'state': self.state,
+                'since': time.strftime('%H:%M:%S', time.localtime(self._changed_at)),
+                'retry_in': retry_in,
+                **self._stats,
+                'last_trip': self._last_trip,
+                'window': len(calls),
+                'window_failure_rate': round(sum(1 for ok, _ in calls if not ok) / len(calls), 3) if calls else 0,
+                'window_avg_s': round(sum(s for _, s in calls) / len(calls), 2) if calls else 0
+            }
+
+    def _trip(self, reason):
+        # Lock muss gehalten werden
+        self._set_state(OPEN)
+        self._opened_at = time.monotonic()
+        self._stats['trips'] += 1
+        self._last_trip = {'reason': reason, 'time': time.strftime('%H:%M:%S')}
+        print(f"🔌 Circuit '{self.name}' geöffnet: {reason}")
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self._changed_at = time.time()
@@ -1,9 +1,18 @@
 #!/usr/bin/env python3
 import os
-from flask import Flask, request, jsonify
-from openai import OpenAI
+from flask import Flask, request, jsonify, Response
+from openai_client import client_settings
 from dotenv import load_dotenv
-import uuid, time, re
+import uuid, time, re, json, sys
+from run_waiter import RunCancelled, RunTimeout
+from ai_backends import create_backend
+from rate_limiter import in_lane
+from circuit_breaker import CircuitBreaker, CircuitOpen
+from batch_runner import join_workers, run_parallel
+from usage_tracker import current_channel
+from hedging import HedgedWaiter
+from models import Session, Message, Sender
+from collections import deque
 from datetime import datetime
 import smtplib
 import imaplib
@@ -13,10 +22,40 @@ import threading
 
 load_dotenv()
 app = Flask(__name__)
-sessions = {}
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-ASSISTANT_ID = os.getenv("ASSISTANT_ID")
+# Dienste (Session-Store, Rate-Limit, OpenAI-Client, Job-Queue, Thread-Pool, Transkript-Log, Kontext, Cache)
+# entstehen einmal pro Prozess in app_services.py - diese Datei enthält die App zweimal
+from app_services import (shared_state, sessions, rate_limiter, client, ASSISTANT_ID, AI_BACKEND, AI_CHAT_MODEL,
+                          AI_SYSTEM_PROMPT, ai_jobs, run_waiter, hedge_policy, usage_tracker, turn_scheduler,
+                          thread_pool, transcript_log, context_manager, response_cache, on_shutdown)
+
+# Streaming der AI-Antworten (AI_STREAMING=false schaltet auf den alten Polling-Pfad zurück)
+AI_STREAMING = os.getenv('AI_STREAMING', 'true').lower() == 'true'
+
+# Job-Warteschlange: Chat-Turns laufen in einem begrenzten Worker-Pool statt im Flask-Thread
+AI_JOB_QUEUE = os.getenv('AI_JOB_QUEUE', 'false').lower() == 'true'
+
+# Abgebrochene Turns (Client weg, Deadline, Shutdown) für /api/stats
+abandoned_turns = deque(maxlen=200)
+
+def record_usage(session, usage):
+    """Usage eines Runs der Session und der Phase zurechnen, in der der Turn lief"""
+    usage_tracker.record(session['id'], session['current_phase'], **usage)
+
+# Circuit Breaker: bei gehäuften Fehlern oder langsamen Runs sofort Ersatzantwort, Turn wird nachgeholt
+ai_breaker = CircuitBreaker(
+    'openai',
+    failure_rate=float(os.getenv('AI_BREAKER_FAILURE_RATE', 0.5)),
+    slow_call=float(os.getenv('AI_BREAKER_SLOW_CALL', 30)),
+    open_for=float(os.getenv('AI_BREAKER_OPEN_FOR', 30)),
+    ignore=(RunCancelled,),
+    on_close=lambda: replay_deferred_turns()
+)
+deferred_turns = deque()
+
+FALLBACK_REPLY = ("Ich bin gerade stark ausgelastet und kann dir nicht sofort ausführlich antworten. "
+                  "Deine Nachricht ist gespeichert - meine Antwort folgt, sobald ich wieder verfügbar bin. "
+                  "Magst du mir in der Zwischenzeit erzählen, was dich heute am meisten beschäftigt?")
 
 # E-Mail-Konfiguration
 EMAIL_CONFIG = {
@@ -28,6 +67,10 @@ EMAIL_CONFIG = {
     'imap_port': 993
 }
 
+# Rückstau an ungelesenen E-Mails: so viele AI-Antworten parallel, Versand danach gesammelt
+EMAIL_BATCH_CONCURRENCY = int(os.getenv('EMAIL_BATCH_CONCURRENCY', 4))
+email_batches = deque(maxlen=50)
+
 # Intelligente Phase-Definitionen
 PHASE_KEYWORDS = {
     1: ['lernstil', 'ausgangssituation', 'herzenswunsch', 'standort'],
@@ -37,18 +80,34 @@ PHASE_KEYWORDS = {
     5: ['erfolge', 'integration', 'learnings', 'abschluss']
 }
 
+# Phasen-Register: Name und Coaching-Auftrag pro Phase (Schlüssel wie PHASE_KEYWORDS)
+PHASES = {
+    1: {'name': 'Standort & Lernstil',
+        'focus': 'Frage zuerst den Lernstil ab, kläre dann Ausgangssituation und Herzenswunsch.'},
+    2: {'name': 'Gefühle & Schlüsselaffekt',
+        'focus': 'Erkunde Gefühle und Emotionen rund um den Übergang, arbeite mit Bildern.'},
+    3: {'name': 'Inneres Team & Muster',
+        'focus': 'Analysiere das innere Team und wiederkehrende Muster oder Teufelskreisläufe.'},
+    4: {'name': 'Vision & Schritte',
+        'focus': 'Entwickle mit Erfolgsimagination eine Vision und konkrete nächste Schritte.'},
+    5: {'name': 'Integration & Abschluss',
+        'focus': 'Sichere Erfolge und Learnings, integriere sie und schliesse das Coaching ab.'}
+}
+
+def build_phase_prompt(phase):
+    return f"""Du bist ein Ruhestandscoach. Aktuelle Phase: {phase}/5 ({PHASES[phase]['name']})
+Führe systematisch durch das 8-Aufträge-System. Verwende Du-Form und Guillemets « ».
+{PHASES[phase]['focus']}"""
+
+# Einmal pro Phase aufgebaut - als Run-Instruktion statt in jeder User-Message
+PHASE_PROMPTS = {phase: build_phase_prompt(phase) for phase in PHASES}
+
 def create_session():
     sid = str(uuid.uuid4())[:8]
-    thread = client.beta.threads.create()
-    sessions[sid] = {
-        'id': sid,
-        'thread_id': thread.id,
-        'current_phase': 1,
-        'phase_progress': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0},
-        'total_progress': 0,
-        'messages': [],
-        'created': datetime.now()
-    }
+    thread_id = thread_pool.acquire() if ai_backend.uses_threads else None
+    sessions.add(Session(sid, thread_id))
+    if shared_state:
+        shared_state.incr('sessions_created')
     return sid
 
 def analyze_progress(message, response, session):
@@ -81,45 +140,262 @@ def analyze_progress(message, response, session):
     return {
         'current_phase': session['current_phase'],
         'total_progress': session['total_progress'],
-        'phase_progress': session['phase_progress'],
+        'phase_progress': session['phase_progress'].to_dict(),
         'phase_changed': current_phase != session['current_phase']
     }
 
-def get_ai_response(thread_id, message, session):
-    """OpenAI Response mit Phase-Kontext"""
+def phase_context(session):
+    """Coaching-Kontext der aktuellen Phase (aus PHASE_PROMPTS)"""
+    return PHASE_PROMPTS[session['current_phase']]
+
+# AI-Backend: Assistants-Threads oder Chat Completions mit lokalem Verlauf
+ai_backend = create_backend(
+    AI_BACKEND,
+    client=client,
+    assistant_id=ASSISTANT_ID,
+    run_waiter=run_waiter,
+    model=AI_CHAT_MODEL,
+    system_prompt=AI_SYSTEM_PROMPT,
+    phase_context=phase_context,
+    context=context_manager,
+    on_usage=record_usage,
+    hedging=HedgedWaiter(run_waiter, hedge_policy) if hedge_policy else None
+)
+
+def cacheable(session):
+    """Nur Eröffnungs-Turns im Web: ohne Verlauf hängt die Antwort allein von Phase und Nachricht ab.
+    E-Mails nie - sie sind persönlich (Name, Situation) und würden einem anderen Coachee zugestellt."""
+    return response_cache is not None and not session['messages'] and current_channel() != 'email'
+
+def cached_response(session, message):
+    """Antwort aus dem Cache oder None; ein Treffer wird trotzdem in den Thread geschrieben"""
+    if not cacheable(session):
+        return None
+    if session.get('cache_bypass'):
+        response_cache.bypassed()
+        return None
+    ai_response = response_cache.get(session['current_phase'], message)
+    if ai_response is None:
+        return None
+    usage_tracker.record_cached(session['id'], session['current_phase'])
     try:
-        phase_context = f"""
-Du bist ein Ruhestandscoach. Aktuelle Phase: {session['current_phase']}/5
-Führe systematisch durch das 8-Aufträge-System. Verwende Du-Form und Guillemets « ».
-Beginne mit Lernstil-Abfrage bei neuen Sessions.
-        """
-        
-        client.beta.threads.messages.create(
-            thread_id=thread_id,
-            role="user", 
-            content=f"KONTEXT: {phase_context}\n\nUSER: {message}"
-        )
-        
-        run = client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=ASSISTANT_ID
-        )
-        
-        while run.status in ['queued', 'in_progress']:
-            time.sleep(1)
-            run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
-        
-        messages = client.beta.threads.messages.list(thread_id=thread_id)
-        for msg in messages.data:
-            if msg.role == 'assistant':
-                return msg.content[0].text.value
-                
-        return "Entschuldigung, ich konnte keine Antwort generieren."
+        ai_backend.record_turn(session, message, ai_response)
+    except Exception as e:
+        print(f"⚠️ Cache-Antwort nicht im Thread gespeichert ({session['id']}): {e}")
+    return ai_response
+
+def remember_response(session, message, ai_response):
+    """Erfolgreiche Antwort auf einen Eröffnungs-Turn für spätere Sessions merken"""
+    if cacheable(session) and not session.get('cache_bypass'):
+        response_cache.put(session['current_phase'], message, ai_response)
+
+def record_abandoned(session, message, reason):
+    """Turn festhalten, dessen Run abgebrochen wurde - in der Session und global"""
+    entry = {
+        'session_id': session['id'],
+        'message': message[:200],
+        'reason': reason,
+        'timestamp': datetime.now().isoformat()
+    }
+    session.setdefault('abandoned_turns', []).append(entry)
+    abandoned_turns.append(entry)
+    sessions.save(session)
+    print(f"🛑 Turn abgebrochen ({reason}) in Session {session['id']}")
+
+def defer_turn(session, message):
+    """Turn vormerken, solange der Circuit offen ist - wird nach der Erholung nachgeholt"""
+    deferred_turns.append({'session_id': session['id'], 'message': message, 'queued': datetime.now().isoformat()})
+
+def replay_deferred_turns():
+    """Nach der Erholung: vorgemerkte Turns über die Job-Queue beantworten (pro Session ein Job)"""
+    by_session = {}
+    while deferred_turns:
+        turn = deferred_turns.popleft()
+        by_session.setdefault(turn['session_id'], []).append(turn)
+    for sid, turns in by_session.items():
+        if sid in sessions:
+            ai_jobs.submit(answer_deferred_turns, sessions[sid], turns)
+
+def answer_deferred_turns(session, turns):
+    """Nachgeholte Antworten nacheinander (ein Run pro Thread) speichern und E-Mail-Coachees zusenden"""
+    answered = 0
+    for index, turn in enumerate(turns):
+        with turn_scheduler.turn(session, turn['message']) as scheduled:
+            if scheduled.leader:
+                ai_response = get_ai_response(session['thread_id'], scheduled.text, session)
+                # Gleiches Ergebnis wie ein Chat-Turn - mitgebündelte Chat-Turns lesen 'response'
+                scheduled.result = {'response': ai_response,
+                                    'progress': finish_deferred_turn(session, scheduled.messages[:-1], ai_response)}
+        if scheduled.coalesced:
+            continue  # mit einer neueren Chat-Nachricht zusammen beantwortet
+        ai_response = scheduled.result['response']
+        if ai_response == FALLBACK_REPLY:
+            # Circuit wieder offen - dieser Turn ist erneut vorgemerkt, die restlichen auch
+            deferred_turns.extend(turns[index + 1:])
+            break
+
+        if session.get('email'):
+            send_coaching_email(session['email'], "Ihre Coaching-Antwort", ai_response,
+                                f"http://localhost:8080/coaching-session/{session['id']}")
+        answered += 1
+    return {'answered': answered}
+
+def finish_deferred_turn(session, chat_messages, ai_response):
+    """Nachgeholte Antwort speichern, davor die User-Nachrichten mitgebündelter Chat-Turns
+
+    Die vorgemerkte Nachricht selbst steht schon in der Session (mit der Ersatzantwort). Ist der Circuit
+    wieder offen, wird nur gespeichert, wenn Chat-Nachrichten dabei sind - sie bekommen wie jeder Chat-Turn
+    die Ersatzantwort. Liefert den Fortschritt im Format von finish_turn.
+    """
+    fallback = ai_response == FALLBACK_REPLY
+    if fallback and not chat_messages:
+        return None
+    phase = session['current_phase']
+    if chat_messages:
+        progress_data = analyze_progress('\n\n'.join(chat_messages), ai_response, session)
+    else:
+        progress_data = {'current_phase': phase, 'total_progress': session['total_progress'],
+                         'phase_progress': session['phase_progress'].to_dict(), 'phase_changed': False}
+
+    new_messages = [Message(Sender.USER, message, phase=phase) for message in chat_messages]
+    new_messages.append(Message(Sender.ASSISTANT, ai_response, phase=phase, deferred=not fallback))
+    session['messages'].extend(new_messages)
+    if transcript_log:
+        transcript_log.append(session['id'], new_messages)
+    if context_manager:
+        context_manager.after_turn(session)
+    sessions.save(session)
+    return progress_data
+
+def get_ai_response(thread_id, message, session, cancel=None):
+    """OpenAI Response mit Phase-Kontext; RunCancelled geht an den Aufrufer (der kennt den Grund)"""
+    cached = cached_response(session, message)
+    if cached:
+        return cached
+    try:
+        response = ai_breaker.call(ai_backend.respond, session, message, cancel=cancel)
+        if response:
+            remember_response(session, message, response)
+        return response or "Entschuldigung, ich konnte keine Antwort generieren."
+    except CircuitOpen:
+        defer_turn(session, message)
+        return FALLBACK_REPLY
+    except RunCancelled:
+        raise
+    except RunTimeout as e:
+        record_abandoned(session, message, 'deadline')
+        return f"Fehler: {str(e)}"
     except Exception as e:
         return f"Fehler: {str(e)}"
 
-def send_coaching_email(to_email, subject, message, session_link=None):
-    """Sendet professionelle Coaching-E-Mail"""
+def stream_ai_response(thread_id, message, session):
+    """OpenAI Response als Stream - liefert Text-Deltas, sobald das Backend sie erzeugt"""
+    cached = cached_response(session, message)
+    if cached:
+        yield cached
+        return
+    if not ai_breaker.allow():
+        defer_turn(session, message)
+        yield FALLBACK_REPLY
+        return
+
+    started = time.monotonic()
+    ok = None
+    parts = []
+    try:
+        for delta in ai_backend.stream(session, message):
+            parts.append(delta)
+            yield delta
+        ok = True
+        if parts:
+            remember_response(session, message, ''.join(parts))
+    except RunTimeout as e:
+        ok = False
+        record_abandoned(session, message, 'deadline')
+        yield f"Fehler: {str(e)}"
+    except Exception as e:
+        ok = False
+        yield f"Fehler: {str(e)}"
+    finally:
+        if ok is None:
+            ai_breaker.release()  # Client hat getrennt - sagt nichts über OpenAI
+        else:
+            ai_breaker.record(ok, time.monotonic() - started)
+
+def finish_turn(session, message, ai_response):
+    """Fortschritt analysieren und Nachrichten speichern"""
+    phase = session['current_phase']
+
+    # Intelligente Fortschrittsanalyse
+    progress_data = analyze_progress(message, ai_response, session)
+
+    # Messages speichern (mit Phase für die Zusammenfassung pro Phase)
+    session['messages'].extend([
+        Message(Sender.USER, message, phase=phase),
+        Message(Sender.ASSISTANT, ai_response, phase=phase)
+    ])
+    if transcript_log:
+        transcript_log.append(session['id'], session['messages'][-2:])
+
+    if context_manager:
+        context_manager.after_turn(session)
+
+    # Ein Schreibvorgang pro Turn: beide Nachrichten, Phase und Fortschritt
+    sessions.save(session)
+    if shared_state:
+        shared_state.incr('turns')
+    return progress_data
+
+def stream_chat_events(session, message):
+    """Server-Sent Events: Token-Deltas, zum Schluss Antwort und Fortschritt (über den Turn-Scheduler)"""
+    with turn_scheduler.turn(session, message) as turn:
+        if turn.leader:
+            turn.result = yield from stream_turn_events(session, turn.text)
+    if turn.coalesced:
+        # Mit einer neueren Nachricht zusammen beantwortet - die Antwort erscheint dort
+        yield f"data: {json.dumps({'done': True, 'coalesced': True, 'response': turn.result['response']})}\n\n"
+
+def stream_turn_events(session, message):
+    """Deltas eines Turns streamen; liefert Antwort und Fortschritt als Rückgabewert"""
+    parts = []
+    deltas = stream_ai_response(session['thread_id'], message, session)
+    try:
+        for delta in deltas:
+            parts.append(delta)
+            yield f"data: {json.dumps({'delta': delta})}\n\n"
+    except GeneratorExit:
+        # Client hat die Verbindung getrennt - Stream schliessen bricht den Run ab
+        deltas.close()
+        record_abandoned(session, message, 'client_disconnect')
+        raise
+
+    ai_response = ''.join(parts) or "Entschuldigung, ich konnte keine Antwort generieren."
+    progress_data = finish_turn(session, message, ai_response)
+
+    yield f"data: {json.dumps({'done': True, 'response': ai_response, 'progress': progress_data})}\n\n"
+    return {'response': ai_response, 'progress': progress_data}
+
+def run_chat_turn(session, message, cancel=None):
+    """Kompletter Chat-Turn über den Turn-Scheduler - auch von den AI-Job-Workern ausgeführt"""
+    try:
+        with turn_scheduler.turn(session, message) as turn:
+            if turn.leader:
+                ai_response = get_ai_response(session['thread_id'], turn.text, session, cancel)
+                turn.result = {'response': ai_response, 'progress': finish_turn(session, turn.text, ai_response)}
+    except RunCancelled:
+        record_abandoned(session, message, 'client_cancel')
+        return {'response': None, 'abandoned': True}
+    return dict(turn.result, coalesced=True) if turn.coalesced else turn.result
+
+def smtp_connect():
+    """Angemeldete SMTP-Verbindung (mit `with` nutzen)"""
+    server = smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'])
+    server.starttls()
+    server.login(EMAIL_CONFIG['address'], EMAIL_CONFIG['password'])
+    return server
+
+def send_coaching_email(to_email, subject, message, session_link=None, server=None):
+    """Sendet professionelle Coaching-E-Mail (über `server`, falls schon eine Verbindung offen ist)"""
     try:
         msg = EmailMessage()
         msg['From'] = EMAIL_CONFIG['address']
@@ -190,10 +466,11 @@ coaching.allenspach-coaching.ch
         msg.add_alternative(html_content, subtype='html')
         
         # E-Mail senden
-        with smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port']) as server:
-            server.starttls()
-            server.login(EMAIL_CONFIG['address'], EMAIL_CONFIG['password'])
+        if server:
             server.send_message(msg)
+        else:
+            with smtp_connect() as server:
+                server.send_message(msg)
             
         print(f"📧 E-Mail gesendet an: {to_email}")
         return True
@@ -202,6 +479,17 @@ coaching.allenspach-coaching.ch
         print(f"❌ E-Mail Fehler: {e}")
         return False
 
+def send_coaching_emails(replies):
+    """Mehrere E-Mails über eine SMTP-Verbindung - replies: (to_email, subject, message, session_link)"""
+    sent = []
+    try:
+        with smtp_connect() as server:
+            for reply in replies:
+                sent.append(send_coaching_email(*reply, server=server))
+    except Exception as e:
+        print(f"❌ SMTP-Verbindung Fehler: {e}")
+    return sent + [False] * (len(replies) - len(sent))
+
 def check_email_inbox():
     """Überwacht E-Mail-Posteingang und antwortet automatisch"""
     try:
@@ -210,45 +498,84 @@ def check_email_inbox():
             mail.select('INBOX')
             
             # Ungelesene E-Mails suchen
-            status, messages = mail.search(None, 'UNSEEN')
-            
-            if messages[0]:
-                for msg_id in messages[0].split():
-                    status, msg_data = mail.fetch(msg_id, '(RFC822)')
-                    
-                    for response_part in msg_data:
-                        if isinstance(response_part, tuple):
-                            msg = email.message_from_bytes(response_part[1])
-                            
-                            sender_email = msg['From']
-                            subject = msg['Subject'] or "Coaching Anfrage"
-                            
-                            # E-Mail Inhalt extrahieren
-                            body = ""
-                            if msg.is_multipart():
-                                for part in msg.walk():
-                                    if part.get_content_type() == "text/plain":
-                                        payload = part.get_payload(decode=True)
-                                        if payload:
-                                            body = payload.decode('utf-8', errors='ignore')
-                            else:
-                                payload = msg.get_payload(decode=True)
-                                if payload:
-                                    body = payload.decode('utf-8', errors='ignore')
-                            
-                            if body.strip():
-                                # Neue Coaching-Session erstellen
-                                session_id = create_session()
-                                
-                                # AI-Response generieren
-                                session = sessions[session_id]
-                                ai_response = get_ai_response(session['thread_id'], body, session)
-                                
-                                # Session-Link erstellen
-                                session_link = f"http://localhost:8080/coaching-session/{session_id}"
-                                
-                                # Professionelle E-Mail-Antwort
-                                email_response = f"""
+            inquiries = fetch_unseen_inquiries(mail)
+            if inquiries:
+                answer_email_backlog(mail, inquiries)
+                        
+    except Exception as e:
+        print(f"📧 E-Mail Check Fehler: {e}")
+
+def fetch_unseen_inquiries(mail):
+    """Alle ungelesenen E-Mails als Anfragen: msg_id, Absender, Betreff, Text
+
+    BODY.PEEK[] statt RFC822: RFC822 setzt \\Seen schon beim Abholen (RFC 3501), abgebrochene oder
+    fehlgeschlagene Anfragen wären dann verloren. \\Seen setzt answer_email_backlog erst nach dem Versand.
+    """
+    inquiries = []
+    status, messages = mail.search(None, 'UNSEEN')
+    
+    for msg_id in (messages[0].split() if messages[0] else []):
+        status, msg_data = mail.fetch(msg_id, '(BODY.PEEK[])')
+        
+        for response_part in msg_data:
+            if isinstance(response_part, tuple):
+                msg = email.message_from_bytes(response_part[1])
+                
+                # E-Mail Inhalt extrahieren
+                body = ""
+                if msg.is_multipart():
+                    for part in msg.walk():
+                        if part.get_content_type() == "text/plain":
+                            payload = part.get_payload(decode=True)
+                            if payload:
+                                body = payload.decode('utf-8', errors='ignore')
+                else:
+                    payload = msg.get_payload(decode=True)
+                    if payload:
+                        body = payload.decode('utf-8', errors='ignore')
+                
+                inquiries.append({
+                    'msg_id': msg_id,
+                    'sender': msg['From'],
+                    'subject': msg['Subject'] or "Coaching Anfrage",
+                    'body': body
+                })
+    return inquiries
+
+def answer_email_inquiry(inquiry):
+    """Neue Coaching-Session mit AI-Antwort für eine E-Mail - läuft parallel in den Batch-Workern"""
+    session_id = create_session()
+    session = sessions[session_id]
+    try:
+        with usage_tracker.channel('email'):
+            ai_response = get_ai_response(session['thread_id'], inquiry['body'], session, cancel=email_monitor_stop)
+    except RunCancelled:
+        # Shutdown: E-Mail bleibt ungelesen und wird beim nächsten Start beantwortet
+        record_abandoned(session, inquiry['body'], 'shutdown')
+        return None
+    return session, ai_response
+
+def answer_email_backlog(mail, inquiries):
+    """AI-Antworten parallel erzeugen (höchstens EMAIL_BATCH_CONCURRENCY), dann gesammelt versenden"""
+    started = time.monotonic()
+    results, stats = run_parallel(answer_email_inquiry, [i for i in inquiries if i['body'].strip()],
+                                  concurrency=EMAIL_BATCH_CONCURRENCY, cancel=email_monitor_stop)
+    ai_done = time.monotonic()
+
+    answered, replies = [], []
+    for result in results:
+        if result['error'] or not result['result']:
+            if result['error'] and result['error'] != 'cancelled':
+                print(f"📧 Anfrage von {result['item']['sender']} fehlgeschlagen: {result['error']}")
+            continue
+        inquiry = result['item']
+        session, ai_response = result['result']
+        
+        # Session-Link erstellen
+        session_link = f"http://localhost:8080/coaching-session/{session['id']}"
+        
+        # Professionelle E-Mail-Antwort
+        email_response = f"""
 Herzlich willkommen zum intelligenten Ruhestandscoaching!
 
 Vielen Dank für Ihre Nachricht. Ich habe Ihre Anfrage gelesen und eine erste Antwort für Sie vorbereitet:
@@ -256,43 +583,88 @@ Vielen Dank für Ihre Nachricht. Ich habe Ihre Anfrage gelesen und eine erste An
 {ai_response}
 
 Für ein vollständiges, interaktives Coaching-Erlebnis mit automatischem Phase-Tracking und Echtzeit-Fortschrittsanzeige nutzen Sie bitte den Link unten. Dort führe ich Sie strukturiert durch unser bewährtes 8-Aufträge-System.
-                                """
-                                
-                                # E-Mail senden
-                                response_subject = f"Re: {subject} - Ihr intelligenter Coaching-Assistent"
-                                send_coaching_email(sender_email, response_subject, email_response, session_link)
-                                
-                                # Session-Info speichern
-                                session['email'] = sender_email
-                                session['initial_message'] = body
-                                
-                                print(f"🎯 Neue Coaching-Session erstellt: {session_id} für {sender_email}")
-                            
-                            # Als gelesen markieren
-                            mail.store(msg_id, '+FLAGS', '\\Seen')
-                        
-    except Exception as e:
-        print(f"📧 E-Mail Check Fehler: {e}")
+        """
+        
+        response_subject = f"Re: {inquiry['subject']} - Ihr intelligenter Coaching-Assistent"
+        replies.append((inquiry['sender'], response_subject, email_response, session_link))
+        answered.append((inquiry, session))
+
+    # E-Mails senden - eine SMTP-Verbindung für den ganzen Rückstau
+    sent = send_coaching_emails(replies)
+
+    for inquiry, session in answered:
+        # Session-Info speichern
+        session['email'] = inquiry['sender']
+        session['initial_message'] = inquiry['body']
+        sessions.save(session)
+        print(f"🎯 Neue Coaching-Session erstellt: {session['id']} für {inquiry['sender']}")
+
+    # Als gelesen markieren: beantwortete und versendete sowie leere E-Mails. Abgebrochene, fehlgeschlagene
+    # und nicht versendete bleiben ungelesen und kommen beim nächsten Durchlauf wieder
+    delivered = [inquiry for (inquiry, _), ok in zip(answered, sent) if ok]
+    for inquiry in delivered + [i for i in inquiries if not i['body'].strip()]:
+        mail.store(inquiry['msg_id'], '+FLAGS', '\\Seen')
+
+    total = time.monotonic() - started
+    batch = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'emails': len(inquiries),
+        'answered': len(answered),
+        'sent': sum(sent),
+        'failed': stats['failed'],
+        'cancelled': stats['cancelled'],
+        'concurrency': stats['concurrency'],
+        'ai_s': round(ai_done - started, 2),
+        'send_s': round(total - (ai_done - started), 2),
+        'total_s': round(total, 2),
+        'per_minute': round(len(answered) / total * 60, 1) if total else 0.0
+    }
+    email_batches.append(batch)
+    print(f"📬 {batch['answered']}/{batch['emails']} E-Mails beantwortet in {batch['total_s']}s "
+          f"({batch['per_minute']}/min, {batch['concurrency']} parallel)")
+    return batch
+
+# Gesetzt beim Herunterfahren: beendet den Monitor und bricht laufende E-Mail-Runs ab
+email_monitor_stop = threading.Event()
+email_monitor_thread = None
+EMAIL_SHUTDOWN_TIMEOUT = float(os.getenv('EMAIL_SHUTDOWN_TIMEOUT', 15))
 
 def start_email_monitor():
     """Startet E-Mail-Überwachung im Hintergrund"""
     def monitor():
         print("📧 E-Mail Monitor gestartet...")
-        while True:
+        while not email_monitor_stop.is_set():
             try:
                 if EMAIL_CONFIG['password']:
                     check_email_inbox()
-                    time.sleep(60)  # Alle 60 Sekunden prüfen
+                    email_monitor_stop.wait(60)  # Alle 60 Sekunden prüfen
                 else:
                     print("⚠️ E-Mail-Password nicht gesetzt - Monitor wartet...")
-                    time.sleep(300)  # 5 Minuten warten
+                    email_monitor_stop.wait(300)  # 5 Minuten warten
             except Exception as e:
                 print(f"📧 Monitor Fehler: {e}")
-                time.sleep(120)  # 2 Minuten bei Fehler
+                email_monitor_stop.wait(120)  # 2 Minuten bei Fehler
+        print("📧 E-Mail Monitor beendet")
     
-    thread = threading.Thread(target=monitor)
-    thread.daemon = True
-    thread.start()
+    global email_monitor_thread
+    email_monitor_stop.clear()
+    # E-Mail-Runs laufen in der Batch-Spur und lassen interaktiven Chats den Vortritt
+    email_monitor_thread = threading.Thread(target=in_lane('batch', monitor), name='email-monitor')
+    email_monitor_thread.daemon = True
+    email_monitor_thread.start()
+
+def stop_email_monitor():
+    """E-Mail-Monitor stoppen und warten (höchstens EMAIL_SHUTDOWN_TIMEOUT), bis Monitor und Batch-Worker
+    ihre Runs abgebrochen haben - sonst endet der Interpreter, bevor runs.cancel gesendet ist"""
+    email_monitor_stop.set()
+    deadline = time.monotonic() + EMAIL_SHUTDOWN_TIMEOUT
+    if email_monitor_thread is not None:
+        email_monitor_thread.join(EMAIL_SHUTDOWN_TIMEOUT)
+    still_running = join_workers(max(0.0, deadline - time.monotonic()))
+    if still_running or (email_monitor_thread is not None and email_monitor_thread.is_alive()):
+        print(f"⚠️ E-Mail-Monitor nach {EMAIL_SHUTDOWN_TIMEOUT}s nicht beendet ({still_running} Worker laufen noch)")
+
+on_shutdown('email_monitor', stop_email_monitor)
 
 @app.route("/")
 def home():
@@ -469,7 +841,9 @@ Antworten Sie einfach mit "visuell", "auditiv" oder "kinästhetisch"!
 
     <script>
         const sessionId = '{session_id}';
-        
+        const useStreaming = {'true' if AI_STREAMING else 'false'};
+        const useJobQueue = {'true' if AI_JOB_QUEUE else 'false'};
+
         function addMessage(sender, content) {{
             const container = document.getElementById('messages');
             const div = document.createElement('div');
@@ -477,6 +851,7 @@ Antworten Sie einfach mit "visuell", "auditiv" oder "kinästhetisch"!
             div.innerHTML = '<div class="message-content">' + content + '</div>';
             container.appendChild(div);
             container.scrollTop = container.scrollHeight;
+            return div.firstChild;
         }}
         
         function showPhaseTransition(newPhase) {{
@@ -506,19 +881,59 @@ Antworten Sie einfach mit "visuell", "auditiv" oder "kinästhetisch"!
             }}
         }}
         
+        function showReply(bubble, data, message) {{
+            // Mit einer neueren Nachricht zusammen beantwortet: Antwort steht in deren Blase
+            if (data.coalesced) {{
+                bubble.parentNode.remove();
+                return;
+            }}
+            // Turn abgebrochen (z.B. Deadline) oder Fehler: keine Antwort - erneut senden anbieten
+            if (data.abandoned || data.response == null) {{
+                bubble.innerHTML = '<em style="color: #666;">' + (data.error || 'Die Antwort ist leider ausgeblieben.') + '</em><br>';
+                const retry = document.createElement('button');
+                retry.className = 'send-btn';
+                retry.style.marginTop = '8px';
+                retry.textContent = '🔄 Erneut senden';
+                retry.onclick = () => requestReply(message, bubble);
+                bubble.appendChild(retry);
+                return;
+            }}
+            bubble.innerHTML = data.response;
+            updateProgress(data.progress);
+        }}
+
         function sendMessage() {{
             const input = document.getElementById('messageInput');
-            const sendBtn = document.getElementById('sendBtn');
             const message = input.value.trim();
             if (!message) return;
             
             addMessage('user', message);
             input.value = '';
-            
+            requestReply(message, addMessage('assistant', ''));
+        }}
+
+        function requestReply(message, bubble) {{
+            const sendBtn = document.getElementById('sendBtn');
             sendBtn.disabled = true;
             sendBtn.textContent = '⏳ AI analysiert...';
-            addMessage('assistant', '<em style="color: #666;">🧠 Intelligenter Coach analysiert Ihren Fortschritt...</em>');
-            
+            bubble.innerHTML = '<em style="color: #666;">🧠 Intelligenter Coach analysiert Ihren Fortschritt...</em>';
+
+            if (useStreaming) {{
+                streamMessage(message, bubble).finally(() => {{
+                    sendBtn.disabled = false;
+                    sendBtn.textContent = '🚀 Senden';
+                }});
+                return;
+            }}
+
+            if (useJobQueue) {{
+                submitJob(message, bubble).finally(() => {{
+                    sendBtn.disabled = false;
+                    sendBtn.textContent = '🚀 Senden';
+                }});
+                return;
+            }}
+
             fetch('/api/intelligent-chat', {{
                 method: 'POST',
                 headers: {{'Content-Type': 'application/json'}},
@@ -526,17 +941,102 @@ Antworten Sie einfach mit "visuell", "auditiv" oder "kinästhetisch"!
             }})
             .then(r => r.json())
             .then(data => {{
-                const messages = document.getElementById('messages');
-                messages.removeChild(messages.lastChild);
-                
-                addMessage('assistant', data.response);
-                updateProgress(data.progress);
+                showReply(bubble, data, message);
                 
                 sendBtn.disabled = false;
                 sendBtn.textContent = '🚀 Senden';
             }});
         }}
-        
+
+        // Offene Anfragen beim Schliessen des Tabs abbrechen, damit der Server den Run stoppt
+        let activeStream = null;
+        let activeJobId = null;
+        window.addEventListener('pagehide', () => {{
+            if (activeStream) activeStream.abort();
+            if (activeJobId) navigator.sendBeacon('/api/jobs/' + activeJobId + '/cancel');
+        }});
+
+        function streamMessage(message, bubble) {{
+            const container = document.getElementById('messages');
+            let text = '';
+            activeStream = new AbortController();
+
+            return fetch('/api/intelligent-chat', {{
+                method: 'POST',
+                headers: {{'Content-Type': 'application/json'}},
+                body: JSON.stringify({{session_id: sessionId, message: message, stream: true}}),
+                signal: activeStream.signal
+            }})
+            .then(r => {{
+                if (!r.ok) return r.json().then(data => {{ bubble.innerHTML = data.error; }});
+
+                const reader = r.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+
+                function read() {{
+                    return reader.read().then(({{done, value}}) => {{
+                        if (done) return;
+                        buffer += decoder.decode(value, {{stream: true}});
+                        const events = buffer.split('\\n\\n');
+                        buffer = events.pop();
+
+                        events.forEach(evt => {{
+                            if (!evt.startsWith('data: ')) return;
+                            const data = JSON.parse(evt.slice(6));
+                            if (data.delta) {{
+                                // Teilantwort sofort anzeigen
+                                text += data.delta;
+                                bubble.innerHTML = text;
+                            }}
+                            if (data.done) showReply(bubble, data, message);
+                            container.scrollTop = container.scrollHeight;
+                        }});
+                        return read();
+                    }});
+                }}
+                return read();
+            }})
+            .finally(() => {{ activeStream = null; }});
+        }}
+
+        function submitJob(message, bubble) {{
+            return fetch('/api/intelligent-chat', {{
+                method: 'POST',
+                headers: {{'Content-Type': 'application/json'}},
+                body: JSON.stringify({{session_id: sessionId, message: message, async: true}})
+            }})
+            .then(r => r.json())
+            .then(job => {{
+                if (!job.job_id) {{
+                    bubble.innerHTML = job.error;
+                    return;
+                }}
+                activeJobId = job.job_id;
+                return waitForJob(job.job_id, message, bubble, 300);
+            }})
+            .finally(() => {{ activeJobId = null; }});
+        }}
+
+        function waitForJob(jobId, message, bubble, delay) {{
+            // Ergebnis abholen, Abfrage-Intervall wächst bis max. 2 Sekunden
+            return new Promise(resolve => setTimeout(resolve, delay))
+            .then(() => fetch('/api/jobs/' + jobId))
+            .then(r => r.json())
+            .then(job => {{
+                if (job.status === 'done') {{
+                    showReply(bubble, job.result, message);
+                }} else if (job.status === 'cancelled') {{
+                    bubble.innerHTML = '<em style="color: #666;">Abgebrochen</em>';
+                }} else if (job.status === 'failed' || job.error) {{
+                    bubble.innerHTML = 'Fehler: ' + job.error;
+                }} else {{
+                    if (job.position) bubble.innerHTML = '<em style="color: #666;">⏳ Position ' + job.position + ' in der Warteschlange...</em>';
+                    return waitForJob(jobId, message, bubble, Math.min(delay * 1.5, 2000));
+                }}
+            }});
+        }}
+
         document.getElementById('messageInput').addEventListener('keypress', function(e) {{
             if (e.key === 'Enter') sendMessage();
         }});
@@ -553,22 +1053,234 @@ def intelligent_chat():
     session = sessions.get(sid)
     if not session:
         return jsonify({'error': 'Session nicht gefunden'}), 404
-    
-    # AI Response generieren
-    ai_response = get_ai_response(session['thread_id'], message, session)
-    
-    # Intelligente Fortschrittsanalyse
-    progress_data = analyze_progress(message, ai_response, session)
-    
-    # Messages speichern
-    session['messages'].extend([
-        {'sender': 'user', 'message': message, 'timestamp': datetime.now().isoformat()},
-        {'sender': 'assistant', 'message': ai_response, 'timestamp': datetime.now().isoformat()}
-    ])
-    
+
+    # Streaming-Modus: Deltas laufend an den Browser weiterreichen
+    if AI_STREAMING and data.get('stream'):
+        return Response(
+            stream_chat_events(session, message),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    # Job-Modus: Turn einreihen und sofort mit der Job-ID antworten
+    if data.get('async'):
+        job_id = ai_jobs.submit(run_chat_turn, session, message, cancellable=True)
+        return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+
+    # AI Response generieren (wartet, falls für diese Session schon ein Run läuft)
+    return jsonify(run_chat_turn(session, message))
+
+@app.route('/api/jobs/<job_id>')
+def ai_job_status(job_id):
+    """Status und ggf. Ergebnis eines AI-Jobs"""
+    job = ai_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job nicht gefunden'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def ai_job_cancel(job_id):
+    """Job abbrechen (Browser-Tab geschlossen) - laufender Run wird bei OpenAI gestoppt"""
+    return jsonify({'job_id': job_id, 'cancelled': ai_jobs.cancel(job_id)})
+
+@app.route('/api/jobs/metrics')
+def ai_job_metrics():
+    """Warteschlangen-Kennzahlen (Tiefe, Wartezeit, Laufzeit)"""
+    return jsonify(ai_jobs.metrics())
+
+@app.route('/api/run-stats')
+def run_stats():
+    """Latenz und Poll-Anzahl der letzten Assistant-Runs"""
+    return jsonify(run_waiter.stats())
+
+@app.route('/api/hedging')
+def hedging_stats():
+    """Hedge-Anteil, Gewinner und geschätzte gesparte Zeit"""
+    if not hedge_policy:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **hedge_policy.metrics()})
+
+def transcript_records(session_id):
+    """Records des Transkripts (Zeitstempel, Absender, Phase, deferred, Text)
+
+    Aus dem Log (Text als memoryview) nur, wenn es alle Nachrichten der Session enthält: mit mehreren
+    Workern schreibt nur der Prozess mit, dem das Log-Verzeichnis gehört - Turns anderer Worker fehlen
+    dort. Sonst aus dem Session-Store, der alle Turns hat.
+    """
+    session = sessions.get(session_id)
+    if session is None:
+        return None
+    if transcript_log is not None and transcript_log.count(session_id) == len(session['messages']):
+        return transcript_log.records(session_id)
+    return ((m.timestamp, m['sender'], m.phase, m.deferred, m.message.encode()) for m in session['messages'])
+
+@app.route('/api/sessions/<session_id>/transcript')
+def session_transcript(session_id):
+    """Transkript-Export als JSON Lines oder Text (?format=text), Nachricht für Nachricht gestreamt"""
+    records = transcript_records(session_id)
+    if records is None:
+        return jsonify({'error': 'Session nicht gefunden'}), 404
+    as_text = request.args.get('format') == 'text'
+
+    def generate():
+        for timestamp, sender, phase, deferred, text in records:
+            if as_text:
+                speaker = 'Coach' if sender == 'assistant' else 'Coachee'
+                yield f"[{datetime.fromtimestamp(timestamp):%d.%m.%Y %H:%M}] {speaker}: ".encode() + bytes(text) + b"\n\n"
+            else:
+                yield json.dumps({'timestamp': datetime.fromtimestamp(timestamp).isoformat(), 'sender': sender,
+                                  'phase': phase, 'deferred': deferred, 'message': str(text, 'utf-8')},
+                                 ensure_ascii=False) + "\n"
+
+    return Response(generate(), mimetype='text/plain; charset=utf-8' if as_text else 'application/x-ndjson',
+                    headers={'Content-Disposition': f'attachment; filename="transkript-{session_id}.'
+                                                    f'{"txt" if as_text else "jsonl"}"'})
+
+@app.route('/api/transcript-log')
+def transcript_log_stats():
+    """Segmente, tote Bytes, Rotationen und Kompaktierungen des Transkript-Logs"""
+    if not transcript_log:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **transcript_log.metrics()})
+
+@app.route('/api/transcript-log/compact', methods=['POST'])
+def transcript_log_compact():
+    """Kompaktierung sofort anstossen (force=true: jedes Segment mit toten Records)"""
+    if not transcript_log:
+        return jsonify({'enabled': False})
+    reclaimed = transcript_log.compact(force=bool((request.json or {}).get('force')))
+    return jsonify({'reclaimed_bytes': reclaimed, **transcript_log.metrics()})
+
+def delete_session(session_id):
+    """Session mit allen Daten löschen (DSGVO): Store, Transkript-Log (Tombstone - die Kompaktierung gibt
+    den Platz frei), Token-Summen und der OpenAI-Thread"""
+    session = sessions.get(session_id)
+    deleted = sessions.delete(session_id)
+    if transcript_log is not None:
+        deleted = transcript_log.forget(session_id) or deleted
+    usage_tracker.forget(session_id)
+    if session is not None and session.get('thread_id') and ai_backend.uses_threads:
+        try:
+            thread_pool.delete(session['thread_id'])
+        except Exception as e:
+            print(f"⚠️ Thread {session['thread_id']} nicht gelöscht: {e}")
+    return deleted
+
+@app.route('/api/sessions/<session_id>', methods=['DELETE'])
+def session_delete(session_id):
+    """Session und Transkript endgültig löschen"""
+    if not delete_session(session_id):
+        return jsonify({'error': 'Session nicht gefunden'}), 404
+    return jsonify({'session_id': session_id, 'deleted': True})
+
+@app.route('/api/session-store')
+def session_store_stats():
+    """Session-Store: Anzahl Sessions/Nachrichten, Cache-Trefferquote, Lade- und Schreiblatenz"""
+    return jsonify(sessions.metrics())
+
+@app.route('/api/thread-pool')
+def thread_pool_stats():
+    """Trefferquote des Thread-Pools und eingesparte Latenz"""
+    return jsonify(thread_pool.metrics())
+
+@app.route('/api/rate-limit')
+def rate_limit_levels():
+    """Füllstand der gemeinsamen OpenAI-Buckets und Wartezeiten pro Spur"""
+    return jsonify(rate_limiter.levels())
+
+@app.route('/api/email-stats')
+def email_stats():
+    """Durchsatz der letzten E-Mail-Durchläufe (Rückstau parallel beantwortet)"""
+    return jsonify({'concurrency': EMAIL_BATCH_CONCURRENCY, 'batches': list(email_batches)})
+
+@app.route('/api/usage')
+def usage_report():
+    """Token-Verbrauch und Kosten gesamt, pro Phase, Kanal, Modell, Tag und teuerste Sessions"""
+    return jsonify(usage_tracker.report(top_sessions=int(request.args.get('top', 10))))
+
+@app.route('/api/usage/<session_id>')
+def session_usage_report(session_id):
+    """Token-Verbrauch und Kosten einer Session"""
+    usage = usage_tracker.session_usage(session_id)
+    if usage is None:
+        return jsonify({'error': 'Keine Usage für diese Session'}), 404
+    return jsonify({'session_id': session_id, **usage})
+
+@app.route('/api/cache-stats')
+def cache_stats():
+    """Trefferquote und häufigste Einträge des Antwort-Caches"""
+    if not response_cache:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **response_cache.metrics()})
+
+@app.route('/api/sessions/<session_id>/cache', methods=['POST'])
+def session_cache_bypass(session_id):
+    """Cache für eine Session umgehen ({"bypass": true}) oder wieder nutzen ({"bypass": false})"""
+    session = sessions.get(session_id)
+    if not session:
+        return jsonify({'error': 'Session nicht gefunden'}), 404
+    session['cache_bypass'] = bool((request.json or {}).get('bypass', True))
+    sessions.save(session)
+    return jsonify({'session_id': session_id, 'cache_bypass': session['cache_bypass']})
+
+@app.route('/api/context-stats')
+def context_stats():
+    """Token-Schätzung vorher/nachher gesamt und pro Session"""
+    if not context_manager:
+        return jsonify({'enabled': False})
+    return jsonify({
+        'enabled': True,
+        **context_manager.metrics(),
+        'sessions': {sid: context_manager.session_stats(s) for sid, s in sessions.cached().items()}
+    })
+
+def deep_sizeof(obj, seen=None):
+    """Speicherbedarf inkl. verschachtelter Dicts/Listen (Näherung über sys.getsizeof)"""
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    else:
+        # __slots__-Objekte (models.Session, Message, PhaseProgress)
+        size += sum(deep_sizeof(getattr(obj, name), seen) for cls in type(obj).__mro__
+                    for name in cls.__dict__.get('__slots__', ()) if hasattr(obj, name))
+    return size
+
+@app.route('/api/stats')
+def app_stats():
+    """Session-Anzahl und Speicherbedarf der Sessions im Speicher (für Lasttests)"""
+    store = sessions.metrics()
     return jsonify({
-        'response': ai_response,
-        'progress': progress_data
+        'sessions': store['sessions'],
+        'messages': store.get('messages', store.get('hot_messages')),
+        'sessions_bytes': deep_sizeof(sessions.cached()),
+        'session_store': store,
+        'transcript_log': transcript_log.metrics() if transcript_log else None,
+        'jobs': ai_jobs.metrics(),
+        'runs': {k: v for k, v in run_waiter.stats().items() if k != 'recent'},
+        'thread_pool': thread_pool.metrics(),
+        'context': context_manager.metrics() if context_manager else None,
+        'cache': response_cache.metrics() if response_cache else None,
+        'email_batch': email_batches[-1] if email_batches else None,
+        'rate_limit': rate_limiter.levels(),
+        'openai_client': client_settings(),
+        'circuit': ai_breaker.metrics(),
+        'deferred_turns': len(deferred_turns),
+        'turns': turn_scheduler.metrics(),
+        'hedging': hedge_policy.metrics() if hedge_policy else None,
+        'usage': usage_tracker.report(top_sessions=0)['total'],
+        'shared': shared_state.counters() if shared_state else None,
+        'abandoned_turns': {
+            'total': len(abandoned_turns),
+            'by_reason': {reason: sum(1 for t in abandoned_turns if t['reason'] == reason)
+                          for reason in {t['reason'] for t in abandoned_turns}},
+            'recent': list(abandoned_turns)[-10:]
+        }
     })
 
 @app.route("/coaching-session/<session_id>")
@@ -612,13 +1324,44 @@ def email_coaching_session(session_id):
 
 @app.route("/dashboard")
 def dashboard():
+    breaker = ai_breaker.metrics()
+    breaker_colors = {'closed': '#e8f5e8', 'half_open': '#fff3cd', 'open': '#f8d7da'}
+    breaker_labels = {'closed': '✅ Geschlossen (normal)', 'half_open': '🟡 Halb offen (Probe läuft)',
+                      'open': f"🔴 Offen - Ersatzantworten, nächste Probe in {breaker['retry_in']}s"}
+    usage = usage_tracker.report(top_sessions=0)
+    today = usage['by_day'].get(datetime.now().date().isoformat(), {'total_tokens': 0, 'cost_usd': 0})
+    usage_rows = ''.join(
+        f"<tr><td>{'Phase ' + str(key) if group == 'by_phase' else key}</td><td>{u['runs']}</td><td>{u['cached']}</td>"
+        f"<td>{u['total_tokens']:,}</td><td>{u['avg_tokens']:,}</td><td>{u['avg_latency_s']}s</td><td>${u['cost_usd']:.4f}</td></tr>"
+        for group in ('by_phase', 'by_channel') for key, u in usage[group].items()
+    )
+    hot_sessions = sessions.cached()  # nur was im Speicher liegt - ausgelagerte Sessions nicht alle nachladen
+    session_usage = {sid: usage_tracker.session_usage(sid) for sid in hot_sessions}
     return f'''<!DOCTYPE html>
 <html>
 <head><title>Coach Dashboard</title></head>
 <body style="font-family: Arial; padding: 40px; background: #f8f9fa;">
     <div style="max-width: 1000px; margin: 0 auto;">
         <h1>📊 Coach Dashboard</h1>
-        <p>Aktive Sessions: {len(sessions)}</p>
+        <p>Aktive Sessions: {len(hot_sessions)} im Speicher, {len(sessions)} gesamt</p>
+        
+        <div style="background: {breaker_colors[breaker['state']]}; padding: 20px; border-radius: 15px; margin: 20px 0;">
+            <h3>🔌 OpenAI Circuit Breaker</h3>
+            <p><strong>Status:</strong> {breaker_labels[breaker['state']]} (seit {breaker['since']})</p>
+            <p><strong>Auslösungen:</strong> {breaker['trips']} | <strong>Abgelehnt:</strong> {breaker['rejected']} | <strong>Erholungen:</strong> {breaker['recoveries']}</p>
+            <p><strong>Fehlerquote (Fenster):</strong> {breaker['window_failure_rate']:.0%} | <strong>Ø Dauer:</strong> {breaker['window_avg_s']}s</p>
+            {f"<p><strong>Letzte Auslösung:</strong> {breaker['last_trip']['time']} - {breaker['last_trip']['reason']}</p>" if breaker['last_trip'] else ''}
+            <p><strong>Vorgemerkte Turns:</strong> {len(deferred_turns)}</p>
+        </div>
+        
+        <div style="background: white; padding: 20px; border-radius: 15px; margin: 20px 0;">
+            <h3>💰 Token-Verbrauch</h3>
+            <p><strong>Gesamt:</strong> {usage['total']['total_tokens']:,} Tokens (${usage['total']['cost_usd']:.4f}) in {usage['total']['runs']} Runs | <strong>Cache-Treffer:</strong> {usage['total']['cached']} | <strong>Heute:</strong> {today['total_tokens']:,} Tokens (${today['cost_usd']:.4f})</p>
+            <table style="width: 100%; border-collapse: collapse; text-align: left;">
+                <tr><th></th><th>Runs</th><th>Cache</th><th>Tokens</th><th>Ø Tokens</th><th>Ø Dauer</th><th>Kosten</th></tr>
+                {usage_rows}
+            </table>
+        </div>
         
         <div style="background: #e8f5e8; padding: 20px; border-radius: 15px; margin: 20px 0;">
             <h3>📧 E-Mail-Integration Status</h3>
@@ -632,12 +1375,14 @@ def dashboard():
                 <h4>Session {s['id']}</h4>
                 <p>Phase: {s['current_phase']}/5</p>
                 <p>Fortschritt: {s['total_progress']:.1f}%</p>
+                <p><a href="/api/sessions/{s['id']}/transcript?format=text">📜 Transkript</a></p>
+                {f"<p>Tokens: {session_usage[s['id']]['total_tokens']:,} (${session_usage[s['id']]['cost_usd']:.4f})</p>" if session_usage.get(s['id']) else ''}
                 {f"<p>E-Mail: {s.get('email', 'Keine E-Mail')}</p>" if s.get('email') else ''}
                 <div style="width: 100%; height: 8px; background: #e9ecef; border-radius: 4px; overflow: hidden;">
                     <div style="width: {s['total_progress']}%; height: 100%; background: #28a745; border-radius: 4px;"></div>
                 </div>
             </div>
-            ''' for s in sessions.values()])}
+            ''' for s in hot_sessions.values()])}
         </div>
         
         <a href="/" style="background: #007bff; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">← Zurück</a>
@@ -678,7 +1423,8 @@ def test_email():
             <li>E-Mail-Monitor läuft alle 60 Sekunden</li>
             <li>Nur ungelesene E-Mails werden verarbeitet</li>
             <li>Pro E-Mail wird eine neue Coaching-Session erstellt</li>
-            <li>Links sind nur solange gültig wie der Server läuft</li>
+            <li>{'Links bleiben auch nach einem Neustart gültig' if sessions.name != 'memory'
+                 else 'Links sind nur solange gültig wie der Server läuft'}</li>
         </ul>
     </div>
     
@@ -698,24 +1444,64 @@ if __name__ == "__main__":
     print("  ✅ E-Mail-Integration")
     print("🌐 http://localhost:8080")
     
-    # E-Mail Monitor starten
+    # E-Mail Monitor starten und Thread-Pool vorwärmen
     start_email_monitor()
+    thread_pool.start()
     
     app.run(port=8080, debug=True)
 #!/usr/bin/env python3
 import os
-from flask import Flask, request, jsonify
-from openai import OpenAI
+from flask import Flask, request, jsonify, Response
+from openai_client import client_settings
 from dotenv import load_dotenv
-import uuid, time, re
+import uuid, time, re, json, sys
+from run_waiter import RunCancelled, RunTimeout
+from ai_backends import create_backend
+from rate_limiter import in_lane
+from circuit_breaker import CircuitBreaker, CircuitOpen
+from batch_runner import join_workers, run_parallel
+from usage_tracker import current_channel
+from hedging import HedgedWaiter
+from models import Session, Message, Sender
+from collections import deque
 from datetime import datetime
 
 load_dotenv()
 app = Flask(__name__)
-sessions = {}
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-ASSISTANT_ID = os.getenv("ASSISTANT_ID")
+# Dienste (Session-Store, Rate-Limit, OpenAI-Client, Job-Queue, Thread-Pool, Transkript-Log, Kontext, Cache)
+# entstehen einmal pro Prozess in app_services.py - diese Datei enthält die App zweimal
+from app_services import (shared_state, sessions, rate_limiter, client, ASSISTANT_ID, AI_BACKEND, AI_CHAT_MODEL,
+                          AI_SYSTEM_PROMPT, ai_jobs, run_waiter, hedge_policy, usage_tracker, turn_scheduler,
+                          thread_pool, transcript_log, context_manager, response_cache, on_shutdown)
+
+# Streaming der AI-Antworten (AI_STREAMING=false schaltet auf den alten Polling-Pfad zurück)
+AI_STREAMING = os.getenv('AI_STREAMING', 'true').lower() == 'true'
+
+# Job-Warteschlange: Chat-Turns laufen in einem begrenzten Worker-Pool statt im Flask-Thread
+AI_JOB_QUEUE = os.getenv('AI_JOB_QUEUE', 'false').lower() == 'true'
+
+# Abgebrochene Turns (Client weg, Deadline, Shutdown) für /api/stats
+abandoned_turns = deque(maxlen=200)
+
+def record_usage(session, usage):
+    """Usage eines Runs der Session und der Phase zurechnen, in der der Turn lief"""
+    usage_tracker.record(session['id'], session['current_phase'], **usage)
+
+# Circuit Breaker: bei gehäuften Fehlern oder langsamen Runs sofort Ersatzantwort, Turn wird nachgeholt
+ai_breaker = CircuitBreaker(
+    'openai',
+    failure_rate=float(os.getenv('AI_BREAKER_FAILURE_RATE', 0.5)),
+    slow_call=float(os.getenv('AI_BREAKER_SLOW_CALL', 30)),
+    open_for=float(os.getenv('AI_BREAKER_OPEN_FOR', 30)),
+    ignore=(RunCancelled,),
+    on_close=lambda: replay_deferred_turns()
+)
+deferred_turns = deque()
+
+FALLBACK_REPLY = ("Ich bin gerade stark ausgelastet und kann dir nicht sofort ausführlich antworten. "
+                  "Deine Nachricht ist gespeichert - meine Antwort folgt, sobald ich wieder verfügbar bin. "
+                  "Magst du mir in der Zwischenzeit erzählen, was dich heute am meisten beschäftigt?")
 
 # Intelligente Phase-Definitionen
 PHASE_KEYWORDS = {
@@ -726,18 +1512,34 @@ PHASE_KEYWORDS = {
     5: ['erfolge', 'integration', 'learnings', 'abschluss']
 }
 
+# Phasen-Register: Name und Coaching-Auftrag pro Phase (Schlüssel wie PHASE_KEYWORDS)
+PHASES = {
+    1: {'name': 'Standort & Lernstil',
+        'focus': 'Frage zuerst den Lernstil ab, kläre dann Ausgangssituation und Herzenswunsch.'},
+    2: {'name': 'Gefühle & Schlüsselaffekt',
+        'focus': 'Erkunde Gefühle und Emotionen rund um den Übergang, arbeite mit Bildern.'},
+    3: {'name': 'Inneres Team & Muster',
+        'focus': 'Analysiere das innere Team und wiederkehrende Muster oder Teufelskreisläufe.'},
+    4: {'name': 'Vision & Schritte',
+        'focus': 'Entwickle mit Erfolgsimagination eine Vision und konkrete nächste Schritte.'},
+    5: {'name': 'Integration & Abschluss',
+        'focus': 'Sichere Erfolge und Learnings, integriere sie und schliesse das Coaching ab.'}
+}
+
+def build_phase_prompt(phase):
+    return f"""Du bist ein Ruhestandscoach. Aktuelle Phase: {phase}/5 ({PHASES[phase]['name']})
+Führe systematisch durch das 8-Aufträge-System. Verwende Du-Form und Guillemets « ».
+{PHASES[phase]['focus']}"""
+
+# Einmal pro Phase aufgebaut - als Run-Instruktion statt in jeder User-Message
+PHASE_PROMPTS = {phase: build_phase_prompt(phase) for phase in PHASES}
+
 def create_session():
     sid = str(uuid.uuid4())[:8]
-    thread = client.beta.threads.create()
-    sessions[sid] = {
-        'id': sid,
-        'thread_id': thread.id,
-        'current_phase': 1,
-        'phase_progress': {1: 0, 2: 0, 3: 0, 4: 0, 5: 0},
-        'total_progress': 0,
-        'messages': [],
-        'created': datetime.now()
-    }
+    thread_id = thread_pool.acquire() if ai_backend.uses_threads else None
+    sessions.add(Session(sid, thread_id))
+    if shared_state:
+        shared_state.incr('sessions_created')
     return sid
 
 def analyze_progress(message, response, session):
@@ -770,42 +1572,252 @@ def analyze_progress(message, response, session):
     return {
         'current_phase': session['current_phase'],
         'total_progress': session['total_progress'],
-        'phase_progress': session['phase_progress'],
+        'phase_progress': session['phase_progress'].to_dict(),
         'phase_changed': current_phase != session['current_phase']
     }
 
-def get_ai_response(thread_id, message, session):
-    """OpenAI Response mit Phase-Kontext"""
+def phase_context(session):
+    """Coaching-Kontext der aktuellen Phase (aus PHASE_PROMPTS)"""
+    return PHASE_PROMPTS[session['current_phase']]
+
+# AI-Backend: Assistants-Threads oder Chat Completions mit lokalem Verlauf
+ai_backend = create_backend(
+    AI_BACKEND,
+    client=client,
+    assistant_id=ASSISTANT_ID,
+    run_waiter=run_waiter,
+    model=AI_CHAT_MODEL,
+    system_prompt=AI_SYSTEM_PROMPT,
+    phase_context=phase_context,
+    context=context_manager,
+    on_usage=record_usage,
+    hedging=HedgedWaiter(run_waiter, hedge_policy) if hedge_policy else None
+)
+
+def cacheable(session):
+    """Nur Eröffnungs-Turns im Web: ohne Verlauf hängt die Antwort allein von Phase und Nachricht ab.
+    E-Mails nie - sie sind persönlich (Name, Situation) und würden einem anderen Coachee zugestellt."""
+    return response_cache is not None and not session['messages'] and current_channel() != 'email'
+
+def cached_response(session, message):
+    """Antwort aus dem Cache oder None; ein Treffer wird trotzdem in den Thread geschrieben"""
+    if not cacheable(session):
+        return None
+    if session.get('cache_bypass'):
+        response_cache.bypassed()
+        return None
+    ai_response = response_cache.get(session['current_phase'], message)
+    if ai_response is None:
+        return None
+    usage_tracker.record_cached(session['id'], session['current_phase'])
     try:
-        phase_context = f"""
-Du bist ein Ruhestandscoach. Aktuelle Phase: {session['current_phase']}/5
-Führe systematisch durch das 8-Aufträge-System. Verwende Du-Form und Guillemets « ».
-Beginne mit Lernstil-Abfrage bei neuen Sessions.
-        """
-        
-        client.beta.threads.messages.create(
-            thread_id=thread_id,
-            role="user", 
-            content=f"KONTEXT: {phase_context}\n\nUSER: {message}"
-        )
-        
-        run = client.beta.threads.runs.create(
-            thread_id=thread_id,
-            assistant_id=ASSISTANT_ID
-        )
-        
-        while run.status in ['queued', 'in_progress']:
-            time.sleep(1)
-            run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
-        
-        messages = client.beta.threads.messages.list(thread_id=thread_id)
-        for msg in messages.data:
-            if msg.role == 'assistant':
-                return msg.content[0].text.value
-                
-        return "Entschuldigung, ich konnte keine Antwort generieren."
+        ai_backend.record_turn(session, message, ai_response)
     except Exception as e:
+        print(f"⚠️ Cache-Antwort nicht im Thread gespeichert ({session['id']}): {e}")
+    return ai_response
+
+def remember_response(session, message, ai_response):
+    """Erfolgreiche Antwort auf einen Eröffnungs-Turn für spätere Sessions merken"""
+    if cacheable(session) and not session.get('cache_bypass'):
+        response_cache.put(session['current_phase'], message, ai_response)
+
+def record_abandoned(session, message, reason):
+    """Turn festhalten, dessen Run abgebrochen wurde - in der Session und global"""
+    entry = {
+        'session_id': session['id'],
+        'message': message[:200],
+        'reason': reason,
+        'timestamp': datetime.now().isoformat()
+    }
+    session.setdefault('abandoned_turns', []).append(entry)
+    abandoned_turns.append(entry)
+    sessions.save(session)
+    print(f"🛑 Turn abgebrochen ({reason}) in Session {session['id']}")
+
+def defer_turn(session, message):
+    """Turn vormerken, solange der Circuit offen ist - wird nach der Erholung nachgeholt"""
+    deferred_turns.append({'session_id': session['id'], 'message': message, 'queued': datetime.now().isoformat()})
+
+def replay_deferred_turns():
+    """Nach der Erholung: vorgemerkte Turns über die Job-Queue beantworten (pro Session ein Job)"""
+    by_session = {}
+    while deferred_turns:
+        turn = deferred_turns.popleft()
+        by_session.setdefault(turn['session_id'], []).append(turn)
+    for sid, turns in by_session.items():
+        if sid in sessions:
+            ai_jobs.submit(answer_deferred_turns, sessions[sid], turns)
+
+def answer_deferred_turns(session, turns):
+    """Nachgeholte Antworten nacheinander (ein Run pro Thread) speichern und E-Mail-Coachees zusenden"""
+    answered = 0
+    for index, turn in enumerate(turns):
+        with turn_scheduler.turn(session, turn['message']) as scheduled:
+            if scheduled.leader:
+                ai_response = get_ai_response(session['thread_id'], scheduled.text, session)
+                # Gleiches Ergebnis wie ein Chat-Turn - mitgebündelte Chat-Turns lesen 'response'
+                scheduled.result = {'response': ai_response,
+                                    'progress': finish_deferred_turn(session, scheduled.messages[:-1], ai_response)}
+        if scheduled.coalesced:
+            continue  # mit einer neueren Chat-Nachricht zusammen beantwortet
+        ai_response = scheduled.result['response']
+        if ai_response == FALLBACK_REPLY:
+            # Circuit wieder offen - dieser Turn ist erneut vorgemerkt, die restlichen auch
+            deferred_turns.extend(turns[index + 1:])
+            break
+
+        if session.get('email'):
+            send_coaching_email(session['email'], "Ihre Coaching-Antwort", ai_response,
+                                f"http://localhost:8080/coaching-session/{session['id']}")
+        answered += 1
+    return {'answered': answered}
+
+def finish_deferred_turn(session, chat_messages, ai_response):
+    """Nachgeholte Antwort speichern, davor die User-Nachrichten mitgebündelter Chat-Turns
+
+    Die vorgemerkte Nachricht selbst steht schon in der Session (mit der Ersatzantwort). Ist der Circuit
+    wieder offen, wird nur gespeichert, wenn Chat-Nachrichten dabei sind - sie bekommen wie jeder Chat-Turn
+    die Ersatzantwort. Liefert den Fortschritt im Format von finish_turn.
+    """
+    fallback = ai_response == FALLBACK_REPLY
+    if fallback and not chat_messages:
+        return None
+    phase = session['current_phase']
+    if chat_messages:
+        progress_data = analyze_progress('\n\n'.join(chat_messages), ai_response, session)
+    else:
+        progress_data = {'current_phase': phase, 'total_progress': session['total_progress'],
+                         'phase_progress': session['phase_progress'].to_dict(), 'phase_changed': False}
+
+    new_messages = [Message(Sender.USER, message, phase=phase) for message in chat_messages]
+    new_messages.append(Message(Sender.ASSISTANT, ai_response, phase=phase, deferred=not fallback))
+    session['messages'].extend(new_messages)
+    if transcript_log:
+        transcript_log.append(session['id'], new_messages)
+    if context_manager:
+        context_manager.after_turn(session)
+    sessions.save(session)
+    return progress_data
+
+def get_ai_response(thread_id, message, session, cancel=None):
+    """OpenAI Response mit Phase-Kontext; RunCancelled geht an den Aufrufer (der kennt den Grund)"""
+    cached = cached_response(session, message)
+    if cached:
+        return cached
+    try:
+        response = ai_breaker.call(ai_backend.respond, session, message, cancel=cancel)
+        if response:
+            remember_response(session, message, response)
+        return response or "Entschuldigung, ich konnte keine Antwort generieren."
+    except CircuitOpen:
+        defer_turn(session, message)
+        return FALLBACK_REPLY
+    except RunCancelled:
+        raise
+    except RunTimeout as e:
+        record_abandoned(session, message, 'deadline')
         return f"Fehler: {str(e)}"
+    except Exception as e:
+        return f"Fehler: {str(e)}"
+
+def stream_ai_response(thread_id, message, session):
+    """OpenAI Response als Stream - liefert Text-Deltas, sobald das Backend sie erzeugt"""
+    cached = cached_response(session, message)
+    if cached:
+        yield cached
+        return
+    if not ai_breaker.allow():
+        defer_turn(session, message)
+        yield FALLBACK_REPLY
+        return
+
+    started = time.monotonic()
+    ok = None
+    parts = []
+    try:
+        for delta in ai_backend.stream(session, message):
+            parts.append(delta)
+            yield delta
+        ok = True
+        if parts:
+            remember_response(session, message, ''.join(parts))
+    except RunTimeout as e:
+        ok = False
+        record_abandoned(session, message, 'deadline')
+        yield f"Fehler: {str(e)}"
+    except Exception as e:
+        ok = False
+        yield f"Fehler: {str(e)}"
+    finally:
+        if ok is None:
+            ai_breaker.release()  # Client hat getrennt - sagt nichts über OpenAI
+        else:
+            ai_breaker.record(ok, time.monotonic() - started)
+
+def finish_turn(session, message, ai_response):
+    """Fortschritt analysieren und Nachrichten speichern"""
+    phase = session['current_phase']
+
+    # Intelligente Fortschrittsanalyse
+    progress_data = analyze_progress(message, ai_response, session)
+
+    # Messages speichern (mit Phase für die Zusammenfassung pro Phase)
+    session['messages'].extend([
+        Message(Sender.USER, message, phase=phase),
+        Message(Sender.ASSISTANT, ai_response, phase=phase)
+    ])
+    if transcript_log:
+        transcript_log.append(session['id'], session['messages'][-2:])
+
+    if context_manager:
+        context_manager.after_turn(session)
+
+    # Ein Schreibvorgang pro Turn: beide Nachrichten, Phase und Fortschritt
+    sessions.save(session)
+    if shared_state:
+        shared_state.incr('turns')
+    return progress_data
+
+def stream_chat_events(session, message):
+    """Server-Sent Events: Token-Deltas, zum Schluss Antwort und Fortschritt (über den Turn-Scheduler)"""
+    with turn_scheduler.turn(session, message) as turn:
+        if turn.leader:
+            turn.result = yield from stream_turn_events(session, turn.text)
+    if turn.coalesced:
+        # Mit einer neueren Nachricht zusammen beantwortet - die Antwort erscheint dort
+        yield f"data: {json.dumps({'done': True, 'coalesced': True, 'response': turn.result['response']})}\n\n"
+
+def stream_turn_events(session, message):
+    """Deltas eines Turns streamen; liefert Antwort und Fortschritt als Rückgabewert"""
+    parts = []
+    deltas = stream_ai_response(session['thread_id'], message, session)
+    try:
+        for delta in deltas:
+            parts.append(delta)
+            yield f"data: {json.dumps({'delta': delta})}\n\n"
+    except GeneratorExit:
+        # Client hat die Verbindung getrennt - Stream schliessen bricht den Run ab
+        deltas.close()
+        record_abandoned(session, message, 'client_disconnect')
+        raise
+
+    ai_response = ''.join(parts) or "Entschuldigung, ich konnte keine Antwort generieren."
+    progress_data = finish_turn(session, message, ai_response)
+
+    yield f"data: {json.dumps({'done': True, 'response': ai_response, 'progress': progress_data})}\n\n"
+    return {'response': ai_response, 'progress': progress_data}
+
+def run_chat_turn(session, message, cancel=None):
+    """Kompletter Chat-Turn über den Turn-Scheduler - auch von den AI-Job-Workern ausgeführt"""
+    try:
+        with turn_scheduler.turn(session, message) as turn:
+            if turn.leader:
+                ai_response = get_ai_response(session['thread_id'], turn.text, session, cancel)
+                turn.result = {'response': ai_response, 'progress': finish_turn(session, turn.text, ai_response)}
+    except RunCancelled:
+        record_abandoned(session, message, 'client_cancel')
+        return {'response': None, 'abandoned': True}
+    return dict(turn.result, coalesced=True) if turn.coalesced else turn.result
 
 @app.route("/")
 def home():
@@ -974,7 +1986,9 @@ Antworten Sie einfach mit "visuell", "auditiv" oder "kinästhetisch"!
 
     <script>
         const sessionId = '{session_id}';
-        
+        const useStreaming = {'true' if AI_STREAMING else 'false'};
+        const useJobQueue = {'true' if AI_JOB_QUEUE else 'false'};
+
         function addMessage(sender, content) {{
             const container = document.getElementById('messages');
             const div = document.createElement('div');
@@ -982,6 +1996,7 @@ Antworten Sie einfach mit "visuell", "auditiv" oder "kinästhetisch"!
             div.innerHTML = '<div class="message-content">' + content + '</div>';
             container.appendChild(div);
             container.scrollTop = container.scrollHeight;
+            return div.firstChild;
         }}
         
         function showPhaseTransition(newPhase) {{
@@ -1011,19 +2026,59 @@ Antworten Sie einfach mit "visuell", "auditiv" oder "kinästhetisch"!
             }}
         }}
         
+        function showReply(bubble, data, message) {{
+            // Mit einer neueren Nachricht zusammen beantwortet: Antwort steht in deren Blase
+            if (data.coalesced) {{
+                bubble.parentNode.remove();
+                return;
+            }}
+            // Turn abgebrochen (z.B. Deadline) oder Fehler: keine Antwort - erneut senden anbieten
+            if (data.abandoned || data.response == null) {{
+                bubble.innerHTML = '<em style="color: #666;">' + (data.error || 'Die Antwort ist leider ausgeblieben.') + '</em><br>';
+                const retry = document.createElement('button');
+                retry.className = 'send-btn';
+                retry.style.marginTop = '8px';
+                retry.textContent = '🔄 Erneut senden';
+                retry.onclick = () => requestReply(message, bubble);
+                bubble.appendChild(retry);
+                return;
+            }}
+            bubble.innerHTML = data.response;
+            updateProgress(data.progress);
+        }}
+
         function sendMessage() {{
             const input = document.getElementById('messageInput');
-            const sendBtn = document.getElementById('sendBtn');
             const message = input.value.trim();
             if (!message) return;
             
             addMessage('user', message);
             input.value = '';
-            
+            requestReply(message, addMessage('assistant', ''));
+        }}
+
+        function requestReply(message, bubble) {{
+            const sendBtn = document.getElementById('sendBtn');
             sendBtn.disabled = true;
             sendBtn.textContent = '⏳ AI analysiert...';
-            addMessage('assistant', '<em style="color: #666;">🧠 Intelligenter Coach analysiert Ihren Fortschritt...</em>');
-            
+            bubble.innerHTML = '<em style="color: #666;">🧠 Intelligenter Coach analysiert Ihren Fortschritt...</em>';
+
+            if (useStreaming) {{
+                streamMessage(message, bubble).finally(() => {{
+                    sendBtn.disabled = false;
+                    sendBtn.textContent = '🚀 Senden';
+                }});
+                return;
+            }}
+
+            if (useJobQueue) {{
+                submitJob(message, bubble).finally(() => {{
+                    sendBtn.disabled = false;
+                    sendBtn.textContent = '🚀 Senden';
+                }});
+                return;
+            }}
+
             fetch('/api/intelligent-chat', {{
                 method: 'POST',
                 headers: {{'Content-Type': 'application/json'}},
@@ -1031,17 +2086,102 @@ Antworten Sie einfach mit "visuell", "auditiv" oder "kinästhetisch"!
             }})
             .then(r => r.json())
             .then(data => {{
-                const messages = document.getElementById('messages');
-                messages.removeChild(messages.lastChild);
-                
-                addMessage('assistant', data.response);
-                updateProgress(data.progress);
+                showReply(bubble, data, message);
                 
                 sendBtn.disabled = false;
                 sendBtn.textContent = '🚀 Senden';
             }});
         }}
-        
+
+        // Offene Anfragen beim Schliessen des Tabs abbrechen, damit der Server den Run stoppt
+        let activeStream = null;
+        let activeJobId = null;
+        window.addEventListener('pagehide', () => {{
+            if (activeStream) activeStream.abort();
+            if (activeJobId) navigator.sendBeacon('/api/jobs/' + activeJobId + '/cancel');
+        }});
+
+        function streamMessage(message, bubble) {{
+            const container = document.getElementById('messages');
+            let text = '';
+            activeStream = new AbortController();
+
+            return fetch('/api/intelligent-chat', {{
+                method: 'POST',
+                headers: {{'Content-Type': 'application/json'}},
+                body: JSON.stringify({{session_id: sessionId, message: message, stream: true}}),
+                signal: activeStream.signal
+            }})
+            .then(r => {{
+                if (!r.ok) return r.json().then(data => {{ bubble.innerHTML = data.error; }});
+
+                const reader = r.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+
+                function read() {{
+                    return reader.read().then(({{done, value}}) => {{
+                        if (done) return;
+                        buffer += decoder.decode(value, {{stream: true}});
+                        const events = buffer.split('\\n\\n');
+                        buffer = events.pop();
+
+                        events.forEach(evt => {{
+                            if (!evt.startsWith('data: ')) return;
+                            const data = JSON.parse(evt.slice(6));
+                            if (data.delta) {{
+                                // Teilantwort sofort anzeigen
+                                text += data.delta;
+                                bubble.innerHTML = text;
+                            }}
+                            if (data.done) showReply(bubble, data, message);
+                            container.scrollTop = container.scrollHeight;
+                        }});
+                        return read();
+                    }});
+                }}
+                return read();
+            }})
+            .finally(() => {{ activeStream = null; }});
+        }}
+
+        function submitJob(message, bubble) {{
+            return fetch('/api/intelligent-chat', {{
+                method: 'POST',
+                headers: {{'Content-Type': 'application/json'}},
+                body: JSON.stringify({{session_id: sessionId, message: message, async: true}})
+            }})
+            .then(r => r.json())
+            .then(job => {{
+                if (!job.job_id) {{
+                    bubble.innerHTML = job.error;
+                    return;
+                }}
+                activeJobId = job.job_id;
+                return waitForJob(job.job_id, message, bubble, 300);
+            }})
+            .finally(() => {{ activeJobId = null; }});
+        }}
+
+        function waitForJob(jobId, message, bubble, delay) {{
+            // Ergebnis abholen, Abfrage-Intervall wächst bis max. 2 Sekunden
+            return new Promise(resolve => setTimeout(resolve, delay))
+            .then(() => fetch('/api/jobs/' + jobId))
+            .then(r => r.json())
+            .then(job => {{
+                if (job.status === 'done') {{
+                    showReply(bubble, job.result, message);
+                }} else if (job.status === 'cancelled') {{
+                    bubble.innerHTML = '<em style="color: #666;">Abgebrochen</em>';
+                }} else if (job.status === 'failed' || job.error) {{
+                    bubble.innerHTML = 'Fehler: ' + job.error;
+                }} else {{
+                    if (job.position) bubble.innerHTML = '<em style="color: #666;">⏳ Position ' + job.position + ' in der Warteschlange...</em>';
+                    return waitForJob(jobId, message, bubble, Math.min(delay * 1.5, 2000));
+                }}
+            }});
+        }}
+
         document.getElementById('messageInput').addEventListener('keypress', function(e) {{
             if (e.key === 'Enter') sendMessage();
         }});
@@ -1058,33 +2198,276 @@ def intelligent_chat():
     session = sessions.get(sid)
     if not session:
         return jsonify({'error': 'Session nicht gefunden'}), 404
-    
-    # AI Response generieren
-    ai_response = get_ai_response(session['thread_id'], message, session)
-    
-    # Intelligente Fortschrittsanalyse
-    progress_data = analyze_progress(message, ai_response, session)
-    
-    # Messages speichern
-    session['messages'].extend([
-        {'sender': 'user', 'message': message, 'timestamp': datetime.now().isoformat()},
-        {'sender': 'assistant', 'message': ai_response, 'timestamp': datetime.now().isoformat()}
-    ])
-    
+
+    # Streaming-Modus: Deltas laufend an den Browser weiterreichen
+    if AI_STREAMING and data.get('stream'):
+        return Response(
+            stream_chat_events(session, message),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    # Job-Modus: Turn einreihen und sofort mit der Job-ID antworten
+    if data.get('async'):
+        job_id = ai_jobs.submit(run_chat_turn, session, message, cancellable=True)
+        return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+
+    # AI Response generieren (wartet, falls für diese Session schon ein Run läuft)
+    return jsonify(run_chat_turn(session, message))
+
+@app.route('/api/jobs/<job_id>')
+def ai_job_status(job_id):
+    """Status und ggf. Ergebnis eines AI-Jobs"""
+    job = ai_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job nicht gefunden'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def ai_job_cancel(job_id):
+    """Job abbrechen (Browser-Tab geschlossen) - laufender Run wird bei OpenAI gestoppt"""
+    return jsonify({'job_id': job_id, 'cancelled': ai_jobs.cancel(job_id)})
+
+@app.route('/api/jobs/metrics')
+def ai_job_metrics():
+    """Warteschlangen-Kennzahlen (Tiefe, Wartezeit, Laufzeit)"""
+    return jsonify(ai_jobs.metrics())
+
+@app.route('/api/run-stats')
+def run_stats():
+    """Latenz und Poll-Anzahl der letzten Assistant-Runs"""
+    return jsonify(run_waiter.stats())
+
+@app.route('/api/hedging')
+def hedging_stats():
+    """Hedge-Anteil, Gewinner und geschätzte gesparte Zeit"""
+    if not hedge_policy:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **hedge_policy.metrics()})
+
+def transcript_records(session_id):
+    """Records des Transkripts (Zeitstempel, Absender, Phase, deferred, Text)
+
+    Aus dem Log (Text als memoryview) nur, wenn es alle Nachrichten der Session enthält: mit mehreren
+    Workern schreibt nur der Prozess mit, dem das Log-Verzeichnis gehört - Turns anderer Worker fehlen
+    dort. Sonst aus dem Session-Store, der alle Turns hat.
+    """
+    session = sessions.get(session_id)
+    if session is None:
+        return None
+    if transcript_log is not None and transcript_log.count(session_id) == len(session['messages']):
+        return transcript_log.records(session_id)
+    return ((m.timestamp, m['sender'], m.phase, m.deferred, m.message.encode()) for m in session['messages'])
+
+@app.route('/api/sessions/<session_id>/transcript')
+def session_transcript(session_id):
+    """Transkript-Export als JSON Lines oder Text (?format=text), Nachricht für Nachricht gestreamt"""
+    records = transcript_records(session_id)
+    if records is None:
+        return jsonify({'error': 'Session nicht gefunden'}), 404
+    as_text = request.args.get('format') == 'text'
+
+    def generate():
+        for timestamp, sender, phase, deferred, text in records:
+            if as_text:
+                speaker = 'Coach' if sender == 'assistant' else 'Coachee'
+                yield f"[{datetime.fromtimestamp(timestamp):%d.%m.%Y %H:%M}] {speaker}: ".encode() + bytes(text) + b"\n\n"
+            else:
+                yield json.dumps({'timestamp': datetime.fromtimestamp(timestamp).isoformat(), 'sender': sender,
+                                  'phase': phase, 'deferred': deferred, 'message': str(text, 'utf-8')},
+                                 ensure_ascii=False) + "\n"
+
+    return Response(generate(), mimetype='text/plain; charset=utf-8' if as_text else 'application/x-ndjson',
+                    headers={'Content-Disposition': f'attachment; filename="transkript-{session_id}.'
+                                                    f'{"txt" if as_text else "jsonl"}"'})
+
+@app.route('/api/transcript-log')
+def transcript_log_stats():
+    """Segmente, tote Bytes, Rotationen und Kompaktierungen des Transkript-Logs"""
+    if not transcript_log:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **transcript_log.metrics()})
+
+@app.route('/api/transcript-log/compact', methods=['POST'])
+def transcript_log_compact():
+    """Kompaktierung sofort anstossen (force=true: jedes Segment mit toten Records)"""
+    if not transcript_log:
+        return jsonify({'enabled': False})
+    reclaimed = transcript_log.compact(force=bool((request.json or {}).get('force')))
+    return jsonify({'reclaimed_bytes': reclaimed, **transcript_log.metrics()})
+
+def delete_session(session_id):
+    """Session mit allen Daten löschen (DSGVO): Store, Transkript-Log (Tombstone - die Kompaktierung gibt
+    den Platz frei), Token-Summen und der OpenAI-Thread"""
+    session = sessions.get(session_id)
+    deleted = sessions.delete(session_id)
+    if transcript_log is not None:
+        deleted = transcript_log.forget(session_id) or deleted
+    usage_tracker.forget(session_id)
+    if session is not None and session.get('thread_id') and ai_backend.uses_threads:
+        try:
+            thread_pool.delete(session['thread_id'])
+        except Exception as e:
+            print(f"⚠️ Thread {session['thread_id']} nicht gelöscht: {e}")
+    return deleted
+
+@app.route('/api/sessions/<session_id>', methods=['DELETE'])
+def session_delete(session_id):
+    """Session und Transkript endgültig löschen"""
+    if not delete_session(session_id):
+        return jsonify({'error': 'Session nicht gefunden'}), 404
+    return jsonify({'session_id': session_id, 'deleted': True})
+
+@app.route('/api/session-store')
+def session_store_stats():
+    """Session-Store: Anzahl Sessions/Nachrichten, Cache-Trefferquote, Lade- und Schreiblatenz"""
+    return jsonify(sessions.metrics())
+
+@app.route('/api/thread-pool')
+def thread_pool_stats():
+    """Trefferquote des Thread-Pools und eingesparte Latenz"""
+    return jsonify(thread_pool.metrics())
+
+@app.route('/api/rate-limit')
+def rate_limit_levels():
+    """Füllstand der gemeinsamen OpenAI-Buckets und Wartezeiten pro Spur"""
+    return jsonify(rate_limiter.levels())
+
+@app.route('/api/email-stats')
+def email_stats():
+    """Durchsatz der letzten E-Mail-Durchläufe (Rückstau parallel beantwortet)"""
+    return jsonify({'concurrency': EMAIL_BATCH_CONCURRENCY, 'batches': list(email_batches)})
+
+@app.route('/api/usage')
+def usage_report():
+    """Token-Verbrauch und Kosten gesamt, pro Phase, Kanal, Modell, Tag und teuerste Sessions"""
+    return jsonify(usage_tracker.report(top_sessions=int(request.args.get('top', 10))))
+
+@app.route('/api/usage/<session_id>')
+def session_usage_report(session_id):
+    """Token-Verbrauch und Kosten einer Session"""
+    usage = usage_tracker.session_usage(session_id)
+    if usage is None:
+        return jsonify({'error': 'Keine Usage für diese Session'}), 404
+    return jsonify({'session_id': session_id, **usage})
+
+@app.route('/api/cache-stats')
+def cache_stats():
+    """Trefferquote und häufigste Einträge des Antwort-Caches"""
+    if not response_cache:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **response_cache.metrics()})
+
+@app.route('/api/sessions/<session_id>/cache', methods=['POST'])
+def session_cache_bypass(session_id):
+    """Cache für eine Session umgehen ({"bypass": true}) oder wieder nutzen ({"bypass": false})"""
+    session = sessions.get(session_id)
+    if not session:
+        return jsonify({'error': 'Session nicht gefunden'}), 404
+    session['cache_bypass'] = bool((request.json or {}).get('bypass', True))
+    sessions.save(session)
+    return jsonify({'session_id': session_id, 'cache_bypass': session['cache_bypass']})
+
+@app.route('/api/context-stats')
+def context_stats():
+    """Token-Schätzung vorher/nachher gesamt und pro Session"""
+    if not context_manager:
+        return jsonify({'enabled': False})
+    return jsonify({
+        'enabled': True,
+        **context_manager.metrics(),
+        'sessions': {sid: context_manager.session_stats(s) for sid, s in sessions.cached().items()}
+    })
+
+def deep_sizeof(obj, seen=None):
+    """Speicherbedarf inkl. verschachtelter Dicts/Listen (Näherung über sys.getsizeof)"""
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    else:
+        # __slots__-Objekte (models.Session, Message, PhaseProgress)
+        size += sum(deep_sizeof(getattr(obj, name), seen) for cls in type(obj).__mro__
+                    for name in cls.__dict__.get('__slots__', ()) if hasattr(obj, name))
+    return size
+
+@app.route('/api/stats')
+def app_stats():
+    """Session-Anzahl und Speicherbedarf der Sessions im Speicher (für Lasttests)"""
+    store = sessions.metrics()
     return jsonify({
-        'response': ai_response,
-        'progress': progress_data
+        'sessions': store['sessions'],
+        'messages': store.get('messages', store.get('hot_messages')),
+        'sessions_bytes': deep_sizeof(sessions.cached()),
+        'session_store': store,
+        'transcript_log': transcript_log.metrics() if transcript_log else None,
+        'jobs': ai_jobs.metrics(),
+        'runs': {k: v for k, v in run_waiter.stats().items() if k != 'recent'},
+        'thread_pool': thread_pool.metrics(),
+        'context': context_manager.metrics() if context_manager else None,
+        'cache': response_cache.metrics() if response_cache else None,
+        'email_batch': email_batches[-1] if email_batches else None,
+        'rate_limit': rate_limiter.levels(),
+        'openai_client': client_settings(),
+        'circuit': ai_breaker.metrics(),
+        'deferred_turns': len(deferred_turns),
+        'turns': turn_scheduler.metrics(),
+        'hedging': hedge_policy.metrics() if hedge_policy else None,
+        'usage': usage_tracker.report(top_sessions=0)['total'],
+        'shared': shared_state.counters() if shared_state else None,
+        'abandoned_turns': {
+            'total': len(abandoned_turns),
+            'by_reason': {reason: sum(1 for t in abandoned_turns if t['reason'] == reason)
+                          for reason in {t['reason'] for t in abandoned_turns}},
+            'recent': list(abandoned_turns)[-10:]
+        }
     })
 
 @app.route("/dashboard")
 def dashboard():
+    breaker = ai_breaker.metrics()
+    breaker_colors = {'closed': '#e8f5e8', 'half_open': '#fff3cd', 'open': '#f8d7da'}
+    breaker_labels = {'closed': '✅ Geschlossen (normal)', 'half_open': '🟡 Halb offen (Probe läuft)',
+                      'open': f"🔴 Offen - Ersatzantworten, nächste Probe in {breaker['retry_in']}s"}
+    usage = usage_tracker.report(top_sessions=0)
+    today = usage['by_day'].get(datetime.now().date().isoformat(), {'total_tokens': 0, 'cost_usd': 0})
+    usage_rows = ''.join(
+        f"<tr><td>{'Phase ' + str(key) if group == 'by_phase' else key}</td><td>{u['runs']}</td><td>{u['cached']}</td>"
+        f"<td>{u['total_tokens']:,}</td><td>{u['avg_tokens']:,}</td><td>{u['avg_latency_s']}s</td><td>${u['cost_usd']:.4f}</td></tr>"
+        for group in ('by_phase', 'by_channel') for key, u in usage[group].items()
+    )
+    hot_sessions = sessions.cached()  # nur was im Speicher liegt - ausgelagerte Sessions nicht alle nachladen
+    session_usage = {sid: usage_tracker.session_usage(sid) for sid in hot_sessions}
     return f'''<!DOCTYPE html>
 <html>
 <head><title>Coach Dashboard</title></head>
 <body style="font-family: Arial; padding: 40px; background: #f8f9fa;">
     <div style="max-width: 1000px; margin: 0 auto;">
         <h1>📊 Coach Dashboard</h1>
-        <p>Aktive Sessions: {len(sessions)}</p>
+        <p>Aktive Sessions: {len(hot_sessions)} im Speicher, {len(sessions)} gesamt</p>
+        
+        <div style="background: {breaker_colors[breaker['state']]}; padding: 20px; border-radius: 15px; margin: 20px 0;">
+            <h3>🔌 OpenAI Circuit Breaker</h3>
+            <p><strong>Status:</strong> {breaker_labels[breaker['state']]} (seit {breaker['since']})</p>
+            <p><strong>Auslösungen:</strong> {breaker['trips']} | <strong>Abgelehnt:</strong> {breaker['rejected']} | <strong>Erholungen:</strong> {breaker['recoveries']}</p>
+            <p><strong>Fehlerquote (Fenster):</strong> {breaker['window_failure_rate']:.0%} | <strong>Ø Dauer:</strong> {breaker['window_avg_s']}s</p>
+            {f"<p><strong>Letzte Auslösung:</strong> {breaker['last_trip']['time']} - {breaker['last_trip']['reason']}</p>" if breaker['last_trip'] else ''}
+            <p><strong>Vorgemerkte Turns:</strong> {len(deferred_turns)}</p>
+        </div>
+        
+        <div style="background: white; padding: 20px; border-radius: 15px; margin: 20px 0;">
+            <h3>💰 Token-Verbrauch</h3>
+            <p><strong>Gesamt:</strong> {usage['total']['total_tokens']:,} Tokens (${usage['total']['cost_usd']:.4f}) in {usage['total']['runs']} Runs | <strong>Cache-Treffer:</strong> {usage['total']['cached']} | <strong>Heute:</strong> {today['total_tokens']:,} Tokens (${today['cost_usd']:.4f})</p>
+            <table style="width: 100%; border-collapse: collapse; text-align: left;">
+                <tr><th></th><th>Runs</th><th>Cache</th><th>Tokens</th><th>Ø Tokens</th><th>Ø Dauer</th><th>Kosten</th></tr>
+                {usage_rows}
+            </table>
+        </div>
         
         <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 20px; margin: 20px 0;">
             {chr(10).join([f'''
@@ -1092,11 +2475,13 @@ def dashboard():
                 <h4>Session {s['id']}</h4>
                 <p>Phase: {s['current_phase']}/5</p>
                 <p>Fortschritt: {s['total_progress']:.1f}%</p>
+                <p><a href="/api/sessions/{s['id']}/transcript?format=text">📜 Transkript</a></p>
+                {f"<p>Tokens: {session_usage[s['id']]['total_tokens']:,} (${session_usage[s['id']]['cost_usd']:.4f})</p>" if session_usage.get(s['id']) else ''}
                 <div style="width: 100%; height: 8px; background: #e9ecef; border-radius: 4px; overflow: hidden;">
                     <div style="width: {s['total_progress']}%; height: 100%; background: #28a745; border-radius: 4px;"></div>
                 </div>
             </div>
-            ''' for s in sessions.values()])}
+            ''' for s in hot_sessions.values()])}
         </div>
         
         <a href="/" style="background: #007bff; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">← Zurück</a>
@@ -1114,6 +2499,7 @@ if __name__ == "__main__":
     print("  ✅ Intelligente Phasenübergänge")
     print("🌐 http://localhost:8080")
     start_email_monitor()
+    thread_pool.start()
     app.run(port=8080, debug=True)
 
 # E-Mail Integration hinzufügen
@@ -1134,8 +2520,19 @@ EMAIL_CONFIG = {
     'imap_port': 993
 }
 
-def send_coaching_email(to_email, subject, message, session_link=None):
-    """Sendet professionelle Coaching-E-Mail"""
+# Rückstau an ungelesenen E-Mails: so viele AI-Antworten parallel, Versand danach gesammelt
+EMAIL_BATCH_CONCURRENCY = int(os.getenv('EMAIL_BATCH_CONCURRENCY', 4))
+email_batches = deque(maxlen=50)
+
+def smtp_connect():
+    """Angemeldete SMTP-Verbindung (mit `with` nutzen)"""
+    server = smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'])
+    server.starttls()
+    server.login(EMAIL_CONFIG['address'], EMAIL_CONFIG['password'])
+    return server
+
+def send_coaching_email(to_email, subject, message, session_link=None, server=None):
+    """Sendet professionelle Coaching-E-Mail (über `server`, falls schon eine Verbindung offen ist)"""
     try:
         msg = EmailMessage()
         msg['From'] = EMAIL_CONFIG['address']
@@ -1206,10 +2603,11 @@ coaching.allenspach-coaching.ch
         msg.add_alternative(html_content, subtype='html')
         
         # E-Mail senden
-        with smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port']) as server:
-            server.starttls()
-            server.login(EMAIL_CONFIG['address'], EMAIL_CONFIG['password'])
+        if server:
             server.send_message(msg)
+        else:
+            with smtp_connect() as server:
+                server.send_message(msg)
             
         print(f"📧 E-Mail gesendet an: {to_email}")
         return True
@@ -1218,6 +2616,17 @@ coaching.allenspach-coaching.ch
         print(f"❌ E-Mail Fehler: {e}")
         return False
 
+def send_coaching_emails(replies):
+    """Mehrere E-Mails über eine SMTP-Verbindung - replies: (to_email, subject, message, session_link)"""
+    sent = []
+    try:
+        with smtp_connect() as server:
+            for reply in replies:
+                sent.append(send_coaching_email(*reply, server=server))
+    except Exception as e:
+        print(f"❌ SMTP-Verbindung Fehler: {e}")
+    return sent + [False] * (len(replies) - len(sent))
+
 def check_email_inbox():
     """Überwacht E-Mail-Posteingang und antwortet automatisch"""
     try:
@@ -1226,45 +2635,84 @@ def check_email_inbox():
             mail.select('INBOX')
             
             # Ungelesene E-Mails suchen
-            status, messages = mail.search(None, 'UNSEEN')
-            
-            if messages[0]:
-                for msg_id in messages[0].split():
-                    status, msg_data = mail.fetch(msg_id, '(RFC822)')
-                    
-                    for response_part in msg_data:
-                        if isinstance(response_part, tuple):
-                            msg = email.message_from_bytes(response_part[1])
-                            
-                            sender_email = msg['From']
-                            subject = msg['Subject'] or "Coaching Anfrage"
-                            
-                            # E-Mail Inhalt extrahieren
-                            body = ""
-                            if msg.is_multipart():
-                                for part in msg.walk():
-                                    if part.get_content_type() == "text/plain":
-                                        payload = part.get_payload(decode=True)
-                                        if payload:
-                                            body = payload.decode('utf-8', errors='ignore')
-                            else:
-                                payload = msg.get_payload(decode=True)
-                                if payload:
-                                    body = payload.decode('utf-8', errors='ignore')
-                            
-                            if body.strip():
-                                # Neue Coaching-Session erstellen
-                                session_id = create_session()
-                                
-                                # AI-Response generieren
-                                session = sessions[session_id]
-                                ai_response = get_ai_response(session['thread_id'], body, session)
-                                
-                                # Session-Link erstellen
-                                session_link = f"http://localhost:8080/coaching-session/{session_id}"
-                                
-                                # Professionelle E-Mail-Antwort
-                                email_response = f"""
+            inquiries = fetch_unseen_inquiries(mail)
+            if inquiries:
+                answer_email_backlog(mail, inquiries)
+                        
+    except Exception as e:
+        print(f"📧 E-Mail Check Fehler: {e}")
+
+def fetch_unseen_inquiries(mail):
+    """Alle ungelesenen E-Mails als Anfragen: msg_id, Absender, Betreff, Text
+
+    BODY.PEEK[] statt RFC822: RFC822 setzt \\Seen schon beim Abholen (RFC 3501), abgebrochene oder
+    fehlgeschlagene Anfragen wären dann verloren. \\Seen setzt answer_email_backlog erst nach dem Versand.
+    """
+    inquiries = []
+    status, messages = mail.search(None, 'UNSEEN')
+    
+    for msg_id in (messages[0].split() if messages[0] else []):
+        status, msg_data = mail.fetch(msg_id, '(BODY.PEEK[])')
+        
+        for response_part in msg_data:
+            if isinstance(response_part, tuple):
+                msg = email.message_from_bytes(response_part[1])
+                
+                # E-Mail Inhalt extrahieren
+                body = ""
+                if msg.is_multipart():
+                    for part in msg.walk():
+                        if part.get_content_type() == "text/plain":
+                            payload = part.get_payload(decode=True)
+                            if payload:
+                                body = payload.decode('utf-8', errors='ignore')
+                else:
+                    payload = msg.get_payload(decode=True)
+                    if payload:
+                        body = payload.decode('utf-8', errors='ignore')
+                
+                inquiries.append({
+                    'msg_id': msg_id,
+                    'sender': msg['From'],
+                    'subject': msg['Subject'] or "Coaching Anfrage",
+                    'body': body
+                })
+    return inquiries
+
+def answer_email_inquiry(inquiry):
+    """Neue Coaching-Session mit AI-Antwort für eine E-Mail - läuft parallel in den Batch-Workern"""
+    session_id = create_session()
+    session = sessions[session_id]
+    try:
+        with usage_tracker.channel('email'):
+            ai_response = get_ai_response(session['thread_id'], inquiry['body'], session, cancel=email_monitor_stop)
+    except RunCancelled:
+        # Shutdown: E-Mail bleibt ungelesen und wird beim nächsten Start beantwortet
+        record_abandoned(session, inquiry['body'], 'shutdown')
+        return None
+    return session, ai_response
+
+def answer_email_backlog(mail, inquiries):
+    """AI-Antworten parallel erzeugen (höchstens EMAIL_BATCH_CONCURRENCY), dann gesammelt versenden"""
+    started = time.monotonic()
+    results, stats = run_parallel(answer_email_inquiry, [i for i in inquiries if i['body'].strip()],
+                                  concurrency=EMAIL_BATCH_CONCURRENCY, cancel=email_monitor_stop)
+    ai_done = time.monotonic()
+
+    answered, replies = [], []
+    for result in results:
+        if result['error'] or not result['result']:
+            if result['error'] and result['error'] != 'cancelled':
+                print(f"📧 Anfrage von {result['item']['sender']} fehlgeschlagen: {result['error']}")
+            continue
+        inquiry = result['item']
+        session, ai_response = result['result']
+        
+        # Session-Link erstellen
+        session_link = f"http://localhost:8080/coaching-session/{session['id']}"
+        
+        # Professionelle E-Mail-Antwort
+        email_response = f"""
 Herzlich willkommen zum intelligenten Ruhestandscoaching!
 
 Vielen Dank für Ihre Nachricht. Ich habe Ihre Anfrage gelesen und eine erste Antwort für Sie vorbereitet:
@@ -1272,43 +2720,88 @@ Vielen Dank für Ihre Nachricht. Ich habe Ihre Anfrage gelesen und eine erste An
 {ai_response}
 
 Für ein vollständiges, interaktives Coaching-Erlebnis mit automatischem Phase-Tracking und Echtzeit-Fortschrittsanzeige nutzen Sie bitte den Link unten. Dort führe ich Sie strukturiert durch unser bewährtes 8-Aufträge-System.
-                                """
-                                
-                                # E-Mail senden
-                                response_subject = f"Re: {subject} - Ihr intelligenter Coaching-Assistent"
-                                send_coaching_email(sender_email, response_subject, email_response, session_link)
-                                
-                                # Session-Info speichern
-                                session['email'] = sender_email
-                                session['initial_message'] = body
-                                
-                                print(f"🎯 Neue Coaching-Session erstellt: {session_id} für {sender_email}")
-                            
-                            # Als gelesen markieren
-                            mail.store(msg_id, '+FLAGS', '\\Seen')
-                        
-    except Exception as e:
-        print(f"📧 E-Mail Check Fehler: {e}")
+        """
+        
+        response_subject = f"Re: {inquiry['subject']} - Ihr intelligenter Coaching-Assistent"
+        replies.append((inquiry['sender'], response_subject, email_response, session_link))
+        answered.append((inquiry, session))
+
+    # E-Mails senden - eine SMTP-Verbindung für den ganzen Rückstau
+    sent = send_coaching_emails(replies)
+
+    for inquiry, session in answered:
+        # Session-Info speichern
+        session['email'] = inquiry['sender']
+        session['initial_message'] = inquiry['body']
+        sessions.save(session)
+        print(f"🎯 Neue Coaching-Session erstellt: {session['id']} für {inquiry['sender']}")
+
+    # Als gelesen markieren: beantwortete und versendete sowie leere E-Mails. Abgebrochene, fehlgeschlagene
+    # und nicht versendete bleiben ungelesen und kommen beim nächsten Durchlauf wieder
+    delivered = [inquiry for (inquiry, _), ok in zip(answered, sent) if ok]
+    for inquiry in delivered + [i for i in inquiries if not i['body'].strip()]:
+        mail.store(inquiry['msg_id'], '+FLAGS', '\\Seen')
+
+    total = time.monotonic() - started
+    batch = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'emails': len(inquiries),
+        'answered': len(answered),
+        'sent': sum(sent),
+        'failed': stats['failed'],
+        'cancelled': stats['cancelled'],
+        'concurrency': stats['concurrency'],
+        'ai_s': round(ai_done - started, 2),
+        'send_s': round(total - (ai_done - started), 2),
+        'total_s': round(total, 2),
+        'per_minute': round(len(answered) / total * 60, 1) if total else 0.0
+    }
+    email_batches.append(batch)
+    print(f"📬 {batch['answered']}/{batch['emails']} E-Mails beantwortet in {batch['total_s']}s "
+          f"({batch['per_minute']}/min, {batch['concurrency']} parallel)")
+    return batch
+
+# Gesetzt beim Herunterfahren: beendet den Monitor und bricht laufende E-Mail-Runs ab
+email_monitor_stop = threading.Event()
+email_monitor_thread = None
+EMAIL_SHUTDOWN_TIMEOUT = float(os.getenv('EMAIL_SHUTDOWN_TIMEOUT', 15))
 
 def start_email_monitor():
     """Startet E-Mail-Überwachung im Hintergrund"""
     def monitor():
         print("📧 E-Mail Monitor gestartet...")
-        while True:
+        while not email_monitor_stop.is_set():
             try:
                 if EMAIL_CONFIG['password']:
                     check_email_inbox()
-                    time.sleep(60)  # Alle 60 Sekunden prüfen
+                    email_monitor_stop.wait(60)  # Alle 60 Sekunden prüfen
                 else:
                     print("⚠️ E-Mail-Password nicht gesetzt - Monitor wartet...")
-                    time.sleep(300)  # 5 Minuten warten
+                    email_monitor_stop.wait(300)  # 5 Minuten warten
             except Exception as e:
                 print(f"📧 Monitor Fehler: {e}")
-                time.sleep(120)  # 2 Minuten bei Fehler
+                email_monitor_stop.wait(120)  # 2 Minuten bei Fehler
+        print("📧 E-Mail Monitor beendet")
     
-    thread = threading.Thread(target=monitor)
-    thread.daemon = True
-    thread.start()
+    global email_monitor_thread
+    email_monitor_stop.clear()
+    # E-Mail-Runs laufen in der Batch-Spur und lassen interaktiven Chats den Vortritt
+    email_monitor_thread = threading.Thread(target=in_lane('batch', monitor), name='email-monitor')
+    email_monitor_thread.daemon = True
+    email_monitor_thread.start()
+
+def stop_email_monitor():
+    """E-Mail-Monitor stoppen und warten (höchstens EMAIL_SHUTDOWN_TIMEOUT), bis Monitor und Batch-Worker
+    ihre Runs abgebrochen haben - sonst endet der Interpreter, bevor runs.cancel gesendet ist"""
+    email_monitor_stop.set()
+    deadline = time.monotonic() + EMAIL_SHUTDOWN_TIMEOUT
+    if email_monitor_thread is not None:
+        email_monitor_thread.join(EMAIL_SHUTDOWN_TIMEOUT)
+    still_running = join_workers(max(0.0, deadline - time.monotonic()))
+    if still_running or (email_monitor_thread is not None and email_monitor_thread.is_alive()):
+        print(f"⚠️ E-Mail-Monitor nach {EMAIL_SHUTDOWN_TIMEOUT}s nicht beendet ({still_running} Worker laufen noch)")
+
+on_shutdown('email_monitor', stop_email_monitor)
 
 # E-Mail-spezifische Route
 @app.route("/coaching-session/<session_id>")
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Gesprächskontext begrenzen: die letzten K Turns wörtlich, ältere Turns als laufende Zusammenfassung pro Phase
+
+Die Zusammenfassung wird inkrementell in einem Hintergrund-Thread nachgeführt; bis sie fertig ist,
+bleiben die noch nicht zusammengefassten Turns wörtlich im Kontext (es geht nichts verloren).
+Der Zustand liegt in session['context'], die Token-Schätzungen vorher/nachher ebenfalls. Mit `save`
+(z.B. sessions.save) wird die Session nach jeder Zusammenfassung gespeichert - sonst ginge sie bei einem
+Neustart oder in einem anderen Worker verloren.
+"""
+import queue
+import threading
+import time
+
+SUMMARY_PROMPT = ("Fasse den Verlauf eines Ruhestandscoachings knapp auf Deutsch zusammen. "
+                  "Behalte Lernstil, Ausgangssituation, Gefühle, Ziele und vereinbarte Schritte. "
+                  "Höchstens 8 Sätze, keine Anrede.")
+
+
+def estimate_tokens(text):
+    """Grobe Token-Schätzung (ca. 4 Zeichen pro Token)"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def chat_summarizer(client, model, max_tokens=300, on_usage=None):
+    """Zusammenfassung per Chat Completions: (bisherige Zusammenfassung, neue Turns, Phase) -> Text
+
+    on_usage(phase, usage) erhält die Token-Usage jeder Zusammenfassung.
+    """
+    def summarize(previous, turns_text, phase):
+        started = time.monotonic()
+        completion = client.chat.completions.create(
+            model=model,
+            max_tokens=max_tokens,
+            messages=[
+                {'role': 'system', 'content': SUMMARY_PROMPT},
+                {'role': 'user', 'content': f"Bisherige Zusammenfassung Phase {phase}:\n{previous or '-'}\n\n"
+                                            f"Neue Turns:\n{turns_text}"}
+            ]
+        )
+        if on_usage and completion.usage:
+            on_usage(phase, {'model': completion.model, 'prompt_tokens': completion.usage.prompt_tokens,
+                             'completion_tokens': completion.usage.completion_tokens,
+                             'seconds': round(time.monotonic() - started, 3)})
+        return completion.choices[0].message.content
+    return summarize
+
+
+class ContextManager:
+    """Kontext pro Session aufbauen und ältere Turns im Hintergrund zusammenfassen"""
+
+    def __init__(self, summarize, keep_turns=4, batch_turns=2, fields=('sender', 'message'), save=None):
+        self.summarize = summarize  # (previous, turns_text, phase) -> summary
+        self.save = save  # (session) -> None, nach erfolgreicher Zusammenfassung
+        self.keep_turns = keep_turns
+        self.batch_turns = max(1, batch_turns)
+        self.role_field, self.text_field = fields
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._stats = {'summaries': 0, 'errors': 0, 'turns_summarized': 0,
+                       'tokens_full': 0, 'tokens_sent': 0}
+        self._summary_time = 0.0
+
+    def state(self, session):
+        return session.setdefault('context', {'summaries': {}, 'summarized': 0,
+                                              'tokens_full': 0, 'tokens_sent': 0})
+
+    def build(self, session, message=''):
+        """(Zusammenfassung, Verlauf) für den nächsten Turn; zählt die Tokens vorher/nachher"""
+        state = self.state(session)
+        history = session['messages']
+        recent = history[state['summarized']:]
+        summary = self.render_summary(session)
+
+        full = sum(estimate_tokens(m[self.text_field]) for m in history) + estimate_tokens(message)
+        sent = (estimate_tokens(summary) + sum(estimate_tokens(m[self.text_field]) for m in recent)
+                + estimate_tokens(message))
+        state['tokens_full'] += full
+        state['tokens_sent'] += sent
+        with self._lock:
+            self._stats['tokens_full'] += full
+            self._stats['tokens_sent'] += sent
+        return summary, recent
+
+    def render_summary(self, session):
+        summaries = self.state(session)['summaries']
+        if not summaries:
+            return ''
+        return "Zusammenfassung der bisherigen Turns:\n" + '\n'.join(
+            f"Phase {phase}: {text}" for phase, text in sorted(summaries.items()))
+
+    def render_turns(self, messages):
+        """Turns als lesbarer Text statt roher Dicts"""
+        return '\n'.join(f"{'Coach' if m[self.role_field] == 'assistant' else 'Coachee'}: {m[self.text_field]}"
+                         for m in messages)
+
+    def after_turn(self, session):
+        """Nach dem Speichern eines Turns: Zusammenfassung anstossen, sobald genug alte Turns anstehen"""
+        state = self.state(session)
+        overflow = len(session['messages']) - state['summarized'] - 2 * self.keep_turns
+        if overflow < 2 * self.batch_turns:
+            return
+        with self._lock:
+            if id(session) in self._pending:
+                return
+            self._pending.add(id(session))
+        self._start()
+        self._queue.put(session)
+
+    def session_stats(self, session):
+        state = self.state(session)
+        return {
+            'tokens_full': state['tokens_full'],
+            'tokens_sent': state['tokens_sent'],
+            'tokens_saved': state['tokens_full'] - state['tokens_sent'],
+            'summarized_messages': state['summarized'],
+            'summary_phases': sorted(state['summaries'])
+        }
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            summary_time = self._summary_time
+            pending = len(self._pending)
+        return {
+            'keep_turns': self.keep_turns,
+            'pending': pending,
+            **stats,
+            'tokens_saved': stats['tokens_full'] - stats['tokens_sent'],
+            'savings_rate': round(1 - stats['tokens_sent'] / stats['tokens_full'], 3) if stats['tokens_full'] else 0,
+            'summary_avg_ms': round(summary_time / stats['summaries'] * 1000, 1) if stats['summaries'] else 0
+        }
+
+    def _start(self):
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._worker = threading.Thread(target=self._run, name='context-summarizer')
+            self._worker.daemon = True
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            session = self._queue.get()
+            try:
+                self._summarize(session)
+            except Exception as e:
+                with self._lock:
+                    self._stats['errors'] += 1
+                print(f"⚠️ Zusammenfassung für Session {session.get('id', '?')} fehlgeschlagen: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(id(session))
+
+    def _summarize(self, session):
+        state = self.state(session)
+        start = state['summarized']
+        end = len(session['messages']) - 2 * self.keep_turns
+        if end - start < 2 * self.batch_turns:
+            return
+
+        # Nach Phase gruppieren, damit jede Phase ihre eigene Zusammenfassung behält
+        groups = {}
+        for m in session['messages'][start:end]:
+            groups.setdefault(m.get('phase', session.get('current_phase', 1)), []).append(m)
+
+        started = time.monotonic()
+        summaries = dict(state['summaries'])
+        for phase, messages in groups.items():
+            summaries[phase] = self.summarize(summaries.get(phase), self.render_turns(messages), phase)
+
+        # Erst nach Erfolg übernehmen - bei Fehlern bleiben die Turns wörtlich im Kontext
+        state['summaries'] = summaries
+        state['summarized'] = end
+        if self.save:
+            self.save(session)
+        with self._lock:
+            self._stats['summaries'] += 1
+            self._stats['turns_summarized'] += (end - start) // 2
+            self._summary_time += time.monotonic() - started
@@ -0,0 +1,624 @@
+#!/usr/bin/env python3
+"""Lokale Nachbildung der OpenAI Assistants-API (Threads, Messages, Runs) für Benchmarks ohne Netzwerk
+
+Zusätzlich /v1/chat/completions (auch gestreamt) für das Chat-Completions-Backend.
+
+Die App lässt sich per OPENAI_BASE_URL auf den Server zeigen:
+
+    python fake_assistants.py --port 8765 --queued uniform:0.2,1 --in-progress lognormal:2,0.4
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake ASSISTANT_ID=asst_fake python app.py
+
+Verteilungen: fixed:S, uniform:A,B, normal:MU,SD, lognormal:MEDIAN,SIGMA (alles in Sekunden).
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+COACHING_REPLIES = [
+    "Danke, dass du das mit mir teilst. Lass uns mit deinem Lernstil beginnen: "
+    "Lernst du eher «visuell», «auditiv» oder «kinästhetisch»?",
+    "Das klingt nach einem wichtigen Punkt in deiner Ausgangssituation. "
+    "Was ist dein grösster Herzenswunsch für die Zeit nach der Pensionierung?",
+    "Ich höre viele Gefühle in deinen Worten. Welche Emotionen tauchen auf, "
+    "wenn du an den letzten Arbeitstag denkst?",
+    "Schauen wir auf dein inneres Team: Welche Stimmen melden sich, wenn du über den Ruhestand nachdenkst?",
+    "Stell dir vor, es ist ein Jahr später und alles ist gelungen. Wie sieht deine Vision aus - "
+    "und welche ersten Schritte führen dorthin?"
+]
+
+# Vorlagen mit Platzhaltern: {phase} aus dem Kontext, {topic} aus der letzten User-Nachricht
+REPLY_TEMPLATES = [
+    "Du sprichst «{topic}» an - danke für deine Offenheit. Wir sind in Phase {phase}/5. "
+    "Was bedeutet das für deinen Ruhestand?",
+    "«{topic}» - lass uns da genauer hinschauen. Welche Gefühle verbindest du damit?",
+    "Gut, dass du «{topic}» erwähnst. Für Phase {phase} ist das ein wichtiger Baustein. "
+    "Welcher nächste Schritt wäre für dich stimmig?"
+]
+
+
+def _new_id(prefix):
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+
+def estimate_tokens(text):
+    """Grobe Token-Schätzung (ca. 4 Zeichen pro Token)"""
+    return max(1, len(text) // 4) if text else 0
+
+
+class Distribution:
+    """Zufallsverteilung aus einer Kurzschreibweise wie 'uniform:0.2,1.0'"""
+
+    def __init__(self, spec):
+        self.spec = str(spec)
+        kind, _, params = self.spec.partition(':')
+        if not params:
+            kind, params = 'fixed', kind
+        self.kind = kind
+        self.params = [float(p) for p in params.split(',')]
+
+    def sample(self):
+        if self.kind == 'fixed':
+            return self.params[0]
+        if self.kind == 'uniform':
+            return random.uniform(*self.params)
+        if self.kind == 'normal':
+            return max(0.0, random.gauss(*self.params))
+        if self.kind == 'lognormal':
+            median, sigma = self.params
+            return random.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        if self.kind == 'tail':
+            # Meist lognormal um den Median, mit Wahrscheinlichkeit p ein Ausreisser um `slow` (p99-Tests)
+            median, p, slow = self.params
+            if random.random() < p:
+                return random.uniform(0.8 * slow, 1.2 * slow)
+            return random.lognormvariate(math.log(median), 0.4)
+        raise ValueError(f"Unbekannte Verteilung: {self.spec}")
+
+    def __repr__(self):
+        return self.spec
+
+
+class FakeAssistants:
+    """In-Memory-Zustand mit denselben Objekt-Formen wie die echte API
+
+    Runs durchlaufen queued -> in_progress -> completed anhand der konfigurierten Dauern;
+    der Status wird beim Abruf aus den Zeitstempeln berechnet.
+    """
+
+    def __init__(self, replies=None, templates=None, queued='fixed:0', in_progress='fixed:0',
+                 failure_rate=0.0, model='gpt-4o-mini-fake'):
+        self.replies = replies or COACHING_REPLIES
+        self.templates = templates if templates is not None else []
+        self.queued = Distribution(queued)
+        self.in_progress = Distribution(in_progress)
+        self.failure_rate = failure_rate
+        self.model = model
+        self.threads = {}
+        self.messages = {}  # thread_id -> Liste in Erstellungsreihenfolge
+        self.run_messages = {}  # run_id -> Messages dieses Runs
+        self.runs = {}
+        self.active_runs = {}  # thread_id -> run_id des laufenden Runs
+        self.streaming = set()  # run_ids, deren Antwort gerade gestreamt wird (noch abbrechbar)
+        self._schedule = {}  # run_id -> (start_at, done_at, fails)
+        self._lock = threading.RLock()
+
+    # ---------- Threads ----------
+
+    def create_thread(self):
+        thread = {'id': _new_id('thread'), 'object': 'thread', 'created_at': int(time.time()),
+                  'metadata': {}, 'tool_resources': {}}
+        with self._lock:
+            self.threads[thread['id']] = thread
+            self.messages[thread['id']] = []
+        return thread
+
+    def delete_thread(self, thread_id):
+        with self._lock:
+            existed = self.threads.pop(thread_id, None) is not None
+            self.messages.pop(thread_id, None)
+            self.active_runs.pop(thread_id, None)
+        return {'id': thread_id, 'object': 'thread.deleted', 'deleted': existed}
+
+    # ---------- Messages ----------
+
+    def create_message(self, thread_id, role, content, run_id=None):
+        message = {
+            'id': _new_id('msg'),
+            'object': 'thread.message',
+            'created_at': int(time.time()),
+            'thread_id': thread_id,
+            'role': role,
+            'content': [{'type': 'text', 'text': {'value': content, 'annotations': []}}],
+            'assistant_id': 'asst_fake' if role == 'assistant' else None,
+            'run_id': run_id,
+            'attachments': [],
+            'metadata': {},
+            'status': 'completed'
+        }
+        with self._lock:
+            if run_id is None and thread_id in self.active_runs:
+                # Wie die echte API: keine User-Messages, solange ein Run läuft
+                self._advance(self.active_runs[thread_id])
+                if thread_id in self.active_runs:
+                    raise FakeAPIError(400, f"Can't add messages to {thread_id} while a run "
+                                            f"{self.active_runs[thread_id]} is active.")
+            self.messages[thread_id].append(message)
+            if run_id:
+                self.run_messages.setdefault(run_id, []).append(message)
+        return message
+
+    def list_messages(self, thread_id, limit=20, order='desc', after=None, run_id=None):
+        """Seitenweise Liste wie GET /threads/{id}/messages"""
+        with self._lock:
+            if thread_id in self.active_runs:
+                self._advance(self.active_runs[thread_id])
+            if run_id:
+                items = list(self.run_messages.get(run_id, []))
+            else:
+                items = list(self.messages[thread_id])
+
+        if order == 'desc':
+            items.reverse()
+        if after:
+            ids = [m['id'] for m in items]
+            items = items[ids.index(after) + 1:] if after in ids else []
+
+        page = items[:limit]
+        return {
+            'object': 'list',
+            'data': page,
+            'first_id': page[0]['id'] if page else None,
+            'last_id': page[-1]['id'] if page else None,
+            'has_more': len(items) > limit
+        }
+
+    # ---------- Runs ----------
+
+    def create_run(self, thread_id, assistant_id, instructions=None, additional_instructions=None,
+                   truncation_strategy=None):
+        """Run anlegen; ohne konfigurierte Dauern ist er sofort abgeschlossen"""
+        now = time.time()
+        run = {
+            'id': _new_id('run'),
+            'object': 'thread.run',
+            'created_at': int(now),
+            'thread_id': thread_id,
+            'assistant_id': assistant_id,
+            'status': 'queued',
+            'model': self.model,
+            'instructions': instructions or '',
+            'additional_instructions': additional_instructions,
+            'truncation_strategy': truncation_strategy or {'type': 'auto', 'last_messages': None},
+            'tools': [],
+            'last_error': None,
+            'started_at': None,
+            'completed_at': None,
+            'usage': None
+        }
+        start_at = now + self.queued.sample()
+        done_at = start_at + self.in_progress.sample()
+        fails = random.random() < self.failure_rate
+
+        with self._lock:
+            if thread_id not in self.threads:
+                raise FakeAPIError(404, f"No thread found with id '{thread_id}'.")
+            if thread_id in self.active_runs:
+                self._advance(self.active_runs[thread_id])
+            if thread_id in self.active_runs:
+                raise FakeAPIError(400, f"Thread {thread_id} already has an active run {self.active_runs[thread_id]}.")
+            self.runs[run['id']] = run
+            self.active_runs[thread_id] = run['id']
+            self._schedule[run['id']] = (start_at, done_at, fails)
+            self._advance(run['id'])
+            return dict(run)
+
+    def retrieve_run(self, thread_id, run_id):
+        with self._lock:
+            if run_id not in self.runs:
+                raise FakeAPIError(404, f"No run found with id '{run_id}'.")
+            self._advance(run_id)
+            return dict(self.runs[run_id])
+
+    def cancel_run(self, thread_id, run_id):
+        with self._lock:
+            self._advance(run_id)
+            run = self.runs[run_id]
+            if run['status'] in ('queued', 'in_progress') or run_id in self.streaming:
+                run['status'] = 'cancelled'
+                self.streaming.discard(run_id)
+                self._finish(run)
+            return dict(run)
+
+    def complete_run(self, run_id):
+        """Run sofort abschliessen (Streaming wartet die Dauer selbst ab)"""
+        with self._lock:
+            run = self.runs[run_id]
+            start_at, _, fails = self._schedule[run_id]
+            self._schedule[run_id] = (min(start_at, time.time()), time.time(), fails)
+            self._advance(run_id)
+            return dict(run)
+
+    def reply_for(self, run_id):
+        """Antworttext eines abgeschlossenen Runs"""
+        messages = self.run_messages.get(run_id, [])
+        return messages[-1]['content'][0]['text']['value'] if messages else ''
+
+    def _advance(self, run_id):
+        """Status aus den Zeitstempeln nachführen (Lock muss gehalten werden)"""
+        run = self.runs[run_id]
+        if run['status'] not in ('queued', 'in_progress'):
+            return
+        start_at, done_at, fails = self._schedule[run_id]
+        now = time.time()
+
+        if now >= start_at and run['status'] == 'queued':
+            run['status'] = 'in_progress'
+            run['started_at'] = int(start_at)
+        if now < done_at:
+            return
+
+        if fails:
+            run['status'] = 'failed'
+            run['last_error'] = {'code': 'server_error', 'message': 'Simulierter Fehler im Fake-Server'}
+        else:
+            thread_messages = self.messages.get(run['thread_id'], [])
+            last_user = next((m['content'][0]['text']['value'] for m in reversed(thread_messages)
+                              if m['role'] == 'user'), '')
+            reply = self._reply(run['additional_instructions'] or '', last_user)
+            self.create_message(run['thread_id'], 'assistant', reply, run_id=run_id)
+            # Prompt wie bei der echten API: bei last_messages nur die letzten N Thread-Messages
+            last = run['truncation_strategy'].get('last_messages')
+            prompt_messages = thread_messages[:-1][-last:] if last else thread_messages[:-1]
+            prompt = sum(estimate_tokens(m['content'][0]['text']['value']) for m in prompt_messages)
+            prompt += estimate_tokens(run['instructions']) + estimate_tokens(run['additional_instructions'])
+            completion = estimate_tokens(reply)
+            run['status'] = 'completed'
+            run['usage'] = {'prompt_tokens': prompt, 'completion_tokens': completion,
+                            'total_tokens': prompt + completion}
+        run['completed_at'] = int(now)
+        self._finish(run)
+
+    def _finish(self, run):
+        if self.active_runs.get(run['thread_id']) == run['id']:
+            del self.active_runs[run['thread_id']]
+
+    # ---------- Chat Completions ----------
+
+    def chat_completion(self, model, messages):
+        """Antwort und Usage für POST /chat/completions"""
+        last_user = next((m['content'] for m in reversed(messages) if m['role'] == 'user'), '')
+        system = '\n'.join(m['content'] for m in messages if m['role'] == 'system')
+        reply = self._reply(system, _text(last_user))
+        prompt = sum(estimate_tokens(_text(m['content'])) for m in messages)
+        completion = estimate_tokens(reply)
+        return reply, {'prompt_tokens': prompt, 'completion_tokens': completion, 'total_tokens': prompt + completion}
+
+    def _reply(self, instructions, last_user):
+        if not self.templates:
+            return random.choice(self.replies)
+
+        context = f"{instructions}\n{last_user}"
+        phase = re.search(r'Phase:?\s*(\d)', context)
+        user_text = last_user.split('USER:')[-1].strip()
+        topic = ' '.join(user_text.split()[:6]) or 'deinen Ruhestand'
+        return random.choice(self.templates).format(phase=phase.group(1) if phase else 1, topic=topic)
+
+
+class FakeAPIError(Exception):
+    """Fehler im Format der OpenAI-API"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class FakeAssistantsHandler(BaseHTTPRequestHandler):
+    """HTTP-Endpunkte unter /v1 wie bei api.openai.com"""
+
+    protocol_version = 'HTTP/1.1'  # Keep-Alive wie beim echten API-Server
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def setup(self):
+        super().setup()
+        # Verbindungsaufbau (TCP/TLS-Handshake) kostet einmal pro Verbindung, nicht pro Request
+        time.sleep(self.server.handshake.sample())
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _dispatch(self, method):
+        server = self.server
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}') if length else {}
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split('/') if p]
+        if parts[:1] == ['v1']:
+            parts = parts[1:]
+
+        server.count(method, parts)
+        time.sleep(server.latency.sample())
+
+        try:
+            if random.random() < server.error_rate and parts[:1] != ['fake']:
+                raise FakeAPIError(500, 'Simulierter Serverfehler')
+            result = self._route(method, parts, query, body)
+        except FakeAPIError as e:
+            return self._json({'error': {'message': str(e), 'type': 'invalid_request_error', 'code': None}}, e.status)
+        except (KeyError, ValueError) as e:
+            return self._json({'error': {'message': f'Ungültige Anfrage: {e}', 'type': 'invalid_request_error'}}, 400)
+
+        if result is not None:
+            self._json(result)
+
+    def _route(self, method, parts, query, body):
+        api = self.server.api
+        n = len(parts)
+
+        if parts == ['fake', 'stats'] and method == 'GET':
+            return self.server.stats()
+        if parts == ['fake', 'reset'] and method == 'POST':
+            self.server.reset_stats()
+            return {'ok': True}
+
+        if n == 1 and parts[0] == 'threads' and method == 'POST':
+            thread = api.create_thread()
+            for msg in body.get('messages') or []:
+                api.create_message(thread['id'], msg.get('role', 'user'), _text(msg.get('content')))
+            return thread
+        if n == 2 and parts[0] == 'threads':
+            if method == 'DELETE':
+                return api.delete_thread(parts[1])
+            if parts[1] in api.threads:
+                return api.threads[parts[1]]
+            raise FakeAPIError(404, f"No thread found with id '{parts[1]}'.")
+
+        if n == 3 and parts[0] == 'threads' and parts[2] == 'messages':
+            thread_id = parts[1]
+            if thread_id not in api.threads:
+                raise FakeAPIError(404, f"No thread found with id '{thread_id}'.")
+            if method == 'POST':
+                return api.create_message(thread_id, body.get('role', 'user'), _text(body.get('content')))
+            return api.list_messages(thread_id, limit=int(query.get('limit', 20)), order=query.get('order', 'desc'),
+                                     after=query.get('after'), run_id=query.get('run_id'))
+
+        if n == 3 and parts[0] == 'threads' and parts[2] == 'runs' and method == 'POST':
+            run = api.create_run(parts[1], body.get('assistant_id'), body.get('instructions'),
+                                 body.get('additional_instructions'), body.get('truncation_strategy'))
+            if body.get('stream'):
+                self._stream_run(run)
+                return None
+            return run
+        if parts == ['chat', 'completions'] and method == 'POST':
+            return self._chat_completion(body)
+        if n == 4 and parts[2] == 'runs' and method == 'GET':
+            return api.retrieve_run(parts[1], parts[3])
+        if n == 5 and parts[2] == 'runs' and parts[4] == 'cancel' and method == 'POST':
+            return api.cancel_run(parts[1], parts[3])
+
+        raise FakeAPIError(404, f"Unbekannter Endpunkt: {method} /{'/'.join(parts)}")
+
+    def _stream_run(self, run):
+        """Run als Server-Sent Events ausliefern, Antwort in Token-Häppchen"""
+        api = self.server.api
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def send(event, data):
+            payload = data if isinstance(data, str) else json.dumps(data)
+            self.wfile.write(f"event: {event}\ndata: {payload}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        try:
+            send('thread.run.created', run)
+            # Wartezeit bis zum ersten Token wie beim echten Run
+            _, done_at, fails = api._schedule[run['id']]
+            start_at = api._schedule[run['id']][0]
+            while time.time() < start_at:
+                time.sleep(min(0.05, max(0.0, start_at - time.time())))
+                if api.runs[run['id']]['status'] == 'cancelled':
+                    # In queued abgebrochen (runs.cancel) - wie bei OpenAI endet der Stream sofort
+                    send('thread.run.cancelled', api.runs[run['id']])
+                    send('done', '[DONE]')
+                    return
+            send('thread.run.in_progress', api.retrieve_run(run['thread_id'], run['id']))
+
+            if fails:
+                time.sleep(max(0.0, done_at - time.time()))
+                send('thread.run.failed', api.retrieve_run(run['thread_id'], run['id']))
+            else:
+                run = api.complete_run(run['id'])
+                reply = api.reply_for(run['id'])
+                message_id = api.run_messages[run['id']][-1]['id']
+                api.streaming.add(run['id'])
+                for index, chunk in enumerate(re.findall(r'\S+\s*', reply)):
+                    time.sleep(self.server.token_delay.sample())
+                    if api.runs[run['id']]['status'] == 'cancelled':
+                        # Während des Streams abgebrochen - keine weiteren Tokens
+                        send('thread.run.cancelled', api.runs[run['id']])
+                        send('done', '[DONE]')
+                        return
+                    send('thread.message.delta', {
+                        'id': message_id,
+                        'object': 'thread.message.delta',
+                        'delta': {'content': [{'index': 0, 'type': 'text', 'text': {'value': chunk, 'annotations': []}}]}
+                    })
+                api.streaming.discard(run['id'])
+                send('thread.message.completed', api.run_messages[run['id']][-1])
+                send('thread.run.completed', run)
+            send('done', '[DONE]')
+        except (BrokenPipeError, ConnectionResetError):
+            # Client hat die Verbindung getrennt - Run wie bei OpenAI abbrechen
+            api.cancel_run(run['thread_id'], run['id'])
+
+    def _chat_completion(self, body):
+        """Chat Completion, gestreamt als data-Events ohne Event-Namen wie bei OpenAI"""
+        api = self.server.api
+        model = body.get('model', api.model)
+        reply, usage = api.chat_completion(model, body.get('messages') or [])
+        completion_id = _new_id('chatcmpl')
+        created = int(time.time())
+
+        if not body.get('stream'):
+            # Gleiche Modell-Zeit wie ein Run (queued + in_progress), nur ohne Thread-Protokoll
+            time.sleep(api.queued.sample() + api.in_progress.sample())
+            return {
+                'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': reply}, 'finish_reason': 'stop'}],
+                'usage': usage
+            }
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def send(delta, finish_reason=None, extra=None):
+            chunk = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model,
+                     'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]}
+            chunk.update(extra or {})
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        try:
+            # Wartezeit bis zum ersten Token wie bei einem gestreamten Run
+            time.sleep(api.queued.sample())
+            send({'role': 'assistant', 'content': ''})
+            for chunk in re.findall(r'\S+\s*', reply):
+                time.sleep(self.server.token_delay.sample())
+                send({'content': chunk})
+            include_usage = (body.get('stream_options') or {}).get('include_usage')
+            send({}, 'stop')
+            if include_usage:
+                usage_chunk = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': created,
+                               'model': model, 'choices': [], 'usage': usage}
+                self.wfile.write(f"data: {json.dumps(usage_chunk)}\n\n".encode('utf-8'))
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        return None
+
+    def _json(self, data, status=200):
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class FakeAssistantsServer(ThreadingHTTPServer):
+    """HTTP-Server mit Latenz-/Fehlerinjektion und Request-Zählern"""
+
+    daemon_threads = True
+    request_queue_size = 128  # Listen-Backlog; der Default 5 setzt Verbindungen bei Bursts zurück
+
+    def __init__(self, address, api=None, latency='fixed:0', token_delay='fixed:0', handshake='fixed:0',
+                 error_rate=0.0, verbose=False):
+        super().__init__(address, FakeAssistantsHandler)
+        self.api = api or FakeAssistants()
+        self.latency = Distribution(latency)
+        self.handshake = Distribution(handshake)
+        self.token_delay = Distribution(token_delay)
+        self.error_rate = error_rate
+        self.verbose = verbose
+        self._counts = {}
+        self._connections = 0
+        self._counts_lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def process_request(self, request, client_address):
+        with self._counts_lock:
+            self._connections += 1
+        super().process_request(request, client_address)
+
+    def count(self, method, parts):
+        # IDs durch Platzhalter ersetzen, damit gleiche Endpunkte zusammengezählt werden
+        route = '/'.join('{id}' if '_' in p else p for p in parts)
+        key = f"{method} /{route}"
+        with self._counts_lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def stats(self):
+        with self._counts_lock:
+            return {'requests': dict(self._counts), 'total': sum(self._counts.values()),
+                    'connections': self._connections}
+
+    def reset_stats(self):
+        with self._counts_lock:
+            self._counts = {}
+            self._connections = 0
+
+
+def _text(content):
+    """Message-Inhalt als String (die API akzeptiert auch Content-Blöcke)"""
+    if isinstance(content, list):
+        return ''.join(block.get('text', '') for block in content if block.get('type') == 'text')
+    return content or ''
+
+
+def start_server(host='127.0.0.1', port=0, **options):
+    """Server im Hintergrund starten (port=0 wählt einen freien Port) - für Benchmarks"""
+    api_options = {k: options.pop(k) for k in ('replies', 'templates', 'queued', 'in_progress', 'failure_rate')
+                   if k in options}
+    server = FakeAssistantsServer((host, port), FakeAssistants(**api_options), **options)
+    thread = threading.Thread(target=server.serve_forever, name='fake-assistants')
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', default='lognormal:0.05,0.5', help='Netzwerk-/Server-Latenz pro Request')
+    parser.add_argument('--queued', default='uniform:0.1,0.8', help='Dauer im Status queued')
+    parser.add_argument('--in-progress', default='lognormal:2,0.4', help='Dauer im Status in_progress')
+    parser.add_argument('--token-delay', default='fixed:0.03', help='Pause zwischen Stream-Deltas')
+    parser.add_argument('--handshake', default='fixed:0', help='Verbindungsaufbau pro neuer Verbindung')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Anteil Runs mit Status failed')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Anteil Requests mit HTTP 500')
+    parser.add_argument('--templates', action='store_true', help='Antworten aus Vorlagen statt fester Texte')
+    parser.add_argument('--verbose', action='store_true', help='jeden Request loggen')
+    args = parser.parse_args()
+
+    api = FakeAssistants(templates=REPLY_TEMPLATES if args.templates else None, queued=args.queued,
+                         in_progress=args.in_progress, failure_rate=args.failure_rate)
+    server = FakeAssistantsServer((args.host, args.port), api, latency=args.latency,
+                                  token_delay=args.token_delay, handshake=args.handshake, error_rate=args.error_rate,
+                                  verbose=args.verbose)
+
+    print(f"🧪 Fake Assistants-API läuft: {server.base_url}")
+    print(f"⏱️ Latenz {args.latency} | queued {args.queued} | in_progress {args.in_progress} | Fehlerquote {args.failure_rate}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 Fake-Server beendet")
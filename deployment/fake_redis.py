@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""In-Memory-Stand-in für Redis (Teilmenge der redis-py-API) für lokale Tests und Benchmarks
+
+Deckt ab, was session_store.RedisSessionStore und shared_state.SharedState brauchen: Strings mit
+Ablaufzeit, Hashes, Listen, Sorted Sets und Pipelines mit WATCH/MULTI/EXEC. Wie bei Redis bricht
+execute() mit WatchError ab, wenn ein beobachteter Schlüssel seit watch() verändert wurde.
+Alle Werte kommen als str zurück (wie redis-py mit decode_responses=True).
+
+    client = FakeRedis()              # oder shared_state.connect('memory://')
+    with client.pipeline() as pipe:
+        pipe.watch('key')
+        ...
+"""
+import threading
+import time
+
+try:
+    from redis.exceptions import WatchError  # gleiche Exception wie mit echtem Redis
+except ImportError:
+    class WatchError(Exception):
+        """Beobachteter Schlüssel wurde vor EXEC verändert (wie redis.exceptions.WatchError)"""
+
+
+class FakeRedis:
+    def __init__(self):
+        self._data = {}
+        self._expires = {}  # key -> Zeitpunkt (time.time())
+        self._versions = {}  # key -> Schreibzähler für WATCH
+        self._lock = threading.RLock()
+
+    def ping(self):
+        return True
+
+    # ---------- Schlüssel ----------
+
+    def exists(self, *names):
+        with self._lock:
+            return sum(1 for name in names if self._alive(name))
+
+    def delete(self, *names):
+        with self._lock:
+            deleted = 0
+            for name in names:
+                if self._alive(name):
+                    deleted += 1
+                    self._data.pop(name)
+                    self._expires.pop(name, None)
+                    self._touch(name)
+            return deleted
+
+    def expire(self, name, seconds):
+        with self._lock:
+            if not self._alive(name):
+                return False
+            self._expires[name] = time.time() + seconds
+            return True
+
+    def scan_iter(self, match='*'):
+        prefix = match.rstrip('*')
+        with self._lock:
+            names = [name for name in list(self._data) if name.startswith(prefix) and self._alive(name)]
+        return iter(names)
+
+    # ---------- Strings ----------
+
+    def get(self, name):
+        with self._lock:
+            return self._data[name] if self._alive(name) else None
+
+    def set(self, name, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._alive(name):
+                return None
+            self._data[name] = str(value)
+            if ex:
+                self._expires[name] = time.time() + ex
+            else:
+                self._expires.pop(name, None)
+            self._touch(name)
+            return True
+
+    def incrby(self, name, amount=1):
+        with self._lock:
+            value = int(self.get(name) or 0) + amount
+            self._data[name] = str(value)
+            self._touch(name)
+            return value
+
+    def incr(self, name, amount=1):
+        return self.incrby(name, amount)
+
+    # ---------- Hashes ----------
+
+    def hget(self, name, key):
+        with self._lock:
+            return self._container(name, dict).get(key)
+
+    def hgetall(self, name):
+        with self._lock:
+            return dict(self._container(name, dict))
+
+    def hset(self, name, key=None, value=None, mapping=None):
+        with self._lock:
+            items = dict(mapping or {})
+            if key is not None:
+                items[key] = value
+            hash_ = self._container(name, dict, create=True)
+            added = sum(1 for k in items if k not in hash_)
+            hash_.update({k: str(v) for k, v in items.items()})
+            self._touch(name)
+            return added
+
+    def hincrby(self, name, key, amount=1):
+        with self._lock:
+            hash_ = self._container(name, dict, create=True)
+            hash_[key] = str(int(hash_.get(key, 0)) + amount)
+            self._touch(name)
+            return int(hash_[key])
+
+    def hincrbyfloat(self, name, key, amount=1.0):
+        with self._lock:
+            hash_ = self._container(name, dict, create=True)
+            hash_[key] = repr(float(hash_.get(key, 0)) + amount)
+            self._touch(name)
+            return float(hash_[key])
+
+    # ---------- Listen ----------
+
+    def rpush(self, name, *values):
+        with self._lock:
+            list_ = self._container(name, list, create=True)
+            list_.extend(str(v) for v in values)
+            self._touch(name)
+            return len(list_)
+
+    def lrange(self, name, start, end):
+        with self._lock:
+            list_ = self._container(name, list)
+            return list_[start:] if end == -1 else list_[start:end + 1]
+
+    def llen(self, name):
+        with self._lock:
+            return len(self._container(name, list))
+
+    # ---------- Sorted Sets ----------
+
+    def zadd(self, name, mapping, nx=False):
+        with self._lock:
+            zset = self._container(name, dict, create=True)
+            added = 0
+            for member, score in mapping.items():
+                if member not in zset:
+                    added += 1
+                elif nx:
+                    continue
+                zset[member] = float(score)
+            self._touch(name)
+            return added
+
+    def zrem(self, name, *members):
+        with self._lock:
+            zset = self._container(name, dict)
+            removed = sum(1 for member in members if zset.pop(member, None) is not None)
+            self._touch(name)
+            return removed
+
+    def zcard(self, name):
+        with self._lock:
+            return len(self._container(name, dict))
+
+    def zscore(self, name, member):
+        with self._lock:
+            return self._container(name, dict).get(member)
+
+    def zrange(self, name, start, end):
+        with self._lock:
+            members = sorted(self._container(name, dict).items(), key=lambda item: (item[1], item[0]))
+            members = members[start:] if end == -1 else members[start:end + 1]
+            return [member for member, _ in members]
+
+    # ---------- Pipelines ----------
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self, transaction)
+
+    # ---------- intern ----------
+
+    def _alive(self, name):
+        # Lock muss gehalten werden; abgelaufene Schlüssel verschwinden beim nächsten Zugriff
+        expires = self._expires.get(name)
+        if expires is not None and expires <= time.time():
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+            self._touch(name)
+        return name in self._data
+
+    def _container(self, name, kind, create=False):
+        if self._alive(name):
+            return self._data[name]
+        if not create:
+            return kind()
+        self._data[name] = kind()
+        return self._data[name]
+
+    def _touch(self, name):
+        self._versions[name] = self._versions.get(name, 0) + 1
+
+
+class FakePipeline:
+    """redis-py-Pipeline: Befehle gepuffert bis execute(); zwischen watch() und multi() laufen sie sofort"""
+
+    def __init__(self, client, transaction=True):
+        self.client = client
+        self.transaction = transaction
+        self._watched = {}
+        self._buffer = []
+        self._buffering = True
+
+    def watch(self, *names):
+        with self.client._lock:
+            for name in names:
+                self._watched[name] = self.client._versions.get(name, 0)
+        self._buffering = False
+
+    def multi(self):
+        self._buffering = True
+
+    def execute(self):
+        with self.client._lock:
+            try:
+                if any(self.client._versions.get(name, 0) != version for name, version in self._watched.items()):
+                    raise WatchError(f"Beobachtete Schlüssel verändert: {', '.join(self._watched)}")
+                return [getattr(self.client, command)(*args, **kwargs) for command, args, kwargs in self._buffer]
+            finally:
+                self.reset()
+
+    def reset(self):
+        self._watched = {}
+        self._buffer = []
+        self._buffering = True
+
+    def __getattr__(self, command):
+        method = getattr(self.client, command)
+
+        def call(*args, **kwargs):
+            if not self._buffering:
+                return method(*args, **kwargs)
+            self._buffer.append((command, args, kwargs))
+            return self
+        return call
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.reset()
+        return False
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Hedged Runs gegen lange queued-Zeiten: hängt ein Run zu lange in queued, startet ein zweiter Versuch
+
+Die Schwelle ist ein Perzentil der zuletzt beobachteten queued-Zeiten (begrenzt auf min/max_delay).
+Der zweite Versuch läuft in einem frischen Thread mit demselben Kontext; der schnellere gewinnt,
+der andere wird abgebrochen. max_rate begrenzt den Anteil gehedgter Turns und damit die Mehrkosten.
+"""
+import random
+import threading
+import time
+from collections import deque
+
+from run_waiter import RunCancelled, RunTimeout, WAITING_STATUSES, _percentile
+
+FINAL_STATUSES = ('completed', 'failed', 'cancelled', 'expired', 'incomplete')
+
+
+class HedgePolicy:
+    """Schwelle aus dem Perzentil der queued-Zeiten, Budget für den Hedge-Anteil, Statistik"""
+
+    def __init__(self, percentile=95, min_delay=2.0, max_delay=30.0, initial_delay=8.0, max_rate=0.1,
+                 min_samples=20, window=200):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.initial_delay = initial_delay  # bis genug Messwerte da sind
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self._queued = deque(maxlen=window)  # Sekunden bis in_progress
+        self._execution = deque(maxlen=window)  # Sekunden von in_progress bis completed
+        self._turns = deque(maxlen=window)  # True = gehedgt (für das Budget)
+        self._lock = threading.Lock()
+        self._stats = {'turns': 0, 'hedged': 0, 'skipped_budget': 0, 'primary_wins': 0, 'hedge_wins': 0,
+                       'hedge_failed': 0, 'saved_s': 0.0}
+
+    def delay(self):
+        with self._lock:
+            samples = sorted(self._queued)
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        return min(self.max_delay, max(self.min_delay, _percentile(samples, self.percentile)))
+
+    def allow(self):
+        """Noch Budget für einen Hedge? (Anteil gehedgter Turns im Fenster unter max_rate)"""
+        with self._lock:
+            hedged = sum(self._turns)
+            if hedged + 1 <= self.max_rate * (len(self._turns) + 1):
+                return True
+            self._stats['skipped_budget'] += 1
+            return False
+
+    def observe(self, queued=None, execution=None):
+        with self._lock:
+            if queued is not None:
+                self._queued.append(queued)
+            if execution is not None:
+                self._execution.append(execution)
+
+    def expected_execution(self):
+        """Typische Laufzeit nach dem Start (Median) - für die Schätzung der gesparten Zeit"""
+        with self._lock:
+            return _percentile(sorted(self._execution), 50)
+
+    def record(self, hedged, winner=None, saved=0.0, hedge_failed=False):
+        with self._lock:
+            self._turns.append(hedged)
+            self._stats['turns'] += 1
+            self._stats['hedged'] += hedged
+            self._stats['hedge_failed'] += hedge_failed
+            if winner:
+                self._stats[f"{winner}_wins"] += 1
+            self._stats['saved_s'] += saved
+
+    def metrics(self):
+        delay = self.delay()
+        with self._lock:
+            queued = sorted(self._queued)
+            stats = dict(self._stats)
+        return {
+            **stats,
+            'saved_s': round(stats['saved_s'], 2),
+            'hedge_rate': round(stats['hedged'] / stats['turns'], 3) if stats['turns'] else 0,
+            'max_rate': self.max_rate,
+            'threshold_s': round(delay, 2),
+            'percentile': self.percentile,
+            'queued_p50_s': round(_percentile(queued, 50), 2),
+            'queued_p99_s': round(_percentile(queued, 99), 2),
+            'samples': len(queued)
+        }
+
+
+class _Attempt:
+    def __init__(self, name, thread_id, run):
+        self.name = name
+        self.thread_id = thread_id
+        self.run = run
+        self.created = time.monotonic()
+        self.started = None  # Zeitpunkt, ab dem der Run nicht mehr queued war
+
+    def observe(self, run, policy):
+        self.run = run
+        if self.started is None and run.status != 'queued':
+            self.started = time.monotonic()
+            policy.observe(queued=self.started - self.created)
+        if run.status == 'completed' and self.started is not None:
+            policy.observe(execution=time.monotonic() - self.started)
+
+
+class HedgedWaiter:
+    """Wartet wie RunWaiter.wait, startet aber bei Bedarf einen zweiten Run und nimmt den schnelleren
+
+    launch_hedge() -> (thread_id, run) legt den zweiten Versuch an; finish_hedge(thread_id) räumt
+    dessen Thread danach auf.
+    """
+
+    def __init__(self, run_waiter, policy):
+        self.run_waiter = run_waiter
+        self.policy = policy
+
+    def wait(self, client, thread_id, run, launch_hedge, finish_hedge, cancel=None):
+        """Liefert (thread_id, run) des Gewinners; wirft RunFailed/RunTimeout/RunCancelled wie RunWaiter"""
+        waiter = self.run_waiter
+        started = time.monotonic()
+        deadline_at = started + waiter.deadline
+        primary, hedge = _Attempt('primary', thread_id, run), None
+        attempts = [primary]
+        interval = waiter.initial_interval
+        hedge_failed = considered = False
+
+        while True:
+            winner = next((a for a in attempts if a.run.status == 'completed'), None)
+            if winner:
+                break
+            for attempt in [a for a in attempts if a.run.status not in WAITING_STATUSES]:
+                # Ein Versuch ist gescheitert - der andere darf weiterlaufen
+                attempts.remove(attempt)
+                if attempt is hedge:
+                    hedge_failed = True
+                    finish_hedge(hedge.thread_id)
+            if not attempts:
+                self.policy.record(hedge is not None, hedge_failed=hedge_failed)
+                return thread_id, waiter.wait(client, thread_id, primary.run)  # wirft RunFailed mit Details
+
+            if cancel is not None and cancel.is_set():
+                self._abandon(client, attempts, hedge, finish_hedge, started, 'abandoned')
+                raise RunCancelled(f"Run {primary.run.id} abgebrochen - Antwort wird nicht mehr gebraucht", primary.run)
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                self._abandon(client, attempts, hedge, finish_hedge, started, 'timeout')
+                raise RunTimeout(f"Run {primary.run.id} nach {waiter.deadline}s abgebrochen", primary.run)
+
+            # Höchstens ein Hedge pro Turn, und nur solange der erste Run noch nicht gestartet ist
+            if (not considered and primary in attempts and primary.started is None
+                    and time.monotonic() - started >= self.policy.delay()):
+                considered = True
+                if self.policy.allow():
+                    hedge = _Attempt('hedge', *launch_hedge())
+                    attempts.append(hedge)
+                    interval = waiter.initial_interval
+
+            delay = interval * random.uniform(1 - waiter.jitter, 1 + waiter.jitter)
+            if cancel is not None:
+                cancel.wait(min(delay, remaining))
+            else:
+                time.sleep(min(delay, remaining))
+            for attempt in attempts:
+                attempt.observe(client.beta.threads.runs.retrieve(thread_id=attempt.thread_id,
+                                                                  run_id=attempt.run.id), self.policy)
+            interval = min(interval * waiter.backoff, waiter.max_interval)
+
+        saved = 0.0
+        if winner is hedge:
+            # Verlierer abbrechen; ist er doch noch fertig geworden, gilt seine Antwort (steht schon im Thread)
+            loser = self._settle(client, primary) if primary in attempts else primary.run
+            if loser.status == 'completed':
+                winner = primary
+                finish_hedge(hedge.thread_id)
+            else:
+                expected = self.policy.expected_execution()
+                saved = expected if primary.started is None else max(
+                    0.0, primary.started + expected - time.monotonic())
+        elif hedge is not None and hedge in attempts:
+            waiter.cancel(client, hedge.thread_id, hedge.run.id, hedge.created, 'hedge_lost')
+            finish_hedge(hedge.thread_id)
+
+        waiter.record(winner.run.id, 'completed', started)
+        self.policy.record(hedge is not None, winner.name if hedge is not None else None, saved, hedge_failed)
+        return winner.thread_id, winner.run
+
+    def _settle(self, client, attempt):
+        """Run abbrechen und kurz auf einen Endstatus warten - erst dann ist der Thread wieder frei
+
+        Nach ~5s wird der letzte Stand geliefert; ist der Run dann noch aktiv, wartet der Aufrufer
+        (AssistantsBackend.adopt_reply) im Hintergrund weiter, bevor er in den Thread schreibt.
+        """
+        self.run_waiter.cancel(client, attempt.thread_id, attempt.run.id, attempt.created, 'hedge_lost')
+        run = attempt.run
+        for _ in range(20):
+            run = client.beta.threads.runs.retrieve(thread_id=attempt.thread_id, run_id=run.id)
+            if run.status in FINAL_STATUSES:
+                break
+            time.sleep(0.25)
+        return run
+
+    def _abandon(self, client, attempts, hedge, finish_hedge, started, outcome):
+        for attempt in attempts:
+            self.run_waiter.cancel(client, attempt.thread_id, attempt.run.id, started, outcome)
+        if hedge is not None:
+            finish_hedge(hedge.thread_id)
+        self.policy.record(hedge is not None)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Kompaktes Datenmodell für Sessions und Nachrichten: __slots__-Klassen statt verschachtelter Dicts
+
+Pro Nachricht fällt so kein Dict mit ISO-Zeitstempel-String mehr an, sondern ein Objekt mit festen
+Feldern (Zeitstempel als float, Absender als Enum); der Phasen-Fortschritt ist ein Array mit 5 Bytes.
+Optionale Session-Felder (email, context, abandoned_turns, ...) liegen in einem Dict, das erst beim
+ersten Setzen entsteht.
+
+Beide Klassen verhalten sich beim Lesen wie die bisherigen Dicts (session['messages'], m['sender'],
+session.get('email'), session.setdefault(...)) - App, Backends und Stores greifen unverändert zu.
+to_dict() liefert die JSON-Form für die APIs (Zeitstempel als ISO-String wie bisher).
+
+    session = Session(sid, thread_id)
+    session['messages'].append(Message(Sender.USER, text, phase=session['current_phase']))
+"""
+import time
+from array import array
+from collections.abc import Mapping, MutableMapping
+from datetime import datetime
+from enum import Enum
+
+PHASE_COUNT = 5
+
+
+def _timestamp(value):
+    """datetime, ISO-String oder float -> float (Sekunden seit Epoche)"""
+    if value is None:
+        return time.time()
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+class Sender(str, Enum):
+    USER = 'user'
+    ASSISTANT = 'assistant'
+
+    def __str__(self):
+        return self.value
+
+
+class Message(Mapping):
+    """Eine Chat-Nachricht; als Mapping gelesen wie {'sender', 'message', 'timestamp', 'phase'[, 'deferred']}"""
+
+    __slots__ = ('sender', 'message', 'timestamp', 'phase', 'deferred')
+
+    def __init__(self, sender, message, timestamp=None, phase=None, deferred=False):
+        self.sender = Sender(sender)
+        self.message = message
+        self.timestamp = _timestamp(timestamp)
+        self.phase = phase
+        self.deferred = deferred  # nachgeholte Antwort (Circuit Breaker)
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, Message):
+            return data
+        return cls(data['sender'], data['message'], data.get('timestamp'), data.get('phase'),
+                   bool(data.get('deferred')))
+
+    def to_dict(self):
+        return dict(self)
+
+    def __getitem__(self, key):
+        if key == 'sender':
+            return self.sender.value
+        if key == 'timestamp':
+            return datetime.fromtimestamp(self.timestamp).isoformat()
+        if key in ('message', 'phase') or (key == 'deferred' and self.deferred):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from ('sender', 'message', 'timestamp', 'phase')
+        if self.deferred:
+            yield 'deferred'
+
+    def __len__(self):
+        return 5 if self.deferred else 4
+
+    def __repr__(self):
+        return f"Message({self.sender.value!r}, {self.message[:30]!r}, phase={self.phase})"
+
+
+class PhaseProgress(MutableMapping):
+    """Fortschritt in Prozent pro Phase 1-5 als Byte-Array; verhält sich wie {1: 0, ..., 5: 0}"""
+
+    __slots__ = ('_values',)
+
+    def __init__(self, values=None):
+        self._values = array('B', bytes(PHASE_COUNT))
+        for phase, progress in (values or {}).items():
+            self[int(phase)] = progress
+
+    def _index(self, phase):
+        if not isinstance(phase, int) or not 1 <= phase <= PHASE_COUNT:
+            raise KeyError(phase)
+        return phase - 1
+
+    def __getitem__(self, phase):
+        return self._values[self._index(phase)]
+
+    def __setitem__(self, phase, progress):
+        self._values[self._index(phase)] = max(0, min(100, int(progress)))
+
+    def __delitem__(self, phase):
+        raise TypeError("Phasen lassen sich nicht entfernen")
+
+    def __iter__(self):
+        return iter(range(1, PHASE_COUNT + 1))
+
+    def __len__(self):
+        return PHASE_COUNT
+
+    def to_dict(self):
+        return dict(self)
+
+    def __repr__(self):
+        return f"PhaseProgress({self.to_dict()})"
+
+
+class Session(MutableMapping):
+    """Coaching-Session; als Mapping gelesen wie das bisherige Session-Dict ('created' als datetime)"""
+
+    __slots__ = ('id', 'thread_id', 'current_phase', 'phase_progress', 'total_progress', 'messages', 'created',
+                 'extra', '__weakref__')  # schwache Referenz: Hot-Set findet verdrängte, noch benutzte Sessions
+    FIELDS = ('id', 'thread_id', 'current_phase', 'phase_progress', 'total_progress', 'messages', 'created')
+
+    def __init__(self, id, thread_id=None, current_phase=1, phase_progress=None, total_progress=0, messages=None,
+                 created=None, **extra):
+        self.id = id
+        self.thread_id = thread_id
+        self.current_phase = current_phase
+        self.phase_progress = PhaseProgress(phase_progress)
+        self.total_progress = total_progress
+        self.messages = [Message.from_dict(m) for m in messages or []]
+        self.created = _timestamp(created)
+        self.extra = extra or None  # optionale Felder, erst beim ersten Setzen ein Dict
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, Session):
+            return data
+        return cls(**data)
+
+    def to_dict(self):
+        """JSON-Form (Nachrichten als Dicts, Zeitstempel als ISO-String)"""
+        data = dict(self)
+        data['phase_progress'] = self.phase_progress.to_dict()
+        data['messages'] = [m.to_dict() for m in self.messages]
+        data['created'] = data['created'].isoformat()
+        return data
+
+    def __getitem__(self, key):
+        if key == 'created':
+            return datetime.fromtimestamp(self.created)
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key == 'created':
+            self.created = _timestamp(value)
+        elif key == 'phase_progress':
+            self.phase_progress = value if isinstance(value, PhaseProgress) else PhaseProgress(value)
+        elif key == 'messages':
+            self.messages = [Message.from_dict(m) for m in value]
+        elif key in self.FIELDS:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self.FIELDS or self.extra is None:
+            raise KeyError(key)
+        del self.extra[key]
+        if not self.extra:
+            self.extra = None
+
+    def __iter__(self):
+        yield from self.FIELDS
+        if self.extra:
+            yield from list(self.extra)
+
+    def __len__(self):
+        return len(self.FIELDS) + len(self.extra or ())
+
+    def __repr__(self):
+        return f"Session({self.id!r}, phase={self.current_phase}, messages={len(self.messages)})"
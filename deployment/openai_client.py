@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""Zentral konfigurierter OpenAI-Client: Connection-Pool, Keep-Alive, Timeouts und Retries
+
+Alle Varianten und Hintergrund-Threads (E-Mail-Monitor, Thread-Pool) teilen sich pro Prozess
+einen Client, damit TCP/TLS-Verbindungen wiederverwendet werden statt pro Request neu aufgebaut.
+Einstellungen über Umgebungsvariablen (Defaults in Klammern):
+
+    OPENAI_MAX_CONNECTIONS (50)  OPENAI_MAX_KEEPALIVE (20)  OPENAI_KEEPALIVE_EXPIRY (30s)
+    OPENAI_CONNECT_TIMEOUT (5s)  OPENAI_READ_TIMEOUT (60s)  OPENAI_POOL_TIMEOUT (30s)  OPENAI_MAX_RETRIES (3)
+"""
+import os
+
+import httpx
+from openai import OpenAI, DefaultHttpxClient
+
+
+def _env(name, default, cast=float):
+    value = os.getenv(name)
+    return cast(value) if value else default
+
+
+def client_settings():
+    """Aktive Einstellungen (für /api/stats und Benchmarks)"""
+    return {
+        'max_connections': _env('OPENAI_MAX_CONNECTIONS', 50, int),
+        'max_keepalive': _env('OPENAI_MAX_KEEPALIVE', 20, int),
+        'keepalive_expiry': _env('OPENAI_KEEPALIVE_EXPIRY', 30.0),
+        'connect_timeout': _env('OPENAI_CONNECT_TIMEOUT', 5.0),
+        'read_timeout': _env('OPENAI_READ_TIMEOUT', 60.0),
+        'pool_timeout': _env('OPENAI_POOL_TIMEOUT', 30.0),
+        'max_retries': _env('OPENAI_MAX_RETRIES', 3, int)
+    }
+
+
+def create_http_client(event_hooks=None, **overrides):
+    """httpx-Client mit begrenztem Pool und Keep-Alive; Verbindungsfehler werden im Transport wiederholt"""
+    settings = {**client_settings(), **overrides}
+    limits = httpx.Limits(max_connections=settings['max_connections'],
+                          max_keepalive_connections=settings['max_keepalive'],
+                          keepalive_expiry=settings['keepalive_expiry'])
+    return DefaultHttpxClient(
+        # Lesen darf dauern (Streams, lange Runs), der Verbindungsaufbau nicht
+        timeout=httpx.Timeout(settings['read_timeout'], connect=settings['connect_timeout'],
+                              pool=settings['pool_timeout']),
+        # Pool-Grenzen gelten am Transport; retries=2 wiederholt nur fehlgeschlagene Verbindungsaufbauten
+        transport=httpx.HTTPTransport(limits=limits, retries=2),
+        event_hooks=event_hooks or {}
+    )
+
+
+def create_client(api_key=None, base_url=None, event_hooks=None, **overrides):
+    """OpenAI-Client mit geteiltem Pool; Retries (429/5xx/Timeouts) mit exponentiellem Backoff und Jitter"""
+    settings = {**client_settings(), **overrides}
+    return OpenAI(
+        api_key=api_key or os.getenv('OPENAI_API_KEY'),
+        base_url=base_url or os.getenv('OPENAI_BASE_URL') or None,
+        max_retries=settings['max_retries'],
+        http_client=create_http_client(event_hooks, **overrides)
+    )
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Gemeinsames Rate-Limit für alle OpenAI-Requests: Token-Buckets für Requests/min und Tokens/min
+
+Der Zustand liegt in einer lokalen SQLite-Datei, damit alle gunicorn-Worker (und Threads) dieselben
+Buckets teilen. Zwei Spuren: 'interactive' (Chat) darf die Buckets ganz leeren, 'batch' (E-Mail,
+Vorwärmen, Zusammenfassungen) nur bis zur Reserve und pausiert, solange interaktive Requests warten.
+
+Eingebunden wird der Limiter über httpx-Event-Hooks am OpenAI-Client:
+
+    limiter = RateLimiter('/tmp/openai_rate_limit.db', rpm=500, tpm=200000)
+    client = create_client(event_hooks=limiter.event_hooks())  # openai_client.py
+    with limiter.lane('batch'):
+        ...
+"""
+import contextvars
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+LANES = ('interactive', 'batch')
+
+_current_lane = contextvars.ContextVar('rate_limit_lane', default='interactive')
+
+
+def estimate_tokens(text):
+    """Grobe Token-Schätzung (ca. 4 Zeichen pro Token)"""
+    return max(1, len(text) // 4) if text else 0
+
+
+def in_lane(lane, func):
+    """func so verpacken, dass ihre OpenAI-Requests in der angegebenen Spur laufen"""
+    def wrapper(*args, **kwargs):
+        token = _current_lane.set(lane)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_lane.reset(token)
+    return wrapper
+
+
+class RateLimiter:
+    """Token-Buckets in SQLite; acquire() blockiert, bis Requests- und Token-Bucket reichen"""
+
+    def __init__(self, path, rpm=500, tpm=200000, batch_reserve=0.25, completion_tokens=400,
+                 max_wait=(30, 300)):
+        self.path = path
+        self.capacity = {'requests': float(rpm), 'tokens': float(tpm)}
+        self.rate = {'requests': rpm / 60.0, 'tokens': tpm / 60.0}  # Nachfüllung pro Sekunde
+        self.batch_reserve = batch_reserve  # Anteil, den die Batch-Spur nicht anrühren darf
+        self.completion_tokens = completion_tokens  # Annahme für die Antwortlänge
+        self.max_wait = dict(zip(LANES, max_wait))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {lane: {'acquired': 0, 'waited': 0, 'wait_s': 0.0, 'overflows': 0} for lane in LANES}
+        self._estimates = {}  # run_id -> geschätzte Tokens (Abgleich, sobald die Usage bekannt ist)
+        self._init_db()
+
+    # ---------- Spuren ----------
+
+    @contextmanager
+    def lane(self, name):
+        """Alle OpenAI-Requests im Block laufen in dieser Spur"""
+        token = _current_lane.set(name)
+        try:
+            yield
+        finally:
+            _current_lane.reset(token)
+
+    # ---------- Buckets ----------
+
+    def acquire(self, tokens=0, lane=None):
+        """Einen Request mit `tokens` geschätzten Tokens anmelden; wartet bei Bedarf
+
+        Nach max_wait geht der Request trotzdem raus (als 'overflow' gezählt) - eine Exception würde
+        im OpenAI-SDK nur als Verbindungsfehler wiederholt; ein echtes 429 behandeln dessen Retries.
+        """
+        lane = lane or _current_lane.get()
+        started = time.monotonic()
+        waited = False
+
+        while True:
+            wait = self._try_acquire(tokens, lane)
+            if wait <= 0:
+                break
+            if time.monotonic() - started + wait > self.max_wait[lane]:
+                with self._lock:
+                    self._stats[lane]['overflows'] += 1
+                break
+            waited = True
+            time.sleep(min(wait, 1.0))
+
+        with self._lock:
+            stats = self._stats[lane]
+            stats['acquired'] += 1
+            if waited:
+                stats['waited'] += 1
+                stats['wait_s'] += time.monotonic() - started
+
+    def adjust(self, tokens):
+        """Schätzung nachträglich korrigieren (positiv = mehr verbraucht als angenommen)"""
+        if not tokens:
+            return
+        conn = self._conn()
+        with self._transaction(conn):
+            conn.execute("UPDATE buckets SET level = MAX(level - ?, ?) WHERE name = 'tokens'",
+                         (tokens, -self.capacity['tokens']))
+
+    def levels(self):
+        """Aktueller Füllstand der Buckets (nachgefüllt bis jetzt) und Spur-Statistik dieses Prozesses"""
+        conn = self._conn()
+        now = time.time()
+        rows = {name: (level, updated) for name, level, updated in conn.execute("SELECT name, level, updated FROM buckets")}
+        meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+
+        buckets = {}
+        for name, capacity in self.capacity.items():
+            level, updated = rows[name]
+            level = min(capacity, level + (now - updated) * self.rate[name])
+            buckets[name] = {'level': round(level, 1), 'capacity': capacity,
+                             'fill': round(level / capacity, 3), 'per_minute': capacity}
+
+        with self._lock:
+            lanes = {lane: dict(stats, wait_s=round(stats['wait_s'], 2)) for lane, stats in self._stats.items()}
+        return {
+            **buckets,
+            'batch_reserve': self.batch_reserve,
+            'interactive_waiting': meta.get('interactive_waiting_until', 0) > now,
+            'lanes': lanes
+        }
+
+    # ---------- httpx-Hooks ----------
+
+    def event_hooks(self):
+        return {'request': [self.on_request], 'response': [self.on_response]}
+
+    def on_request(self, request):
+        tokens = self.request_tokens(request)
+        request.extensions['rate_limit_tokens'] = tokens
+        self.acquire(tokens)
+
+    def on_response(self, response):
+        """Tatsächliche Usage abgleichen (nur bei JSON-Antworten, Streams bleiben bei der Schätzung)"""
+        if response.status_code >= 400 or 'application/json' not in response.headers.get('content-type', ''):
+            return
+        path = response.request.url.path
+        if not (path.endswith('/chat/completions') or '/runs' in path):
+            return
+
+        response.read()
+        try:
+            data = response.json()
+        except ValueError:
+            return
+        estimate = response.request.extensions.get('rate_limit_tokens', 0)
+
+        if data.get('object') == 'chat.completion' and data.get('usage'):
+            self.adjust(data['usage']['total_tokens'] - estimate)
+        elif data.get('object') == 'thread.run':
+            with self._lock:
+                if response.request.method == 'POST' and path.endswith('/runs'):
+                    self._estimates[data['id']] = estimate
+                    return
+                if data.get('status') in ('queued', 'in_progress', 'cancelling', 'requires_action'):
+                    return
+                estimate = self._estimates.pop(data['id'], None)
+            if estimate is not None and data.get('usage'):
+                self.adjust(data['usage']['total_tokens'] - estimate)
+
+    def request_tokens(self, request):
+        """Geschätzte Tokens: Prompt aus dem Body + erwartete Antwort; nur für Runs und Completions"""
+        path = request.url.path
+        if request.method != 'POST' or not (path.endswith('/chat/completions') or path.endswith('/runs')):
+            return 0
+        try:
+            body = json.loads(request.content or b'{}')
+        except ValueError:
+            body = {}
+        text = ''.join(str(m.get('content', '')) for m in body.get('messages', []))
+        text += str(body.get('additional_instructions') or '') + str(body.get('instructions') or '')
+        return estimate_tokens(text) + body.get('max_tokens', self.completion_tokens)
+
+    # ---------- SQLite ----------
+
+    def _try_acquire(self, tokens, lane):
+        """Buckets nachfüllen und abbuchen; liefert 0 bei Erfolg, sonst die Wartezeit in Sekunden"""
+        cost = {'requests': 1.0, 'tokens': float(min(tokens, self.capacity['tokens']))}
+        conn = self._conn()
+        with self._transaction(conn):
+            now = time.time()
+            rows = {name: (level, updated) for name, level, updated in conn.execute("SELECT name, level, updated FROM buckets")}
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+
+            # Batch-Arbeit pausiert, solange interaktive Requests warten, und lässt die Reserve stehen
+            if lane == 'batch' and meta.get('interactive_waiting_until', 0) > now:
+                return meta['interactive_waiting_until'] - now
+            floor = self.batch_reserve if lane == 'batch' else 0.0
+
+            levels, wait = {}, 0.0
+            for name, capacity in self.capacity.items():
+                level, updated = rows[name]
+                levels[name] = min(capacity, level + (now - updated) * self.rate[name])
+                missing = cost[name] + floor * capacity - levels[name]
+                if missing > 0:
+                    wait = max(wait, missing / self.rate[name])
+
+            if wait > 0:
+                if lane == 'interactive':
+                    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('interactive_waiting_until', ?)",
+                                 (now + wait,))
+                return wait
+
+            conn.executemany("UPDATE buckets SET level = ?, updated = ? WHERE name = ?",
+                             [(levels[name] - cost[name], now, name) for name in self.capacity])
+            return 0
+
+    def _conn(self):
+        # sqlite3-Verbindungen dürfen nicht zwischen Threads geteilt werden
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, conn):
+        # BEGIN IMMEDIATE sperrt sofort - kein anderer Prozess bucht dazwischen ab
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _init_db(self):
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, level REAL, updated REAL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL)")
+        with self._transaction(conn):
+            for name, capacity in self.capacity.items():
+                # Erster Prozess legt volle Buckets an; spätere Worker übernehmen den bestehenden Stand
+                conn.execute("INSERT OR IGNORE INTO buckets (name, level, updated) VALUES (?, ?, ?)",
+                             (name, capacity, time.time()))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Antwort-Cache für wiederkehrende Eröffnungs-Turns und FAQ-artige Anfragen
+
+Schlüssel ist (Phase, normalisierte Nachricht). Einträge verfallen nach `ttl` Sekunden, bei vollem
+Cache fliegt der am längsten nicht genutzte Eintrag (LRU). Standardmässig treffen nur exakt gleiche
+Nachrichten. Optional (`fuzzy`) dürfen sehr kurze Nachrichten - Grüsse wie "hallo!" vs. "hallo" - auch
+ähnlich sein; längere nie, sonst bekommt "Hallo, ich bin Hans Meier" die persönliche Antwort an
+Hans Müller.
+"""
+import difflib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_PUNCTUATION = re.compile(r'[^\w\s]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(message):
+    """Kleinschreibung, ohne Satzzeichen, Leerraum zusammengefasst"""
+    return _WHITESPACE.sub(' ', _PUNCTUATION.sub(' ', message.lower())).strip()
+
+
+class ResponseCache:
+    """LRU-Cache mit TTL; get() liefert die gespeicherte Antwort oder None"""
+
+    def __init__(self, max_entries=500, ttl=6 * 3600, fuzzy=None, fuzzy_max_chars=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.fuzzy = fuzzy  # Mindest-Ähnlichkeit für Near-Duplicates (None = nur exakte Treffer)
+        self.fuzzy_max_chars = fuzzy_max_chars
+        self._entries = OrderedDict()  # (phase, normalisiert) -> {'response', 'expires', 'hits'}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'fuzzy_hits': 0, 'misses': 0, 'bypassed': 0, 'stores': 0,
+                       'evictions': 0, 'expired': 0}
+
+    def get(self, phase, message):
+        text = normalize(message)
+        now = time.time()
+        with self._lock:
+            key = (phase, text)
+            entry = self._live(key, now)
+            if entry is None and self.fuzzy and len(text) <= self.fuzzy_max_chars:
+                key = self._closest(phase, text, now)
+                entry = self._entries.get(key) if key else None
+                if entry:
+                    self._stats['fuzzy_hits'] += 1
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            entry['hits'] += 1
+            self._stats['hits'] += 1
+            return entry['response']
+
+    def put(self, phase, message, response):
+        key = (phase, normalize(message))
+        with self._lock:
+            self._entries[key] = {'response': response, 'expires': time.time() + self.ttl, 'hits': 0}
+            self._entries.move_to_end(key)
+            self._stats['stores'] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def bypassed(self):
+        """Anfrage am Cache vorbei (Session-Bypass) - nur für die Statistik"""
+        with self._lock:
+            self._stats['bypassed'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_s': self.ttl,
+                **self._stats,
+                'hit_rate': round(self._stats['hits'] / lookups, 3) if lookups else 0,
+                'top': [{'phase': phase, 'message': text[:80], 'hits': entry['hits']}
+                        for (phase, text), entry in sorted(self._entries.items(), key=lambda e: -e[1]['hits'])[:5]]
+            }
+
+    def _live(self, key, now):
+        # Lock muss gehalten werden
+        entry = self._entries.get(key)
+        if entry and entry['expires'] <= now:
+            del self._entries[key]
+            self._stats['expired'] += 1
+            return None
+        return entry
+
+    def _closest(self, phase, text, now):
+        # Lock muss gehalten werden; nur kurze, nicht abgelaufene Einträge derselben Phase kommen in Frage
+        candidates = [t for (p, t), entry in self._entries.items()
+                      if p == phase and entry['expires'] > now and len(t) <= self.fuzzy_max_chars]
+        match = difflib.get_close_matches(text, candidates, n=1, cutoff=self.fuzzy)
+        return (phase, match[0]) if match else None
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Wartet auf OpenAI-Assistant-Runs: schnelles Polling am Anfang, dann Backoff mit Jitter und Deadline"""
+import threading
+import random
+import time
+from collections import deque
+
+WAITING_STATUSES = ('queued', 'in_progress')
+
+
+class RunFailed(Exception):
+    """Run wurde nicht erfolgreich abgeschlossen (failed, expired, cancelled, requires_action ...)"""
+
+    def __init__(self, message, run):
+        super().__init__(message)
+        self.run = run
+
+
+class RunTimeout(RunFailed):
+    """Run hat die Deadline überschritten und wurde abgebrochen"""
+
+
+class RunCancelled(RunFailed):
+    """Run wurde abgebrochen, weil niemand mehr auf die Antwort wartet (Client weg, Shutdown)"""
+
+
+class RunWaiter:
+    """Gemeinsamer Run-Waiter mit Statistik pro Run (Latenz, Anzahl Polls)"""
+
+    def __init__(self, initial_interval=0.15, max_interval=2.0, backoff=1.6, jitter=0.2, deadline=90, history=500):
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.deadline = deadline
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history)
+        self._outcomes = {}
+
+    def wait(self, client, thread_id, run, deadline=None, cancel=None):
+        """Pollt den Run bis zum Endstatus; liefert den abgeschlossenen Run oder wirft RunFailed
+
+        `cancel` ist ein optionales threading.Event - sobald es gesetzt ist, wird der Run bei OpenAI
+        abgebrochen und RunCancelled geworfen.
+        """
+        started = time.monotonic()
+        deadline_at = started + (deadline or self.deadline)
+        interval = self.initial_interval
+        polls = 0
+
+        while run.status in WAITING_STATUSES:
+            if cancel is not None and cancel.is_set():
+                self._cancel(client, thread_id, run)
+                self._record(run.id, 'abandoned', started, polls)
+                raise RunCancelled(f"Run {run.id} abgebrochen - Antwort wird nicht mehr gebraucht", run)
+
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                self._cancel(client, thread_id, run)
+                self._record(run.id, 'timeout', started, polls)
+                raise RunTimeout(f"Run {run.id} nach {deadline or self.deadline}s abgebrochen", run)
+
+            # Jitter verhindert, dass viele gleichzeitige Runs im Gleichschritt pollen
+            delay = interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            if cancel is not None:
+                cancel.wait(min(delay, remaining))
+            else:
+                time.sleep(min(delay, remaining))
+            run = client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
+            polls += 1
+            interval = min(interval * self.backoff, self.max_interval)
+
+        self._record(run.id, run.status, started, polls)
+
+        if run.status == 'completed':
+            return run
+
+        if run.status == 'requires_action':
+            # Der Coaching-Assistant hat keine Tools registriert - Run nicht hängen lassen
+            self._cancel(client, thread_id, run)
+            raise RunFailed(f"Run {run.id} verlangt Tool-Aufrufe (requires_action)", run)
+
+        error = getattr(run, 'last_error', None)
+        detail = f": {error.message}" if error and getattr(error, 'message', None) else ''
+        raise RunFailed(f"Run {run.id} beendet mit Status {run.status}{detail}", run)
+
+    def stats(self):
+        """Latenz- und Poll-Statistik der letzten Runs"""
+        with self._lock:
+            history = list(self._history)
+            outcomes = dict(self._outcomes)
+
+        latencies = sorted(item['latency'] for item in history)
+        polls = [item['polls'] for item in history]
+        return {
+            'runs': len(history),
+            'outcomes': outcomes,
+            'latency_avg': round(sum(latencies) / len(latencies), 3) if latencies else 0,
+            'latency_p50': round(_percentile(latencies, 50), 3),
+            'latency_p95': round(_percentile(latencies, 95), 3),
+            'latency_max': round(latencies[-1], 3) if latencies else 0,
+            'polls_avg': round(sum(polls) / len(polls), 2) if polls else 0,
+            'polls_max': max(polls) if polls else 0,
+            'recent': history[-10:]
+        }
+
+    def cancel(self, client, thread_id, run_id, started=None, outcome='abandoned'):
+        """Run von aussen abbrechen (z.B. abgebrochener Stream) und in der Statistik zählen"""
+        try:
+            client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run_id)
+        except Exception as e:
+            print(f"⚠️ Run {run_id} konnte nicht abgebrochen werden: {e}")
+        self._record(run_id, outcome, started or time.monotonic(), 0)
+
+    def record(self, run_id, outcome, started, polls=0):
+        """Run zählen, der ausserhalb von wait() beendet wurde (z.B. gehedgte Runs)"""
+        self._record(run_id, outcome, started, polls)
+
+    def _cancel(self, client, thread_id, run):
+        try:
+            client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run.id)
+        except Exception as e:
+            print(f"⚠️ Run {run.id} konnte nicht abgebrochen werden: {e}")
+
+    def _record(self, run_id, outcome, started, polls):
+        with self._lock:
+            self._history.append({
+                'run_id': run_id,
+                'status': outcome,
+                'latency': round(time.monotonic() - started, 3),
+                'polls': polls
+            })
+            self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+
+
+def _percentile(values, pct):
+    """Perzentil aus einer sortierten Liste"""
+    if not values:
+        return 0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
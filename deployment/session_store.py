@@ -0,0 +1,971 @@
+#!/usr/bin/env python3
+"""Session-Repository: Coaching-Sessions im Speicher (bisher), ausgelagert auf Platte, in SQLite (WAL) oder Redis
+
+Alle Stores bieten dieselbe Schnittstelle und verhalten sich zum Lesen wie das bisherige sessions-Dict
+(get, [], in, len, values, items):
+    add(session)        -> neue Session anlegen
+    save(session)       -> Änderungen seit dem letzten save (neue Nachrichten, Phase, Fortschritt, übrige
+                           Felder) in einer Transaktion schreiben - einmal pro Turn
+    delete(session_id)  -> Session samt Nachrichten entfernen
+    cached()            -> Sessions, die gerade im Speicher liegen (für /api/stats)
+    metrics()           -> Lese-/Schreiblatenz, Cache-Trefferquote, Anzahl Sessions und Nachrichten
+
+Sessions sind models.Session-Objekte (lesbar wie Dicts), die der Aufrufer direkt verändert. Spill-,
+SQLite- und Redis-Store halten die zuletzt benutzten Sessions in einem begrenzten Hot-Set (HotSet: LRU
+mit Obergrenze für Anzahl, geschätzte MB und Leerlaufzeit); solange eine Session dort liegt - oder ein
+Request sie nach dem Verdrängen noch hält - bekommen alle Requests dasselbe Objekt.
+
+    sessions = create_session_store('sqlite', path='/tmp/coaching_sessions.db', cache_size=1000,
+                                    cache_mb=256, idle_seconds=1800)
+
+Der Redis-Store teilt die Sessions zwischen allen gunicorn-Workern (SQLite nur innerhalb einer Maschine
+und ohne Abgleich der Caches zwischen den Prozessen).
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import weakref
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from fake_redis import WatchError
+from models import Message, Session
+
+# Felder mit eigener Spalte (dazu email, phase_progress, messages); der Rest (context, abandoned_turns, ...) als JSON
+SESSION_COLUMNS = ('id', 'thread_id', 'current_phase', 'total_progress', 'created')
+MESSAGE_COLUMNS = ('sender', 'message', 'timestamp', 'phase')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    thread_id TEXT,
+    current_phase INTEGER NOT NULL,
+    total_progress REAL NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    email TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated);
+CREATE INDEX IF NOT EXISTS sessions_email ON sessions (email);
+CREATE TABLE IF NOT EXISTS phase_progress (
+    session_id TEXT NOT NULL,
+    phase INTEGER NOT NULL,
+    progress REAL NOT NULL,
+    PRIMARY KEY (session_id, phase)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    sender TEXT NOT NULL,
+    message TEXT NOT NULL,
+    timestamp TEXT,
+    phase INTEGER,
+    extra TEXT,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+"""
+
+# Feste SQL-Texte: sqlite3 hält die vorbereiteten Statements pro Verbindung im Statement-Cache
+SELECT_SESSION = ("SELECT id, thread_id, current_phase, total_progress, created, email, extra FROM sessions "
+                  "WHERE id = ?")
+SELECT_PROGRESS = "SELECT phase, progress FROM phase_progress WHERE session_id = ?"
+SELECT_MESSAGES = "SELECT sender, message, timestamp, phase, extra FROM messages WHERE session_id = ? ORDER BY seq"
+UPSERT_SESSION = """INSERT INTO sessions (id, thread_id, current_phase, total_progress, created, updated, email, extra)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET thread_id = excluded.thread_id, current_phase = excluded.current_phase,
+    total_progress = excluded.total_progress, updated = excluded.updated, email = excluded.email,
+    extra = excluded.extra"""
+UPSERT_PROGRESS = """INSERT INTO phase_progress (session_id, phase, progress) VALUES (?, ?, ?)
+ON CONFLICT (session_id, phase) DO UPDATE SET progress = excluded.progress"""
+INSERT_MESSAGE = """INSERT OR REPLACE INTO messages (session_id, seq, sender, message, timestamp, phase, extra)
+VALUES (?, ?, ?, ?, ?, ?, ?)"""
+
+
+def _json(data):
+    return json.dumps(data, ensure_ascii=False, default=str) if data else None
+
+
+def _restore_extra(extra):
+    """JSON macht aus int-Schlüsseln Strings - Zusammenfassungen pro Phase wieder mit int-Schlüssel"""
+    context = extra.get('context')
+    if context and context.get('summaries'):
+        context['summaries'] = {int(phase): text for phase, text in context['summaries'].items()}
+    return extra
+
+
+# Geschätzter Speicher ohne Texte (bench_session_memory.py: ~113 B pro Message-Objekt, dazu der str-Kopf)
+SESSION_BYTES = 1024
+MESSAGE_BYTES = 170
+
+
+def estimate_size(session):
+    """Grobe Grösse einer Session im Speicher in Bytes - billig genug für jeden save()"""
+    size = SESSION_BYTES + sum(MESSAGE_BYTES + len(m['message']) for m in session['messages'])
+    extra = getattr(session, 'extra', None)  # optionale Felder (context, abandoned_turns, ...)
+    if extra:
+        size += len(repr(extra))
+    return size
+
+
+class HotSet:
+    """Sessions im Speicher als LRU mit Obergrenzen für Anzahl, geschätzte Bytes und Leerlaufzeit
+
+    Nicht threadsicher - der Store hält seinen Lock. put() und update() liefern die verdrängten Sessions;
+    der Store entscheidet, was mit ihnen passiert (auslagern oder einfach loslassen). Eine verdrängte
+    Session, die ein laufender Request noch in der Hand hat, liefert revive() über eine schwache Referenz
+    zurück - so gibt es pro Session nie zwei Objekte.
+    """
+
+    def __init__(self, max_sessions=1000, max_bytes=0, idle_seconds=0):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes  # 0 = keine Grenze
+        self.idle_seconds = idle_seconds  # 0 = keine Grenze
+        self.bytes = 0
+        self._entries = OrderedDict()  # session_id -> [Session, geschätzte Bytes, zuletzt benutzt]
+        self._evicted = weakref.WeakValueDictionary()
+        self.stats = {'evicted': 0, 'evicted_idle': 0, 'evicted_memory': 0, 'revived': 0}
+
+    def get(self, session_id):
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        entry[2] = time.monotonic()
+        self._entries.move_to_end(session_id)
+        return entry[0]
+
+    def revive(self, session_id):
+        """Verdrängte, aber noch referenzierte Session (oder None); der Store legt sie mit put() zurück"""
+        session = self._evicted.pop(session_id, None)
+        if session is not None:
+            self.stats['revived'] += 1
+        return session
+
+    def put(self, session):
+        """Session aufnehmen oder auffrischen; liefert die dafür verdrängten Sessions"""
+        entry = self._entries.pop(session['id'], None)
+        if entry is not None:
+            self.bytes -= entry[1]
+        size = estimate_size(session)
+        self._entries[session['id']] = [session, size, time.monotonic()]
+        self.bytes += size
+        return self._trim()
+
+    def update(self, session):
+        """Nach einem Turn: Grösse neu schätzen, falls die Session noch im Speicher liegt"""
+        if session['id'] not in self._entries:
+            return []
+        return self.put(session)
+
+    def pop(self, session_id):
+        entry = self._entries.pop(session_id, None)
+        self._evicted.pop(session_id, None)
+        if entry is None:
+            return None
+        self.bytes -= entry[1]
+        return entry[0]
+
+    def sessions(self):
+        return {session_id: entry[0] for session_id, entry in self._entries.items()}
+
+    def __contains__(self, session_id):
+        return session_id in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _trim(self):
+        evicted = []
+        idle_before = time.monotonic() - self.idle_seconds
+        while len(self._entries) > 1:  # die gerade benutzte Session bleibt immer
+            session, size, used = next(iter(self._entries.values()))
+            if len(self._entries) > self.max_sessions:
+                reason = 'evicted'
+            elif self.max_bytes and self.bytes > self.max_bytes:
+                reason = 'evicted_memory'
+            elif self.idle_seconds and used < idle_before:
+                reason = 'evicted_idle'
+            else:
+                break
+            self._entries.popitem(last=False)
+            self.bytes -= size
+            try:
+                self._evicted[session['id']] = session
+            except TypeError:
+                pass  # einfaches Dict statt models.Session: ohne schwache Referenz, nicht wiederbelebbar
+            self.stats['evicted'] += 1
+            if reason != 'evicted':
+                self.stats[reason] += 1
+            evicted.append(session)
+        return evicted
+
+    def metrics(self):
+        return {'hot': len(self._entries), 'hot_mb': round(self.bytes / 1024 / 1024, 1),
+                'max_sessions': self.max_sessions, 'max_mb': round(self.max_bytes / 1024 / 1024, 1),
+                'idle_seconds': self.idle_seconds, **self.stats}
+
+
+class MemorySessionStore:
+    """Sessions nur im Prozess (bisheriges Verhalten) - gehen bei Neustart verloren"""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._sessions = {}
+
+    def get(self, session_id, default=None):
+        return self._sessions.get(session_id, default)
+
+    def add(self, session):
+        self._sessions[session['id']] = session
+
+    def save(self, session):
+        pass  # Änderungen stehen schon im Dict
+
+    def delete(self, session_id):
+        return self._sessions.pop(session_id, None) is not None
+
+    def ids(self):
+        return list(self._sessions)
+
+    def cached(self):
+        return dict(self._sessions)
+
+    def __getitem__(self, session_id):
+        return self._sessions[session_id]
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __iter__(self):
+        return iter(self.ids())
+
+    def values(self):
+        return list(self._sessions.values())
+
+    def items(self):
+        return list(self._sessions.items())
+
+    def metrics(self):
+        sessions = self.values()
+        return {'store': self.name, 'sessions': len(sessions), 'messages': sum(len(s['messages']) for s in sessions)}
+
+
+SESSION_ID = re.compile(r'[A-Za-z0-9_-]{1,64}')  # nur solche IDs werden zu Dateinamen
+
+
+def _pack(session):
+    """Kompakte Form für die Platte: JSON ohne Feldnamen pro Nachricht, Zeitstempel als float, zlib"""
+    data = [session.id, session.thread_id, session.current_phase, list(session.phase_progress.values()),
+            session.total_progress, session.created,
+            [[m.sender.value, m.message, m.timestamp, m.phase, m.deferred] for m in session.messages],
+            session.extra]
+    return zlib.compress(json.dumps(data, ensure_ascii=False, default=str, separators=(',', ':')).encode(), 6)
+
+
+def _unpack(blob):
+    sid, thread_id, current_phase, progress, total_progress, created, messages, extra = json.loads(
+        zlib.decompress(blob))
+    return Session(sid, thread_id, current_phase, dict(enumerate(progress, 1)), total_progress,
+                   [Message(*m) for m in messages], created, **_restore_extra(extra or {}))
+
+
+class SpillSessionStore:
+    """Begrenztes Hot-Set im Speicher; kalte Sessions liegen komprimiert auf Platte und kommen bei Bedarf zurück
+
+    Verdrängt wird nach LRU, sobald mehr als cache_size Sessions oder geschätzt mehr als cache_mb im
+    Speicher liegen, ausserdem jede Session, die länger als idle_seconds nicht benutzt wurde. Geschrieben
+    wird erst beim Verdrängen (write-back) und nur, wenn sich die Session seit dem letzten Auslagern
+    geändert hat; get() lädt ausgelagerte Sessions transparent zurück. close() lagert beim Beenden alle
+    geänderten Sessions aus, nach einem Neustart sind sie wieder da.
+
+    Eine Datei pro Session (<dir>/<2 Zeichen>/<id>.z, ~1-3 KB bei 50 Nachrichten); Anzahl und IDs kommen
+    aus dem Verzeichnis, damit auch der Index nicht mit der Zahl der Sessions wächst.
+    """
+
+    name = 'spill'
+
+    def __init__(self, directory, cache_size=1000, cache_mb=0, idle_seconds=0):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()  # serialisiert das Auslagern: zuletzt geschrieben = neuester Stand
+        self._hot = HotSet(cache_size, int(cache_mb * 1024 * 1024), idle_seconds)
+        self._dirty = set()  # Sessions im Hot-Set, die seit dem letzten Auslagern geändert wurden
+        self._unspilled = set()  # Sessions, von denen es noch keine Datei gibt
+        self._stats = {'reads': 0, 'cache_hits': 0, 'reloads': 0, 'misses': 0, 'writes': 0, 'spilled': 0,
+                       'spilled_bytes': 0, 'dropped_clean': 0, 'reload_s': 0.0, 'spill_s': 0.0}
+        os.makedirs(directory, exist_ok=True)
+        self._on_disk = sum(1 for _ in self._files())
+
+    # ---------- Lesen ----------
+
+    def get(self, session_id, default=None):
+        with self._lock:
+            self._stats['reads'] += 1
+            session = self._hot.get(session_id)
+            if session is not None:
+                self._stats['cache_hits'] += 1
+                return session
+            session = self._hot.revive(session_id)
+            if session is not None:
+                self._dirty.add(session_id)  # ob die Datei schon geschrieben ist, ist offen
+                evicted = self._hot.put(session)
+        if session is not None:
+            self._spill(evicted)
+            return session
+
+        path = self._path(session_id)
+        started = time.perf_counter()
+        try:
+            with open(path, 'rb') as f:
+                session = _unpack(f.read())
+        except (FileNotFoundError, TypeError):
+            session = None
+        with self._lock:
+            if session is None:
+                self._stats['misses'] += 1
+                return default
+            self._stats['reloads'] += 1
+            self._stats['reload_s'] += time.perf_counter() - started
+            # Hat ein anderer Request die Session inzwischen geladen, gilt dessen Objekt
+            current = self._hot.get(session_id) or self._hot.revive(session_id)
+            if current is not None:
+                session = current
+            evicted = self._hot.put(session)
+        self._spill(evicted)
+        return session
+
+    def __getitem__(self, session_id):
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+
+    def __contains__(self, session_id):
+        with self._lock:
+            if session_id in self._hot:
+                return True
+        path = self._path(session_id)
+        return path is not None and os.path.exists(path)
+
+    def __len__(self):
+        with self._lock:
+            return self._on_disk + len(self._unspilled)
+
+    def __iter__(self):
+        return iter(self.ids())
+
+    def ids(self):
+        with self._lock:
+            hot = list(self._hot.sessions())
+        return hot + sorted({os.path.basename(path)[:-2] for path in self._files()} - set(hot))
+
+    def values(self):
+        return [session for session in map(self.get, self.ids()) if session is not None]
+
+    def items(self):
+        return [(session['id'], session) for session in self.values()]
+
+    def cached(self):
+        with self._lock:
+            return self._hot.sessions()
+
+    # ---------- Schreiben ----------
+
+    def add(self, session):
+        with self._lock:
+            self._dirty.add(session['id'])
+            self._unspilled.add(session['id'])
+            evicted = self._hot.put(session)
+        self._spill(evicted)
+
+    def save(self, session):
+        with self._lock:
+            self._stats['writes'] += 1
+            self._dirty.add(session['id'])
+            # Schon verdrängt (der Request hielt die Session noch): direkt auf die Platte
+            evicted = self._hot.update(session) if session['id'] in self._hot else [session]
+        self._spill(evicted)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._hot.pop(session_id)
+            self._dirty.discard(session_id)
+            unspilled = session_id in self._unspilled
+            self._unspilled.discard(session_id)
+        path = self._path(session_id)
+        with self._io_lock:
+            try:
+                os.remove(path)
+            except (FileNotFoundError, TypeError):
+                return unspilled
+        with self._lock:
+            self._on_disk -= 1
+        return True
+
+    def close(self):
+        """Alle geänderten Sessions auslagern (beim Beenden)"""
+        with self._lock:
+            dirty = [session for session_id, session in self._hot.sessions().items() if session_id in self._dirty]
+            self._dirty.clear()
+        self._write(dirty)
+
+    # ---------- Kennzahlen ----------
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            hot = self._hot.metrics()
+            sessions = self._on_disk + len(self._unspilled)
+            dirty = len(self._dirty)
+            hot_messages = sum(len(session['messages']) for session in self._hot.sessions().values())
+        return {
+            'store': self.name,
+            'path': self.directory,
+            'sessions': sessions,
+            'on_disk': sessions - len(self._unspilled),
+            'cached': hot['hot'],
+            'hot_messages': hot_messages,  # Gesamtzahl hiesse alle Dateien lesen
+            'cache_size': hot['max_sessions'],
+            'dirty': dirty,
+            'reads': stats['reads'],
+            'cache_hit_rate': round(stats['cache_hits'] / stats['reads'], 3) if stats['reads'] else 0,
+            'reloads': stats['reloads'],
+            'misses': stats['misses'],
+            'writes': stats['writes'],
+            'spilled': stats['spilled'],
+            'spilled_kb_avg': round(stats['spilled_bytes'] / stats['spilled'] / 1024, 1) if stats['spilled'] else 0,
+            'dropped_clean': stats['dropped_clean'],
+            'avg_reload_ms': round(stats['reload_s'] / stats['reloads'] * 1000, 2) if stats['reloads'] else 0,
+            'avg_spill_ms': round(stats['spill_s'] / stats['spilled'] * 1000, 2) if stats['spilled'] else 0,
+            'hot_set': hot
+        }
+
+    # ---------- intern ----------
+
+    def _path(self, session_id):
+        if not isinstance(session_id, str) or not SESSION_ID.fullmatch(session_id):
+            return None
+        return os.path.join(self.directory, session_id[:2], session_id + '.z')
+
+    def _files(self):
+        for shard in os.scandir(self.directory):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith('.z'):
+                        yield entry.path
+
+    def _spill(self, evicted):
+        """Verdrängte Sessions auslagern - nur die geänderten, unveränderte liegen schon auf der Platte"""
+        if not evicted:
+            return
+        with self._lock:
+            evicted = [session for session in evicted if session['id'] not in self._hot]  # nicht schon zurück
+            dirty = [session for session in evicted if session['id'] in self._dirty]
+            self._dirty.difference_update(session['id'] for session in dirty)
+            self._stats['dropped_clean'] += len(evicted) - len(dirty)
+        self._write(dirty)
+
+    def _write(self, sessions):
+        for session in sessions:
+            path = self._path(session['id'])
+            if path is None:
+                raise ValueError(f"Ungültige Session-ID für den Spill-Store: {session['id']!r}")
+            with self._io_lock:
+                started = time.perf_counter()
+                blob = _pack(session)  # erst hier kodieren: immer der aktuelle Stand des Objekts
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path + '.tmp', 'wb') as f:
+                    f.write(blob)
+                os.replace(path + '.tmp', path)
+                with self._lock:
+                    if session['id'] in self._unspilled:
+                        self._unspilled.discard(session['id'])
+                        self._on_disk += 1
+                    self._stats['spilled'] += 1
+                    self._stats['spilled_bytes'] += len(blob)
+                    self._stats['spill_s'] += time.perf_counter() - started
+
+
+class SQLiteSessionStore:
+    """Sessions, Nachrichten und Phasen-Fortschritt in SQLite (WAL) mit LRU-Cache für aktive Sessions
+
+    save() schreibt pro Turn nur die neuen Nachrichten (gemerkt als Anzahl bereits gespeicherter) sowie
+    Session-Zeile und Fortschritt - alles in einer Transaktion.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, cache_size=1000, cache_mb=0, idle_seconds=0):
+        self.path = path
+        self.cache_size = cache_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cache = HotSet(cache_size, int(cache_mb * 1024 * 1024), idle_seconds)
+        self._saved = {}  # session_id -> Anzahl Nachrichten, die schon in der DB stehen
+        self._stats = {'reads': 0, 'cache_hits': 0, 'misses': 0, 'writes': 0, 'messages_written': 0,
+                       'read_s': 0.0, 'write_s': 0.0}
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    # ---------- Lesen ----------
+
+    def get(self, session_id, default=None):
+        with self._lock:
+            self._stats['reads'] += 1
+            session = self._cache.get(session_id)
+            if session is not None:
+                self._stats['cache_hits'] += 1
+                return session
+            session = self._cache.revive(session_id)
+            if session is not None:
+                self._remember(session, 0)  # gespeicherter Stand unbekannt: nächstes save schreibt alle neu
+                return session
+
+        started = time.perf_counter()
+        session = self._load(session_id)
+        with self._lock:
+            self._stats['read_s'] += time.perf_counter() - started
+            if session is None:
+                self._stats['misses'] += 1
+                return default
+            # Hat ein anderer Request die Session inzwischen geladen, gilt dessen Objekt
+            current = self._cache.get(session_id)
+            if current is not None:
+                return current
+            current = self._cache.revive(session_id) or session
+            self._remember(current, len(session['messages']))
+        return current
+
+    def __getitem__(self, session_id):
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+
+    def __contains__(self, session_id):
+        with self._lock:
+            if session_id in self._cache:
+                return True
+        return self._conn().execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is not None
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def __iter__(self):
+        return iter(self.ids())
+
+    def ids(self):
+        return [row[0] for row in self._conn().execute("SELECT id FROM sessions ORDER BY created")]
+
+    def values(self):
+        return [session for session in map(self.get, self.ids()) if session is not None]
+
+    def items(self):
+        return [(session['id'], session) for session in self.values()]
+
+    def cached(self):
+        with self._lock:
+            return self._cache.sessions()
+
+    # ---------- Schreiben ----------
+
+    def add(self, session):
+        with self._lock:
+            self._remember(session, 0)
+        self.save(session)
+
+    def save(self, session):
+        session_id = session['id']
+        with self._lock:
+            saved = self._saved.get(session_id, 0)
+        messages = session['messages'][saved:]
+        extra = {k: v for k, v in session.items()
+                 if k not in SESSION_COLUMNS and k not in ('messages', 'phase_progress', 'email')}
+
+        started = time.perf_counter()
+        conn = self._conn()
+        with self._transaction(conn):
+            conn.execute(UPSERT_SESSION, (
+                session_id, session.get('thread_id'), session['current_phase'], session['total_progress'],
+                session['created'].timestamp(), time.time(), session.get('email'), _json(extra)))
+            conn.executemany(UPSERT_PROGRESS, [(session_id, phase, progress)
+                                               for phase, progress in session['phase_progress'].items()])
+            conn.executemany(INSERT_MESSAGE, [
+                (session_id, saved + offset, m['sender'], m['message'], m.get('timestamp'), m.get('phase'),
+                 _json({k: v for k, v in m.items() if k not in MESSAGE_COLUMNS}))
+                for offset, m in enumerate(messages)])
+        with self._lock:
+            if session_id in self._cache:
+                self._saved[session_id] = saved + len(messages)
+                self._release(self._cache.update(session))
+            self._stats['writes'] += 1
+            self._stats['messages_written'] += len(messages)
+            self._stats['write_s'] += time.perf_counter() - started
+
+    def delete(self, session_id):
+        with self._lock:
+            self._cache.pop(session_id)
+            self._saved.pop(session_id, None)
+        conn = self._conn()
+        with self._transaction(conn):
+            conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM phase_progress WHERE session_id = ?", (session_id,))
+            deleted = conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount
+        return deleted > 0
+
+    # ---------- Kennzahlen ----------
+
+    def metrics(self):
+        conn = self._conn()
+        sessions = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        messages = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        with self._lock:
+            stats = dict(self._stats)
+            hot = self._cache.metrics()
+        loads = stats['reads'] - stats['cache_hits']
+        return {
+            'store': self.name,
+            'path': self.path,
+            'sessions': sessions,
+            'messages': messages,
+            'cached': hot['hot'],
+            'cache_size': self.cache_size,
+            'reads': stats['reads'],
+            'cache_hit_rate': round(stats['cache_hits'] / stats['reads'], 3) if stats['reads'] else 0,
+            'misses': stats['misses'],
+            'reloads': loads - stats['misses'],
+            'evicted': hot['evicted'],
+            'writes': stats['writes'],
+            'messages_written': stats['messages_written'],
+            'avg_load_ms': round(stats['read_s'] / loads * 1000, 2) if loads else 0,
+            'avg_write_ms': round(stats['write_s'] / stats['writes'] * 1000, 2) if stats['writes'] else 0,
+            'hot_set': hot
+        }
+
+    # ---------- intern ----------
+
+    def _load(self, session_id):
+        conn = self._conn()
+        row = conn.execute(SELECT_SESSION, (session_id,)).fetchone()
+        if row is None:
+            return None
+        sid, thread_id, current_phase, total_progress, created, email, extra = row
+        session = _restore_extra(json.loads(extra)) if extra else {}
+        session.update({
+            'id': sid,
+            'thread_id': thread_id,
+            'current_phase': current_phase,
+            'phase_progress': {phase: progress for phase, progress in conn.execute(SELECT_PROGRESS, (sid,))},
+            'total_progress': total_progress,
+            'messages': [],
+            'created': created
+        })
+        if email:
+            session['email'] = email
+        for sender, message, timestamp, phase, extra in conn.execute(SELECT_MESSAGES, (sid,)):
+            entry = {'sender': sender, 'message': message, 'timestamp': timestamp, 'phase': phase}
+            if extra:
+                entry.update(json.loads(extra))
+            session['messages'].append(Message.from_dict(entry))
+        return Session(**session)
+
+    def _remember(self, session, saved):
+        # Lock muss gehalten werden
+        self._saved[session['id']] = saved
+        self._release(self._cache.put(session))
+
+    def _release(self, evicted):
+        # Lock muss gehalten werden; verdrängte Sessions stehen nach ihrem letzten save() schon in der DB
+        for session in evicted:
+            self._saved.pop(session['id'], None)
+
+    def _conn(self):
+        # sqlite3-Verbindungen dürfen nicht zwischen Threads geteilt werden
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")  # mit WAL: sicher bei Absturz der App, schnell
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self, conn):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+
+class SessionConflict(Exception):
+    """Session liess sich wegen ständiger paralleler Änderungen nicht speichern"""
+
+
+def _encode(session):
+    data = {k: v for k, v in session.items() if k not in ('messages', 'phase_progress')}
+    data['phase_progress'] = dict(session['phase_progress'])
+    data['created'] = session['created'].timestamp()
+    return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def _decode(data, messages):
+    session = _restore_extra(json.loads(data))
+    session['messages'] = [Message.from_dict(json.loads(m)) for m in messages]
+    return Session(**session)
+
+
+class RedisSessionStore:
+    """Sessions in Redis, gemeinsam für alle gunicorn-Worker; Updates mit optimistischer Nebenläufigkeit
+
+    Pro Session ein Hash (data = JSON ohne Nachrichten, version) und eine Liste mit den Nachrichten.
+    save() beobachtet den Hash (WATCH) und schreibt nur, wenn seit dem Laden kein anderer Worker
+    gespeichert hat. Sonst wird dessen Stand mit den eigenen Änderungen zusammengeführt (neue Nachrichten
+    hinten angehängt, Fortschritt als Maximum, bei übrigen Feldern gilt der eigene Wert) und erneut versucht.
+    Lokal bleibt ein LRU-Cache; get() prüft mit einem HGET der Version, ob der Eintrag noch aktuell ist.
+    """
+
+    name = 'redis'
+
+    def __init__(self, client, prefix='coaching', cache_size=1000, cache_mb=0, idle_seconds=0, retries=5):
+        self.client = client
+        self.prefix = prefix
+        self.cache_size = cache_size
+        self.retries = retries
+        self._lock = threading.Lock()
+        self._cache = HotSet(cache_size, int(cache_mb * 1024 * 1024), idle_seconds)
+        self._known = {}  # session_id -> (Version, Anzahl gespeicherter Nachrichten) des lokalen Objekts
+        self._stats = {'reads': 0, 'cache_hits': 0, 'stale': 0, 'misses': 0, 'writes': 0, 'messages_written': 0,
+                       'conflicts': 0, 'merged': 0, 'read_s': 0.0, 'write_s': 0.0}
+
+    def _key(self, session_id, suffix=''):
+        return f"{self.prefix}:session:{session_id}{suffix}"
+
+    # ---------- Lesen ----------
+
+    def get(self, session_id, default=None):
+        with self._lock:
+            self._stats['reads'] += 1
+            cached = self._cache.get(session_id) or self._cache.revive(session_id)
+            known = self._known.get(session_id)  # fehlt bei einer wiederbelebten Session
+
+        started = time.perf_counter()
+        if cached is not None and known is not None:
+            version = self.client.hget(self._key(session_id), 'version')
+            if version is not None and int(version) == known[0]:
+                with self._lock:
+                    self._stats['cache_hits'] += 1
+                return cached
+
+        loaded = self._load(session_id)
+        with self._lock:
+            self._stats['read_s'] += time.perf_counter() - started
+            if loaded is None:
+                self._stats['misses'] += 1
+                self._forget(session_id)
+                return default
+            session, version = loaded
+            if cached is not None:
+                # Ein anderer Worker hat gespeichert: Stand ins vorhandene Objekt übernehmen (gleiche Identität)
+                self._stats['stale'] += 1
+                for key in [key for key in cached if key not in session]:
+                    del cached[key]
+                cached.update(session)
+                session = cached
+            self._remember(session, version, len(session['messages']))
+        return session
+
+    def __getitem__(self, session_id):
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+
+    def __contains__(self, session_id):
+        return bool(self.client.exists(self._key(session_id)))
+
+    def __len__(self):
+        return self.client.zcard(f"{self.prefix}:sessions")
+
+    def __iter__(self):
+        return iter(self.ids())
+
+    def ids(self):
+        return self.client.zrange(f"{self.prefix}:sessions", 0, -1)
+
+    def values(self):
+        return [session for session in map(self.get, self.ids()) if session is not None]
+
+    def items(self):
+        return [(session['id'], session) for session in self.values()]
+
+    def cached(self):
+        with self._lock:
+            return self._cache.sessions()
+
+    # ---------- Schreiben ----------
+
+    def add(self, session):
+        with self._lock:
+            self._remember(session, 0, 0)
+        self.save(session)
+
+    def save(self, session):
+        session_id = session['id']
+        key = self._key(session_id)
+        started = time.perf_counter()
+        for _ in range(self.retries):
+            with self._lock:
+                version, saved = self._known.get(session_id, (0, 0))
+            with self.client.pipeline() as pipe:
+                try:
+                    pipe.watch(key)
+                    current = int(pipe.hget(key, 'version') or 0)
+                    if current != version:
+                        remote = self._load(session_id, pipe)
+                        if remote is None:
+                            # Inzwischen gelöscht (z.B. DSGVO) - nicht wieder anlegen
+                            with self._lock:
+                                self._forget(session_id)
+                            return
+                        saved = self._merge(session, saved, remote[0])
+                        version = current
+                        with self._lock:
+                            self._stats['merged'] += 1
+                    messages = session['messages'][saved:]
+                    pipe.multi()
+                    pipe.hset(key, mapping={'data': _encode(session), 'version': version + 1})
+                    if messages:
+                        pipe.rpush(self._key(session_id, ':messages'),
+                                   *[json.dumps(dict(m), ensure_ascii=False, default=str) for m in messages])
+                        pipe.hincrby(f"{self.prefix}:stats", 'messages', len(messages))
+                    pipe.zadd(f"{self.prefix}:sessions", {session_id: session['created'].timestamp()})
+                    pipe.execute()
+                except WatchError:
+                    with self._lock:
+                        self._stats['conflicts'] += 1
+                    continue
+
+            with self._lock:
+                if session_id in self._cache:
+                    self._known[session_id] = (version + 1, saved + len(messages))
+                    self._release(self._cache.update(session))
+                self._stats['writes'] += 1
+                self._stats['messages_written'] += len(messages)
+                self._stats['write_s'] += time.perf_counter() - started
+            return
+        raise SessionConflict(f"Session {session_id} nach {self.retries} Versuchen nicht gespeichert")
+
+    def delete(self, session_id):
+        with self._lock:
+            self._forget(session_id)
+        messages = self.client.llen(self._key(session_id, ':messages'))
+        with self.client.pipeline() as pipe:
+            pipe.delete(self._key(session_id), self._key(session_id, ':messages'))
+            pipe.zrem(f"{self.prefix}:sessions", session_id)
+            pipe.hincrby(f"{self.prefix}:stats", 'messages', -messages)
+            deleted = pipe.execute()[0]
+        return deleted > 0
+
+    # ---------- Kennzahlen ----------
+
+    def metrics(self):
+        sessions = len(self)
+        messages = int(self.client.hget(f"{self.prefix}:stats", 'messages') or 0)
+        with self._lock:
+            stats = dict(self._stats)
+            hot = self._cache.metrics()
+        loads = stats['reads'] - stats['cache_hits']
+        return {
+            'store': self.name,
+            'sessions': sessions,
+            'messages': messages,
+            'cached': hot['hot'],
+            'cache_size': self.cache_size,
+            'reads': stats['reads'],
+            'cache_hit_rate': round(stats['cache_hits'] / stats['reads'], 3) if stats['reads'] else 0,
+            'stale': stats['stale'],
+            'misses': stats['misses'],
+            'reloads': loads - stats['misses'],
+            'evicted': hot['evicted'],
+            'writes': stats['writes'],
+            'messages_written': stats['messages_written'],
+            'conflicts': stats['conflicts'],
+            'merged': stats['merged'],
+            'avg_load_ms': round(stats['read_s'] / loads * 1000, 2) if loads else 0,
+            'avg_write_ms': round(stats['write_s'] / stats['writes'] * 1000, 2) if stats['writes'] else 0,
+            'hot_set': hot
+        }
+
+    # ---------- intern ----------
+
+    def _load(self, session_id, reader=None):
+        """(Session, Version) oder None; reader = beobachtende Pipeline (liest sofort) oder None"""
+        key, messages_key = self._key(session_id), self._key(session_id, ':messages')
+        if reader is None:
+            with self.client.pipeline() as pipe:
+                pipe.hgetall(key)
+                pipe.lrange(messages_key, 0, -1)
+                data, messages = pipe.execute()
+        else:
+            data, messages = reader.hgetall(key), reader.lrange(messages_key, 0, -1)
+        if not data:
+            return None
+        return _decode(data['data'], messages), int(data['version'])
+
+    def _merge(self, session, saved, remote):
+        """Stand eines anderen Workers übernehmen, eigene Änderungen darauf; liefert die neue saved-Anzahl"""
+        # Was schon in Redis steht, nicht doppelt anhängen (auch wenn saved nach Verdrängung aus dem Cache fehlt)
+        messages, remote_messages = session['messages'], remote['messages']
+        while (saved < min(len(messages), len(remote_messages))
+               and messages[saved] == remote_messages[saved]):
+            saved += 1
+        new = messages[saved:]
+        for key, value in remote.items():
+            session.setdefault(key, value)  # Felder, die nur der andere Worker gesetzt hat
+        progress = session['phase_progress']
+        for phase, value in remote['phase_progress'].items():
+            progress[phase] = max(value, progress.get(phase, 0))
+        session['current_phase'] = max(session['current_phase'], remote['current_phase'])
+        session['total_progress'] = max(session['total_progress'], remote['total_progress'])
+        messages[:] = remote_messages + new
+        return len(remote_messages)
+
+    def _remember(self, session, version, saved):
+        # Lock muss gehalten werden
+        self._known[session['id']] = (version, saved)
+        self._release(self._cache.put(session))
+
+    def _release(self, evicted):
+        # Lock muss gehalten werden
+        for session in evicted:
+            self._known.pop(session['id'], None)
+
+    def _forget(self, session_id):
+        # Lock muss gehalten werden
+        self._cache.pop(session_id)
+        self._known.pop(session_id, None)
+
+
+def create_session_store(name, **options):
+    """Store nach Namen (SESSION_STORE) erzeugen; cache_size, cache_mb, idle_seconds begrenzen das Hot-Set"""
+    limits = {key: options[key] for key in ('cache_size', 'cache_mb', 'idle_seconds') if key in options}
+    if name == MemorySessionStore.name:
+        return MemorySessionStore()
+    if name == SpillSessionStore.name:
+        return SpillSessionStore(options['directory'], **limits)
+    if name == SQLiteSessionStore.name:
+        return SQLiteSessionStore(options['path'], **limits)
+    if name == RedisSessionStore.name:
+        return RedisSessionStore(options['client'], **limits)
+    raise ValueError(f"Unbekannter Session-Store: {name}")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Gemeinsamer Zustand aller gunicorn-Worker in Redis: Job-Status, Abbruchwünsche, Zähler und Sperren
+
+Mit mehreren Workern landet der Status-Poll eines Jobs oft auf einem anderen Prozess als der Job
+selbst. AIJobQueue spiegelt deshalb jeden Job hierher; get() und cancel() finden ihn dann in jedem
+Worker. Über session_lock() serialisiert der TurnScheduler die Runs einer Session über alle Worker.
+Die Sessions selbst liegen im RedisSessionStore (session_store.py) auf derselben Verbindung.
+
+    redis_client = connect(os.getenv('REDIS_URL'))   # 'memory://' = In-Memory-Stand-in (fake_redis.py)
+    shared = SharedState(redis_client)
+    shared.incr('turns')
+
+redis-py wird nur für echte Redis-URLs gebraucht (pip install redis).
+"""
+import json
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import redis
+except ImportError:  # nur für redis:// nötig
+    redis = None
+
+from fake_redis import FakeRedis, WatchError
+
+_memory_clients = {}
+
+
+def connect(url):
+    """Redis-Client für die URL; 'memory://name' liefert pro Name einen In-Memory-Stand-in im Prozess"""
+    if url.startswith('memory://'):
+        return _memory_clients.setdefault(url, FakeRedis())
+    if redis is None:
+        raise RuntimeError(f"Für {url} wird das Paket 'redis' benötigt (pip install redis)")
+    return redis.Redis.from_url(url, decode_responses=True, socket_timeout=5, health_check_interval=30)
+
+
+class SharedState:
+    """Job-Status (mit Ablaufzeit), Abbruchwünsche, prozessübergreifende Zähler und Session-Sperren"""
+
+    def __init__(self, client, prefix='coaching'):
+        self.client = client
+        self.prefix = prefix
+
+    # ---------- Zähler ----------
+
+    def incr(self, name, amount=1):
+        return self.client.hincrby(f"{self.prefix}:counters", name, amount)
+
+    def counters(self):
+        return {name: int(value) for name, value in sorted(self.client.hgetall(f"{self.prefix}:counters").items())}
+
+    # ---------- Jobs ----------
+
+    def put_job(self, job, ttl):
+        """Job-Stand für alle Worker sichtbar machen; verschwindet ttl Sekunden nach dem letzten Update"""
+        self.client.set(f"{self.prefix}:job:{job['id']}", json.dumps(job, default=str), ex=int(ttl))
+
+    def get_job(self, job_id):
+        data = self.client.get(f"{self.prefix}:job:{job_id}")
+        return json.loads(data) if data else None
+
+    def request_cancel(self, job_id, ttl):
+        """Abbruch eines Jobs anfordern, der in einem anderen Worker läuft"""
+        self.client.set(f"{self.prefix}:job:{job_id}:cancel", 1, ex=int(ttl))
+
+    def cancel_requested(self, job_id):
+        return bool(self.client.exists(f"{self.prefix}:job:{job_id}:cancel"))
+
+    # ---------- Sperren ----------
+
+    @contextmanager
+    def session_lock(self, session_id, ttl):
+        """Sperre pro Session über alle Worker (SET NX mit Ablaufzeit); liefert die Wartezeit in Sekunden
+
+        Stirbt der Halter, gibt die Ablaufzeit die Sperre frei - ttl muss länger sein als ein Run dauern darf.
+        Freigegeben wird nur die eigene Sperre (Token), nicht die eines Nachfolgers nach Ablauf.
+        """
+        key = f"{self.prefix}:lock:session:{session_id}"
+        token = uuid.uuid4().hex
+        started = time.monotonic()
+        interval = 0.05
+        while not self.client.set(key, token, nx=True, ex=int(ttl)):
+            time.sleep(interval)
+            interval = min(interval * 2, 0.5)
+        try:
+            yield time.monotonic() - started
+        finally:
+            with self.client.pipeline() as pipe:
+                try:
+                    pipe.watch(key)
+                    if pipe.get(key) == token:
+                        pipe.multi()
+                        pipe.delete(key)
+                        pipe.execute()
+                except WatchError:
+                    pass  # abgelaufen und inzwischen von einem anderen Worker gehalten
@@ -0,0 +1,25 @@
+"""Gemeinsame Fixtures: Module aus deployment/ importierbar machen, Web-App gegen den Fake-Server"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def fake_openai():
+    from fake_assistants import start_server, REPLY_TEMPLATES
+    fake = start_server(queued='fixed:0', in_progress='fixed:0.05', templates=REPLY_TEMPLATES)
+    yield fake
+    fake.shutdown()
+
+
+@pytest.fixture(scope='session')
+def webapp(fake_openai, tmp_path_factory):
+    """coaching_webapp_real mit Memory-Store, ohne Cache und Thread-Pool (einmal pro Testlauf importiert)"""
+    os.environ.update(OPENAI_BASE_URL=fake_openai.base_url, OPENAI_API_KEY='fake', ASSISTANT_ID='asst_fake',
+                      SESSION_STORE='memory', AI_CACHE_SIZE='0', THREAD_POOL_HIGH='0', AI_BACKEND='assistants',
+                      TRANSCRIPT_DIR=str(tmp_path_factory.mktemp('transcripts')))
+    import coaching_webapp_real
+    return coaching_webapp_real
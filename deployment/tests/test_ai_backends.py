@@ -0,0 +1,60 @@
+"""Streams der AI-Backends: Deadline und Abbruch greifen auch, wenn nichts mehr vom Server kommt"""
+import threading
+import time
+
+import pytest
+from openai import OpenAI
+
+from ai_backends import AssistantsBackend, ChatCompletionsBackend
+from fake_assistants import start_server, REPLY_TEMPLATES
+from run_waiter import RunCancelled, RunTimeout, RunWaiter
+
+
+@pytest.fixture
+def stalled_server():
+    """Fake-Server, bei dem das erste Token 30s auf sich warten lässt"""
+    fake = start_server(queued='fixed:30', in_progress='fixed:0.1', templates=REPLY_TEMPLATES)
+    yield fake
+    fake.shutdown()
+
+
+def session(thread_id=None):
+    return {'id': 's', 'thread_id': thread_id, 'current_phase': 1, 'messages': []}
+
+
+def consume(stream, cancel_after=None, cancel=None):
+    if cancel_after is not None:
+        threading.Timer(cancel_after, cancel.set).start()
+    started = time.monotonic()
+    with pytest.raises((RunCancelled, RunTimeout)) as error:
+        list(stream)
+    return error.type, time.monotonic() - started
+
+
+def test_chat_stream_times_out_without_chunks(stalled_server):
+    client = OpenAI(api_key='fake', base_url=stalled_server.base_url, max_retries=0)
+    backend = ChatCompletionsBackend(client, 'gpt-4o-mini', 'System', lambda s: 'Phase 1', deadline=1)
+    kind, seconds = consume(backend.stream(session(), 'Hallo'))
+    assert kind is RunTimeout and seconds < 3
+
+
+def test_chat_stream_cancel_without_chunks(stalled_server):
+    client = OpenAI(api_key='fake', base_url=stalled_server.base_url, max_retries=0)
+    backend = ChatCompletionsBackend(client, 'gpt-4o-mini', 'System', lambda s: 'Phase 1', deadline=20)
+    cancel = threading.Event()
+    kind, seconds = consume(backend.stream(session(), 'Hallo', cancel=cancel), 0.3, cancel)
+    assert kind is RunCancelled and seconds < 2
+
+
+def test_assistants_stream_cancels_queued_run(stalled_server):
+    client = OpenAI(api_key='fake', base_url=stalled_server.base_url, max_retries=0)
+    backend = AssistantsBackend(client, 'asst_fake', RunWaiter(deadline=1), lambda s: 'Phase 1')
+    kind, seconds = consume(backend.stream(session(client.beta.threads.create().id), 'Hallo'))
+    assert kind is RunTimeout and seconds < 3
+    assert [run['status'] for run in stalled_server.api.runs.values()] == ['cancelled']
+
+
+def test_chat_stream_completes(fake_openai):
+    client = OpenAI(api_key='fake', base_url=fake_openai.base_url, max_retries=0)
+    backend = ChatCompletionsBackend(client, 'gpt-4o-mini', 'System', lambda s: 'Phase 1', deadline=5)
+    assert ''.join(backend.stream(session(), 'Hallo'))
@@ -0,0 +1,64 @@
+import threading
+import time
+
+from ai_jobs import AIJobQueue
+
+
+class RecordingShared:
+    """Stand-in für SharedState, der prüft, dass die Queue beim Redis-Zugriff ihren Lock nicht hält"""
+
+    def __init__(self):
+        self.queue = None
+        self.published = []
+        self.locked = []
+
+    def put_job(self, job, ttl):
+        self.locked.append(self.queue._lock.locked())
+        self.published.append(job['status'])
+
+    def incr(self, name):
+        self.locked.append(self.queue._lock.locked())
+
+    def cancel_requested(self, job_id):
+        self.locked.append(self.queue._lock.locked())
+        return False
+
+    def counters(self):
+        return {}
+
+
+def wait_done(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while queue.get(job_id)['status'] in ('queued', 'running'):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return queue.get(job_id)
+
+
+def test_job_state_is_published_outside_the_queue_lock():
+    shared = RecordingShared()
+    queue = AIJobQueue(workers=1, shared=shared)
+    shared.queue = queue
+    gate = threading.Event()
+
+    blocker = queue.submit(gate.wait, 5)
+    waiting = queue.submit(lambda: 'nie')
+    assert queue.cancel(waiting)
+    gate.set()
+
+    assert wait_done(queue, blocker)['result'] is True
+    assert wait_done(queue, waiting)['status'] == 'cancelled'
+    assert shared.published.count('done') == 1
+    assert 'cancelled' in shared.published
+    assert shared.locked and not any(shared.locked)
+
+
+def test_metrics_percentiles():
+    queue = AIJobQueue(workers=2)
+    for job_id in [queue.submit(time.sleep, 0.01) for _ in range(5)]:
+        wait_done(queue, job_id)
+
+    metrics = queue.metrics()
+    assert metrics['completed'] == 5
+    assert 0.01 <= metrics['run_p95'] < 1
+    assert metrics['wait_p95'] >= 0
@@ -0,0 +1,91 @@
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+
+
+class ClientGone(Exception):
+    pass
+
+
+def fail():
+    raise ConnectionError('OpenAI nicht erreichbar')
+
+
+def trip(breaker):
+    for _ in range(breaker.min_calls):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.state == OPEN
+
+
+def expire(breaker):
+    breaker._opened_at -= breaker.open_for
+
+
+def test_trips_on_failure_rate_and_rejects_calls():
+    breaker = CircuitBreaker(window=10, min_calls=4, failure_rate=0.5)
+    breaker.call(lambda: 'ok')
+    breaker.call(lambda: 'ok')
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == CLOSED  # erst 3 Aufrufe im Fenster
+
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen) as rejected:
+        breaker.call(lambda: 'ok')
+    assert 0 < rejected.value.retry_in <= breaker.open_for
+    metrics = breaker.metrics()
+    assert (metrics['trips'], metrics['rejected'], metrics['failures']) == (1, 1, 2)
+    assert metrics['last_trip']['reason'] == 'Fehlerquote 50%'
+
+
+def test_trips_on_slow_calls():
+    breaker = CircuitBreaker(min_calls=3, slow_call=1.0, slow_rate=0.5)
+    breaker.record(True, 0.1)
+    breaker.record(True, 2.0)
+    breaker.record(True, 3.0)
+    assert breaker.state == OPEN
+    assert breaker.metrics()['slow'] == 2
+
+
+def test_successful_probe_closes_the_breaker():
+    recovered = []
+    breaker = CircuitBreaker(min_calls=2, half_open_probes=1, on_close=lambda: recovered.append(True))
+    trip(breaker)
+    expire(breaker)
+
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # nur ein Probe-Platz
+    breaker.record(True, 0.1)
+
+    assert breaker.state == CLOSED
+    assert recovered == [True]
+    assert breaker.metrics()['recoveries'] == 1
+
+
+def test_failed_probe_opens_again():
+    breaker = CircuitBreaker(min_calls=2)
+    trip(breaker)
+    expire(breaker)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    assert breaker.metrics()['last_trip']['reason'] == 'Probe fehlgeschlagen'
+
+
+def test_ignored_exception_frees_the_probe_without_verdict():
+    breaker = CircuitBreaker(min_calls=2, ignore=(ClientGone,))
+    trip(breaker)
+    expire(breaker)
+
+    def abort():
+        raise ClientGone
+
+    with pytest.raises(ClientGone):
+        breaker.call(abort)
+    assert breaker.state == HALF_OPEN
+    assert breaker.call(lambda: 'ok') == 'ok'
+    assert breaker.state == CLOSED
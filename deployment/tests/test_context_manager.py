@@ -0,0 +1,58 @@
+"""ContextManager: Zusammenfassung im Hintergrund, Speichern danach, Kontext für den nächsten Turn"""
+import threading
+import time
+
+from context_manager import ContextManager
+from models import Message, Sender, Session
+
+
+def session_with_turns(turns):
+    session = Session('s1', 'thread_1')
+    for index in range(turns):
+        session['messages'].extend([Message(Sender.USER, f"Frage {index}", phase=1),
+                                    Message(Sender.ASSISTANT, f"Antwort {index}", phase=1)])
+    return session
+
+
+def test_summary_is_saved_and_used():
+    saved = threading.Event()
+    calls = []
+    manager = ContextManager(lambda previous, text, phase: calls.append(text) or f"Kurz ({phase})",
+                             keep_turns=2, batch_turns=2, save=lambda session: saved.set())
+    session = session_with_turns(6)
+    manager.after_turn(session)
+    assert saved.wait(5)
+
+    state = session['context']
+    assert state['summarized'] == 8  # 6 Turns - 2 wörtlich behaltene = 4 Turns zusammengefasst
+    assert 'Coachee: Frage 0' in calls[0] and 'Frage 4' not in calls[0]
+    summary, recent = manager.build(session, 'Neu')
+    assert summary.endswith('Phase 1: Kurz (1)')
+    assert [m['message'] for m in recent] == ['Frage 4', 'Antwort 4', 'Frage 5', 'Antwort 5']
+    assert manager.metrics()['summaries'] == 1
+
+
+def test_failed_summary_keeps_turns_and_skips_save():
+    saved = []
+    done = threading.Event()
+
+    def failing(previous, text, phase):
+        done.set()
+        raise RuntimeError('API weg')
+
+    manager = ContextManager(failing, keep_turns=2, batch_turns=2, save=saved.append)
+    session = session_with_turns(6)
+    manager.after_turn(session)
+    assert done.wait(5)
+    deadline = time.monotonic() + 5
+    while manager.metrics()['pending'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert saved == [] and session['context']['summarized'] == 0
+    assert manager.metrics()['errors'] == 1
+
+
+def test_short_sessions_are_not_summarized():
+    manager = ContextManager(lambda *args: 'x', keep_turns=4, save=lambda session: None)
+    session = session_with_turns(5)
+    manager.after_turn(session)
+    assert manager.metrics()['pending'] == 0
@@ -0,0 +1,80 @@
+"""Nachgeholte Turns (Circuit Breaker) zusammen mit Chat-Turns im Turn-Scheduler"""
+import threading
+import time
+
+from models import Sender
+
+
+def wait_pending(scheduler, session_id, count, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with scheduler._lock:
+            state = scheduler._sessions.get(session_id)
+            if state and len(state['pending']) >= count:
+                return
+        time.sleep(0.01)
+    raise AssertionError(f"{count} wartende Turns nicht erreicht")
+
+
+def test_chat_turn_coalesced_into_deferred_replay(webapp, monkeypatch):
+    session = webapp.sessions[webapp.create_session()]
+    release = threading.Event()
+    prompts = []
+
+    def get_ai_response(thread_id, message, session, cancel=None):
+        prompts.append(message)
+        if message == 'Erster Chat':
+            release.wait(5)
+        return f"Antwort auf: {message}"
+
+    monkeypatch.setattr(webapp, 'get_ai_response', get_ai_response)
+    results = {}
+    first = threading.Thread(target=lambda: results.update(first=webapp.run_chat_turn(session, 'Erster Chat')))
+    first.start()
+    while not prompts:
+        time.sleep(0.01)
+
+    # Während des ersten Runs: Chat-Turn, danach der nachgeholte Turn (neueste Nachricht = leader)
+    chat = threading.Thread(target=lambda: results.update(chat=webapp.run_chat_turn(session, 'Zweiter Chat')))
+    chat.start()
+    wait_pending(webapp.turn_scheduler, session['id'], 1)
+    replay = threading.Thread(target=lambda: results.update(replay=webapp.answer_deferred_turns(
+        session, [{'session_id': session['id'], 'message': 'Vorgemerkt'}])))
+    replay.start()
+    wait_pending(webapp.turn_scheduler, session['id'], 2)
+    release.set()
+    for thread in (first, chat, replay):
+        thread.join(5)
+
+    reply = 'Antwort auf: Zweiter Chat\n\nVorgemerkt'
+    assert prompts == ['Erster Chat', 'Zweiter Chat\n\nVorgemerkt']
+    assert results['chat']['coalesced'] is True
+    assert results['chat']['response'] == reply
+    assert results['chat']['progress']['current_phase'] == session['current_phase']
+    assert results['replay'] == {'answered': 1}
+
+    stored = [(m['sender'], m['message']) for m in session['messages']]
+    assert stored[-2:] == [(Sender.USER, 'Zweiter Chat'), (Sender.ASSISTANT, reply)]
+    assert session['messages'][-1]['deferred'] is True
+    logged = [bytes(text).decode('utf-8') for *_, text in webapp.transcript_log.records(session['id'])]
+    assert logged[-2:] == ['Zweiter Chat', reply]
+
+
+def test_stream_chat_coalesced_into_deferred_replay(webapp, monkeypatch):
+    session = webapp.sessions[webapp.create_session()]
+    monkeypatch.setattr(webapp, 'get_ai_response', lambda thread_id, message, session, cancel=None: 'Nachgeholt')
+    with webapp.turn_scheduler.turn(session, 'Blockiert') as blocker:
+        events = webapp.stream_chat_events(session, 'Gestreamt')
+        streamed = []
+        stream = threading.Thread(target=lambda: streamed.extend(events))
+        stream.start()
+        wait_pending(webapp.turn_scheduler, session['id'], 1)
+        replay = threading.Thread(target=webapp.answer_deferred_turns,
+                                  args=(session, [{'session_id': session['id'], 'message': 'Vorgemerkt'}]))
+        replay.start()
+        wait_pending(webapp.turn_scheduler, session['id'], 2)
+        blocker.result = {'response': 'frei', 'progress': None}
+    stream.join(5)
+    replay.join(5)
+    assert streamed and '"coalesced": true' in streamed[-1] and 'Nachgeholt' in streamed[-1]
+    assert [m['message'] for m in session['messages']][-2:] == ['Gestreamt', 'Nachgeholt']
@@ -0,0 +1,59 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from models import Message, PhaseProgress, Sender, Session
+
+
+def test_message_reads_like_the_old_dict():
+    message = Message('user', 'Hallo', '2026-01-05T10:30:00', phase=2)
+
+    assert message.sender is Sender.USER
+    assert dict(message) == {'sender': 'user', 'message': 'Hallo', 'timestamp': '2026-01-05T10:30:00', 'phase': 2}
+    assert 'deferred' not in message
+    assert Message.from_dict(message) is message
+    deferred = Message.from_dict({'sender': 'assistant', 'message': 'Später', 'deferred': True})
+    assert deferred['deferred'] is True and len(deferred) == 5
+    with pytest.raises(ValueError):
+        Message('system', 'nicht erlaubt')
+
+
+def test_phase_progress_is_clamped_and_keyed_by_phase():
+    progress = PhaseProgress({'1': 40, 2: 250})
+    progress[3] = -5
+
+    assert progress.to_dict() == {1: 40, 2: 100, 3: 0, 4: 0, 5: 0}
+    with pytest.raises(KeyError):
+        progress[6] = 10
+    with pytest.raises(TypeError):
+        del progress[1]
+
+
+def test_session_round_trips_through_json():
+    session = Session('s1', 'thread_1', current_phase=2, phase_progress={1: 100, 2: 30},
+                      messages=[{'sender': 'user', 'message': 'Hallo', 'phase': 1}],
+                      created='2026-01-05T10:00:00', email='coachee@example.com')
+    session['messages'].append(Message(Sender.ASSISTANT, 'Willkommen', phase=1))
+
+    data = json.loads(json.dumps(session.to_dict()))
+    restored = Session.from_dict(data)
+
+    assert data['created'] == '2026-01-05T10:00:00'
+    assert restored['created'] == datetime(2026, 1, 5, 10, 0)
+    assert restored['phase_progress'] == {1: 100, 2: 30, 3: 0, 4: 0, 5: 0}
+    assert [m['message'] for m in restored['messages']] == ['Hallo', 'Willkommen']
+    assert restored['email'] == 'coachee@example.com'
+    assert json.loads(json.dumps(restored.to_dict())) == data
+
+
+def test_session_optional_fields():
+    session = Session('s2')
+
+    assert session.extra is None and session.get('email') is None
+    session.setdefault('abandoned_turns', []).append('turn')
+    assert session['abandoned_turns'] == ['turn'] and set(session) >= {'id', 'abandoned_turns'}
+    del session['abandoned_turns']
+    assert session.extra is None
+    with pytest.raises(KeyError):
+        del session['id']
@@ -0,0 +1,83 @@
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter
+
+
+class FakeClock:
+    """Ersetzt das time-Modul im Limiter: sleep() lässt die Zeit nur vorrücken"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def limiter(tmp_path, clock):
+    return RateLimiter(str(tmp_path / 'rate.db'), rpm=60, tpm=6000)
+
+
+def test_bucket_refills_at_the_configured_rate(limiter, clock):
+    for _ in range(60):
+        assert limiter._try_acquire(0, 'interactive') == 0
+    assert limiter._try_acquire(0, 'interactive') == pytest.approx(1.0)
+
+    clock.now += 0.5
+    assert limiter._try_acquire(0, 'interactive') == pytest.approx(0.5)
+    clock.now += 0.5
+    assert limiter._try_acquire(0, 'interactive') == 0
+
+    # Nach langer Pause nie mehr als die Kapazität
+    clock.now += 3600
+    assert limiter.levels()['requests']['level'] == 60
+
+
+def test_acquire_sleeps_until_tokens_are_refilled(limiter, clock):
+    limiter.acquire(6000)
+    limiter.acquire(1500)
+
+    # 1500 Tokens bei 100 Tokens/s: 15 s Wartezeit in Schritten von höchstens 1 s
+    assert sum(clock.slept) == pytest.approx(15)
+    assert max(clock.slept) <= 1
+    stats = limiter.levels()['lanes']['interactive']
+    assert (stats['acquired'], stats['waited'], stats['overflows']) == (2, 1, 0)
+
+
+def test_batch_lane_keeps_the_reserve_and_yields_to_interactive(limiter, clock):
+    for _ in range(45):
+        assert limiter._try_acquire(0, 'batch') == 0
+    # 25 % Reserve: die Batch-Spur wartet, die interaktive nicht
+    assert limiter._try_acquire(0, 'batch') > 0
+    for _ in range(15):
+        assert limiter._try_acquire(0, 'interactive') == 0
+
+    assert limiter._try_acquire(0, 'interactive') == pytest.approx(1.0)
+    assert limiter.levels()['interactive_waiting']
+    # Solange interaktive Requests warten, pausiert die Batch-Spur ganz
+    assert limiter._try_acquire(0, 'batch') == pytest.approx(1.0)
+    clock.now += 1
+    assert not limiter.levels()['interactive_waiting']
+    # Danach wartet sie, bis der Bucket wieder über der Reserve (15 Requests) steht
+    assert limiter._try_acquire(0, 'batch') == pytest.approx(15.0)
+
+def test_adjust_corrects_the_token_estimate(limiter):
+    limiter.acquire(1000)
+    limiter.adjust(500)
+    assert limiter.levels()['tokens']['level'] == pytest.approx(4500)
@@ -0,0 +1,51 @@
+from types import SimpleNamespace
+
+import response_cache
+from response_cache import ResponseCache, normalize
+
+
+def test_normalized_exact_hits_per_phase():
+    cache = ResponseCache()
+    cache.put(1, 'Hallo, wie geht es?', 'Willkommen!')
+
+    assert normalize('  HALLO  wie geht es ?! ') == 'hallo wie geht es'
+    assert cache.get(1, 'hallo   wie geht es') == 'Willkommen!'
+    assert cache.get(2, 'Hallo, wie geht es?') is None
+    metrics = cache.metrics()
+    assert (metrics['hits'], metrics['misses'], metrics['hit_rate']) == (1, 1, 0.5)
+    assert metrics['top'][0] == {'phase': 1, 'message': 'hallo wie geht es', 'hits': 1}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put(1, 'a', 'A')
+    cache.put(1, 'b', 'B')
+    assert cache.get(1, 'a') == 'A'
+    cache.put(1, 'c', 'C')
+
+    assert cache.get(1, 'b') is None
+    assert (cache.get(1, 'a'), cache.get(1, 'c')) == ('A', 'C')
+    assert cache.metrics()['evictions'] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache, 'time', SimpleNamespace(time=lambda: now[0]))
+    cache = ResponseCache(ttl=60)
+    cache.put(1, 'hallo', 'Willkommen!')
+    now[0] += 59
+    assert cache.get(1, 'hallo') == 'Willkommen!'
+    now[0] += 1
+    assert cache.get(1, 'hallo') is None
+    assert cache.metrics()['expired'] == 1
+
+
+def test_fuzzy_matches_only_short_messages():
+    cache = ResponseCache(fuzzy=0.8, fuzzy_max_chars=30)
+    cache.put(1, 'Guten Morgen', 'Morgen!')
+    cache.put(1, 'Hallo, ich bin Hans Meier aus Bern', 'Hallo Hans Meier')
+
+    assert cache.get(1, 'guten morgn') == 'Morgen!'
+    assert cache.get(1, 'Hallo, ich bin Hans Müller aus Bern') is None
+    assert cache.metrics()['fuzzy_hits'] == 1
+    assert ResponseCache().get(1, 'guten morgn') is None
@@ -0,0 +1,108 @@
+import pytest
+
+from models import Message, Sender, Session
+from session_store import create_session_store
+from shared_state import connect
+
+
+def new_session(session_id='s1'):
+    session = Session(session_id, 'thread_1')
+    session['messages'].append(Message(Sender.USER, 'Hallo', phase=1))
+    return session
+
+
+def test_sqlite_store_persists_turns_incrementally(tmp_path):
+    path = str(tmp_path / 'sessions.db')
+    store = create_session_store('sqlite', path=path, cache_size=10)
+    session = new_session()
+    store.add(session)
+
+    session['messages'].append(Message(Sender.ASSISTANT, 'Willkommen', phase=1))
+    session['phase_progress'][1] = 40
+    session['current_phase'] = 2
+    session['email'] = 'coachee@example.com'
+    session['context'] = {'summaries': {1: 'Einstieg'}}
+    store.save(session)
+
+    assert store.get('s1') is session
+    assert store.metrics()['messages_written'] == 2  # beim zweiten save nur die neue Nachricht
+
+    reopened = create_session_store('sqlite', path=path)
+    loaded = reopened['s1']
+    assert loaded is not session
+    assert [m['message'] for m in loaded['messages']] == ['Hallo', 'Willkommen']
+    assert (loaded['current_phase'], loaded['phase_progress'][1]) == (2, 40)
+    assert loaded['email'] == 'coachee@example.com'
+    assert loaded['context'] == {'summaries': {1: 'Einstieg'}}
+    assert 's1' in reopened and len(reopened) == 1
+
+    assert reopened.delete('s1')
+    assert reopened.get('s1') is None and len(reopened) == 0
+
+
+def test_sqlite_store_reloads_evicted_sessions(tmp_path):
+    store = create_session_store('sqlite', path=str(tmp_path / 'sessions.db'), cache_size=1)
+    first, second = new_session('s1'), new_session('s2')
+    store.add(first)
+    store.add(second)  # verdrängt s1 aus dem Hot-Set
+    del first
+
+    reloaded = store['s1']
+    reloaded['messages'].append(Message(Sender.ASSISTANT, 'Zurück', phase=1))
+    store.save(reloaded)
+
+    assert [m['message'] for m in create_session_store('sqlite', path=store.path)['s1']['messages']] == \
+        ['Hallo', 'Zurück']
+    assert store.metrics()['reloads'] >= 1
+
+
+def test_unknown_store_name():
+    with pytest.raises(ValueError):
+        create_session_store('dynamo')
+
+
+def two_workers(name):
+    """Zwei Redis-Stores auf demselben In-Memory-Redis - wie zwei gunicorn-Worker"""
+    client = connect(f"memory://{name}")
+    return create_session_store('redis', client=client), create_session_store('redis', client=client)
+
+
+def test_redis_store_merges_concurrent_turns_from_two_workers():
+    worker1, worker2 = two_workers('session-store-merge')
+    worker1.add(new_session())
+    session1, session2 = worker1['s1'], worker2['s1']
+
+    session1['messages'].append(Message(Sender.ASSISTANT, 'Antwort Worker 1', phase=1))
+    session1['phase_progress'][1] = 30
+    worker1.save(session1)
+
+    # Worker 2 hat den alten Stand geladen: sein save führt zusammen statt zu überschreiben
+    session2['messages'].append(Message(Sender.USER, 'Nachricht Worker 2', phase=2))
+    session2['phase_progress'][1] = 20
+    session2['current_phase'] = 2
+    session2['email'] = 'coachee@example.com'
+    worker2.save(session2)
+
+    expected = ['Hallo', 'Antwort Worker 1', 'Nachricht Worker 2']
+    assert [m['message'] for m in session2['messages']] == expected
+    assert worker2.metrics()['merged'] == 1
+
+    # Worker 1 sieht die neue Version und aktualisiert sein Objekt an Ort und Stelle
+    assert worker1.get('s1') is session1
+    assert [m['message'] for m in session1['messages']] == expected
+    assert (session1['phase_progress'][1], session1['current_phase']) == (30, 2)
+    assert session1['email'] == 'coachee@example.com'
+    assert worker1.metrics()['stale'] == 1
+    assert worker1.metrics()['messages'] == 3
+
+
+def test_redis_store_does_not_recreate_deleted_sessions():
+    worker1, worker2 = two_workers('session-store-delete')
+    worker1.add(new_session())
+    session = worker2['s1']
+    assert worker1.delete('s1')
+
+    session['messages'].append(Message(Sender.ASSISTANT, 'zu spät', phase=1))
+    worker2.save(session)
+
+    assert 's1' not in worker1 and worker2.get('s1') is None
@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+import transcript_log
+from transcript_log import open_log
+
+
+def texts(log, session_id):
+    return [bytes(text).decode('utf-8') for *_, text in log.records(session_id)]
+
+
+@pytest.fixture
+def log(tmp_path):
+    log = open_log(tmp_path, segment_bytes=512, compact_ratio=2)  # keine Hintergrund-Kompaktierung
+    yield log
+    log.close()
+
+
+def fill(log, sessions, turns):
+    for turn in range(turns):
+        for session_id in sessions:
+            log.append(session_id, [{'sender': 'user', 'message': f"{session_id} frage {turn}"},
+                                    {'sender': 'assistant', 'message': f"{session_id} antwort {turn}"}])
+
+
+def test_compaction_drops_forgotten_records_and_keeps_tombstones(log, tmp_path):
+    fill(log, ['a', 'b'], 20)
+    assert log.metrics()['segments'] > 2
+    assert log.forget('a')
+    before = log.metrics()['bytes']
+
+    reclaimed = log.compact(force=True)
+
+    assert reclaimed > 0
+    assert log.metrics()['bytes'] == before - reclaimed
+    assert 'a' not in log
+    assert texts(log, 'b')[:2] == ['b frage 0', 'b antwort 0']
+    assert len(texts(log, 'b')) == 40
+    assert log.compact(force=True) == 0
+
+    # Nach Neustart bleibt 'a' vergessen, 'b' vollständig
+    log.close()
+    reopened = open_log(tmp_path)
+    try:
+        assert 'a' not in reopened
+        assert texts(reopened, 'b') == [f"b {kind} {turn}" for turn in range(20) for kind in ('frage', 'antwort')]
+    finally:
+        reopened.close()
+
+
+def test_append_and_forget_do_not_wait_for_compaction_io(log, monkeypatch):
+    fill(log, ['a', 'b', 'c'], 20)
+    log.forget('a')
+    writing, release = threading.Event(), threading.Event()
+    fsync = transcript_log.os.fsync
+
+    def slow_fsync(fd):
+        writing.set()
+        release.wait(5)
+        fsync(fd)
+
+    monkeypatch.setattr(transcript_log.os, 'fsync', slow_fsync)
+    compactor = threading.Thread(target=log.compact, kwargs={'force': True})
+    compactor.start()
+    assert writing.wait(5)
+
+    # Während die Kompaktierung auf die Platte wartet, laufen Schreiben, Vergessen und Lesen weiter
+    log.append('d', [{'sender': 'user', 'message': 'neu'}])
+    assert log.forget('c')
+    assert texts(log, 'd') == ['neu']
+    release.set()
+    compactor.join(5)
+
+    assert 'c' not in log
+    assert len(texts(log, 'b')) == 40
+    assert texts(log, 'd') == ['neu']
+    # Die mitkopierten Records von 'c' zählen als tot und werden beim nächsten Lauf entfernt
+    assert log.compact(force=True) > 0
+    assert len(texts(log, 'b')) == 40
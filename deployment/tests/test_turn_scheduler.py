@@ -0,0 +1,122 @@
+import threading
+import time
+
+from shared_state import SharedState, connect
+from turn_scheduler import TurnScheduler
+
+
+def test_leader_gets_refreshed_session_when_store_returns_new_object():
+    stored = {'id': 's1', 'messages': ['von worker 2'], 'current_phase': 2}
+    scheduler = TurnScheduler(shared=SharedState(connect('memory://turn-scheduler-refresh')),
+                              refresh=lambda session: dict(stored))
+    session = {'id': 's1', 'messages': [], 'current_phase': 1, 'stale': True}
+
+    with scheduler.turn(session, 'hallo') as turn:
+        assert turn.leader
+        assert session == stored
+
+    assert scheduler.metrics()['runs'] == 1
+
+
+def test_refresh_updating_in_place_is_kept():
+    session = {'id': 's2', 'messages': []}
+
+    def refresh(current):
+        current['messages'].append('von worker 2')
+        return current
+
+    scheduler = TurnScheduler(shared=SharedState(connect('memory://turn-scheduler-refresh')), refresh=refresh)
+    with scheduler.turn(session, 'hallo'):
+        assert session['messages'] == ['von worker 2']
+
+
+def start_turn(scheduler, session, message, run):
+    """Turn in einem Thread; `run(turn)` führt der leader aus. Liefert (Thread, Ergebnisliste)"""
+    outcome = []
+
+    def worker():
+        try:
+            with scheduler.turn(session, message) as turn:
+                if turn.leader:
+                    turn.result = run(turn)
+            outcome.append(turn)
+        except Exception as e:
+            outcome.append(e)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    return thread, outcome
+
+
+def wait_pending(scheduler, session_id, count):
+    deadline = time.monotonic() + 5
+    while len(scheduler._sessions.get(session_id, {}).get('pending', ())) < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_messages_sent_during_a_run_are_coalesced_into_one_follow_up_run():
+    scheduler = TurnScheduler()
+    session = {'id': 's3'}
+    running, release = threading.Event(), threading.Event()
+    runs = []
+
+    def run(turn):
+        runs.append(turn.text)
+        if len(runs) == 1:
+            running.set()
+            release.wait(5)
+        return f"antwort {len(runs)}"
+
+    first = start_turn(scheduler, session, 'eins', run)
+    assert running.wait(5)
+    second = start_turn(scheduler, session, 'zwei', run)
+    wait_pending(scheduler, 's3', 1)
+    third = start_turn(scheduler, session, 'drei', run)
+    wait_pending(scheduler, 's3', 2)
+    release.set()
+    for thread, _ in (first, second, third):
+        thread.join(5)
+
+    assert runs == ['eins', 'zwei\n\ndrei']
+    (turn1,), (turn2,), (turn3,) = first[1], second[1], third[1]
+    assert (turn1.result, turn1.leader, turn1.coalesced) == ('antwort 1', True, False)
+    assert (turn3.result, turn3.leader, turn3.coalesced) == ('antwort 2', True, False)
+    assert (turn2.result, turn2.leader, turn2.coalesced) == ('antwort 2', False, True)
+    metrics = scheduler.metrics()
+    assert (metrics['turns'], metrics['runs'], metrics['coalesced'], metrics['calls_saved']) == (3, 2, 1, 1)
+    assert 's3' not in scheduler._sessions
+
+
+def test_messages_of_a_failed_leader_are_requeued():
+    scheduler = TurnScheduler()
+    session = {'id': 's4'}
+    running, release = threading.Event(), threading.Event()
+    runs = []
+
+    def run(turn):
+        runs.append(turn.text)
+        if len(runs) == 1:
+            running.set()
+            release.wait(5)
+            return 'antwort 1'
+        if len(runs) == 2:
+            raise RuntimeError('Run fehlgeschlagen')
+        return 'antwort 3'
+
+    first = start_turn(scheduler, session, 'eins', run)
+    assert running.wait(5)
+    second = start_turn(scheduler, session, 'zwei', run)
+    wait_pending(scheduler, 's4', 1)
+    third = start_turn(scheduler, session, 'drei', run)
+    wait_pending(scheduler, 's4', 2)
+    release.set()
+    for thread, _ in (first, second, third):
+        thread.join(5)
+
+    # Der leader des Bündels ('drei') scheitert; 'zwei' wird erneut eingereiht und führt selbst aus
+    assert runs == ['eins', 'zwei\n\ndrei', 'zwei']
+    assert isinstance(third[1][0], RuntimeError)
+    turn2 = second[1][0]
+    assert (turn2.result, turn2.leader, turn2.coalesced) == ('antwort 3', True, False)
+    assert scheduler.metrics()['requeued'] == 1
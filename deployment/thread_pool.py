@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Vorgewärmte OpenAI-Threads: create_session holt sich einen fertigen Thread statt auf die API zu warten"""
+import threading
+import time
+from collections import deque
+
+
+class WarmThreadPool:
+    """Hält zwischen `low` und `high` unbenutzte Threads bereit und füllt im Hintergrund nach"""
+
+    def __init__(self, create, delete, low=2, high=5):
+        self.create = create  # () -> thread_id
+        self.delete = delete  # (thread_id) -> None
+        self.low = low
+        self.high = max(high, low)
+        self._ready = deque()
+        self._lock = threading.Lock()
+        self._refill = threading.Event()
+        self._stopped = threading.Event()
+        self._worker = None
+        self._stats = {'hits': 0, 'misses': 0, 'created': 0, 'errors': 0, 'deleted': 0}
+        self._creation_time = 0.0
+
+    def start(self):
+        """Hintergrund-Nachfüller starten (idempotent)"""
+        if self.high <= 0:
+            return
+        with self._lock:
+            if self._worker and self._worker.is_alive():
+                return
+            self._stopped.clear()
+            self._worker = threading.Thread(target=self._fill, name='warm-thread-pool')
+            self._worker.daemon = True
+            self._worker.start()
+        self._refill.set()
+
+    def acquire(self):
+        """Thread-ID in O(1) aus dem Pool, bei leerem Pool direkt erstellen"""
+        self.start()
+        try:
+            thread_id = self._ready.popleft()
+        except IndexError:
+            thread_id = None
+
+        with self._lock:
+            self._stats['hits' if thread_id else 'misses'] += 1
+
+        if len(self._ready) < self.low:
+            self._refill.set()
+
+        return thread_id or self._create()
+
+    def shutdown(self):
+        """Nachfüllen stoppen und unbenutzte Threads bei OpenAI löschen"""
+        self._stopped.set()
+        self._refill.set()
+        while True:
+            try:
+                thread_id = self._ready.popleft()
+            except IndexError:
+                break
+            try:
+                self.delete(thread_id)
+                with self._lock:
+                    self._stats['deleted'] += 1
+            except Exception as e:
+                print(f"⚠️ Thread {thread_id} konnte nicht gelöscht werden: {e}")
+
+    def metrics(self):
+        """Trefferquote und eingesparte Erstellungszeit"""
+        with self._lock:
+            stats = dict(self._stats)
+            creation_time = self._creation_time
+
+        requests = stats['hits'] + stats['misses']
+        avg_creation = creation_time / stats['created'] if stats['created'] else 0
+        return {
+            'size': len(self._ready),
+            'low': self.low,
+            'high': self.high,
+            **stats,
+            'hit_rate': round(stats['hits'] / requests, 3) if requests else 0,
+            'creation_avg_ms': round(avg_creation * 1000, 1),
+            'latency_saved_s': round(stats['hits'] * avg_creation, 2)
+        }
+
+    def _create(self):
+        started = time.monotonic()
+        thread_id = self.create()
+        with self._lock:
+            self._stats['created'] += 1
+            self._creation_time += time.monotonic() - started
+        return thread_id
+
+    def _fill(self):
+        while not self._stopped.is_set():
+            self._refill.wait()
+            self._refill.clear()
+
+            while not self._stopped.is_set() and len(self._ready) < self.high:
+                try:
+                    thread_id = self._create()
+                except Exception as e:
+                    with self._lock:
+                        self._stats['errors'] += 1
+                    print(f"⚠️ Thread-Pool Nachfüllen fehlgeschlagen: {e}")
+                    self._stopped.wait(5)
+                    continue
+
+                self._ready.append(thread_id)
+                if self._stopped.is_set():
+                    # shutdown() lief während der Erstellung - nicht liegen lassen
+                    self.shutdown()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""Transkript-Log: alle Chat-Nachrichten append-only in Segmentdateien, gelesen über mmap
+
+Jede Nachricht ist ein längen-präfixierter Record (Länge, CRC32, Zeitstempel, Absender, Phase, Flags,
+Session-ID, Text). Ein Index im Speicher hält pro Session die Positionen ihrer Records (Segment + Offset
+in einem array('Q')); beim Start wird er aus den Segmenten neu aufgebaut, ein abgerissener Record am
+Ende des letzten Segments wird abgeschnitten.
+
+Gelesen wird über mmap: records() liefert den Text als memoryview in die gemappte Datei - Dashboard und
+Export können ein Transkript so streamen, ohne es ganz in den Speicher zu laden.
+
+Es schreibt genau ein Prozess pro Verzeichnis (Sperre über die Datei 'lock').
+
+Rotation: ist das aktive Segment grösser als segment_bytes, beginnt ein neues. Kompaktierung: forget()
+schreibt einen Tombstone; abgeschlossene Segmente, deren Anteil toter Records über compact_ratio liegt,
+werden ohne diese neu geschrieben (im Hintergrund nach einer Rotation oder per compact()).
+
+    log = open_log('/tmp/coaching_transcripts')
+    log.append(session_id, [Message(Sender.USER, text, phase=1)])
+    for timestamp, sender, phase, deferred, text in log.records(session_id):
+        ...
+"""
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+
+from models import Message
+
+RECORD = struct.Struct('<II')  # Länge der Nutzdaten, CRC32 der Nutzdaten
+PAYLOAD = struct.Struct('<dBBBH')  # Zeitstempel, Absender, Phase, Flags, Länge der Session-ID
+SENDERS = ('user', 'assistant')
+DEFERRED, TOMBSTONE = 1, 2
+OFFSET_BITS = 40  # Position = Segment << 40 | Offset (Segmente bis 1 TB)
+OFFSET_MASK = (1 << OFFSET_BITS) - 1
+
+
+_open_logs = {}
+
+
+def open_log(directory, **options):
+    """TranscriptLog für das Verzeichnis; im selben Prozess immer dieselbe Instanz (die Sperre gilt pro Datei)"""
+    directory = os.path.abspath(directory)
+    if directory not in _open_logs:
+        _open_logs[directory] = TranscriptLog(directory, **options)
+    return _open_logs[directory]
+
+
+def encode(session_id, message, flags=0):
+    """Ein Record als bytes"""
+    message = Message.from_dict(message)
+    sid, text = session_id.encode(), message.message.encode()
+    payload = (PAYLOAD.pack(message.timestamp, SENDERS.index(message.sender.value), message.phase or 0,
+                            flags | (DEFERRED if message.deferred else 0), len(sid)) + sid + text)
+    return RECORD.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+class TranscriptLog:
+    """Segmentiertes Append-only-Log der Nachrichten mit Index pro Session"""
+
+    def __init__(self, directory, segment_bytes=64 * 1024 * 1024, compact_ratio=0.5, fsync=False):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compact_ratio = compact_ratio  # Anteil toter Bytes, ab dem ein Segment neu geschrieben wird
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        self._index = {}  # session_id -> array('Q') mit Positionen
+        self._maps = {}  # segment -> (mmap, gemappte Länge)
+        self._sizes = {}  # segment -> Bytes
+        self._live = {}  # segment -> Bytes lebender Records
+        self._compactor = None
+        self._compacting = set()  # Segmente, die gerade neu geschrieben werden
+        self._stats = {'appended': 0, 'bytes_appended': 0, 'reads': 0, 'records_read': 0, 'forgotten': 0,
+                       'rotations': 0, 'compactions': 0, 'bytes_reclaimed': 0, 'truncated_bytes': 0}
+        os.makedirs(directory, exist_ok=True)
+        # Index und Offsets gehören einem Prozess: ein zweiter Schreiber bekommt BlockingIOError
+        self._lockfile = open(os.path.join(directory, 'lock'), 'w')
+        fcntl.flock(self._lockfile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._load()
+        self._active = max(self._sizes, default=1)
+        self._sizes.setdefault(self._active, 0)
+        self._live.setdefault(self._active, 0)
+        self._file = open(self._path(self._active), 'ab')
+
+    # ---------- Schreiben ----------
+
+    def append(self, session_id, messages):
+        """Nachrichten eines Turns mit einem einzigen write() anhängen"""
+        records = [encode(session_id, m) for m in messages]
+        if not records:
+            return
+        with self._lock:
+            offset = self._sizes[self._active]
+            positions = self._index.setdefault(session_id, array('Q'))
+            for record in records:
+                positions.append(self._active << OFFSET_BITS | offset)
+                offset += len(record)
+            self._write(b''.join(records))
+            self._live[self._active] += sum(len(r) for r in records)
+            self._stats['appended'] += len(records)
+            self._stats['bytes_appended'] += sum(len(r) for r in records)
+            if self._sizes[self._active] >= self.segment_bytes:
+                self._rotate()
+
+    def forget(self, session_id):
+        """Transkript löschen (DSGVO): Tombstone schreiben, Records werden bei der Kompaktierung entfernt"""
+        with self._lock:
+            positions = self._index.pop(session_id, None)
+            if positions is None:
+                return False
+            for position in positions:
+                segment, offset = position >> OFFSET_BITS, position & OFFSET_MASK
+                length, _ = RECORD.unpack_from(self._map(segment), offset)
+                self._live[segment] -= RECORD.size + length
+            self._write(encode(session_id, {'sender': 'user', 'message': ''}, TOMBSTONE))
+            self._stats['forgotten'] += 1
+            return True
+
+    # ---------- Lesen ----------
+
+    def records(self, session_id):
+        """(Zeitstempel, Absender, Phase, deferred, Text als memoryview) pro Nachricht, in Reihenfolge"""
+        with self._lock:
+            positions = list(self._index.get(session_id, ()))
+            maps = {segment: self._map(segment) for segment in {p >> OFFSET_BITS for p in positions}}
+            self._stats['reads'] += 1
+            self._stats['records_read'] += len(positions)
+        for position in positions:
+            view = memoryview(maps[position >> OFFSET_BITS])
+            start = (position & OFFSET_MASK) + RECORD.size
+            length, _ = RECORD.unpack_from(view, start - RECORD.size)
+            timestamp, sender, phase, flags, sid_length = PAYLOAD.unpack_from(view, start)
+            yield (timestamp, SENDERS[sender], phase or None, bool(flags & DEFERRED),
+                   view[start + PAYLOAD.size + sid_length:start + length])
+
+    def messages(self, session_id):
+        """Transkript als Message-Objekte (lädt die Texte)"""
+        return [Message(sender, str(text, 'utf-8'), timestamp, phase, deferred)
+                for timestamp, sender, phase, deferred, text in self.records(session_id)]
+
+    def count(self, session_id):
+        with self._lock:
+            return len(self._index.get(session_id, ()))
+
+    def __contains__(self, session_id):
+        with self._lock:
+            return session_id in self._index
+
+    # ---------- Kompaktierung ----------
+
+    def compact(self, force=False):
+        """Abgeschlossene Segmente mit vielen toten Records neu schreiben; liefert die freigegebenen Bytes"""
+        with self._lock:
+            segments = [segment for segment in sorted(self._sizes) if segment != self._active
+                        and segment not in self._compacting
+                        and self._sizes[segment] and self._garbage(segment) >= (0 if force else self.compact_ratio)
+                        and self._live[segment] < self._sizes[segment]]
+            self._compacting.update(segments)
+        try:
+            return sum(self._compact_segment(segment) for segment in segments)
+        finally:
+            with self._lock:
+                self._compacting.difference_update(segments)
+
+    def _compact_segment(self, segment):
+        # Abgeschlossene Segmente ändern sich nicht mehr, nur forget() kann Records darin sterben lassen.
+        # Unter dem Lock nur Stand merken und am Ende tauschen - Kopieren und fsync laufen ohne ihn,
+        # append() und Leser warten nicht auf die Platte
+        with self._lock:
+            live = {p & OFFSET_MASK for positions in self._index.values() for p in positions
+                    if p >> OFFSET_BITS == segment}
+            source, size = self._map(segment), self._sizes[segment]
+
+        moved, chunks, offset = {}, [], 0
+        for old, length, flags in self._scan(source, size):
+            if old in live or flags & TOMBSTONE:
+                moved[old] = offset
+                chunks.append(source[old:old + RECORD.size + length])
+                offset += RECORD.size + length
+        temp = self._path(segment) + '.compact'
+        with open(temp, 'wb') as f:
+            f.write(b''.join(chunks))
+            f.flush()
+            os.fsync(f.fileno())
+
+        with self._lock:
+            if self._file.closed:
+                os.remove(temp)
+                return 0
+            os.replace(temp, self._path(segment))
+            # Records, die während des Kopierens vergessen wurden, sind mitkopiert, aber schon tot
+            still_live = set()
+            for positions in self._index.values():
+                for i, position in enumerate(positions):
+                    if position >> OFFSET_BITS == segment:
+                        still_live.add(position & OFFSET_MASK)
+                        positions[i] = segment << OFFSET_BITS | moved[position & OFFSET_MASK]
+            dead = sum(RECORD.size + RECORD.unpack_from(source, old)[0] for old in live - still_live)
+            # Alte Map nicht schliessen - laufende Leser halten sie noch; sie verschwindet mit der letzten Referenz
+            self._maps.pop(segment, None)
+            reclaimed = size - offset
+            self._sizes[segment] = offset
+            self._live[segment] = offset - dead
+            self._stats['compactions'] += 1
+            self._stats['bytes_reclaimed'] += reclaimed
+            return reclaimed
+
+    def _garbage(self, segment):
+        size = self._sizes[segment]
+        return 1 - self._live[segment] / size if size else 0
+
+    # ---------- Kennzahlen ----------
+
+    def metrics(self):
+        with self._lock:
+            size, live = sum(self._sizes.values()), sum(self._live.values())
+            return {
+                'directory': self.directory,
+                'segments': len(self._sizes),
+                'active_segment': self._active,
+                'segment_mb': round(self.segment_bytes / 1e6, 1),
+                'bytes': size,
+                'live_bytes': live,
+                'garbage_ratio': round(1 - live / size, 3) if size else 0,
+                'sessions': len(self._index),
+                'records': sum(len(p) for p in self._index.values()),
+                **self._stats
+            }
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._maps.clear()
+            self._lockfile.close()
+        _open_logs.pop(os.path.abspath(self.directory), None)
+
+    # ---------- intern ----------
+
+    def _path(self, segment):
+        return os.path.join(self.directory, f"segment-{segment:06d}.log")
+
+    def _write(self, data):
+        # Lock muss gehalten werden
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._sizes[self._active] += len(data)
+
+    def _rotate(self):
+        # Lock muss gehalten werden
+        self._file.close()
+        self._active += 1
+        self._sizes[self._active] = self._live[self._active] = 0
+        self._file = open(self._path(self._active), 'ab')
+        self._stats['rotations'] += 1
+        if any(self._garbage(s) >= self.compact_ratio for s in self._sizes if s != self._active):
+            if not (self._compactor and self._compactor.is_alive()):
+                self._compactor = threading.Thread(target=self.compact, name='transcript-compactor', daemon=True)
+                self._compactor.start()
+
+    def _map(self, segment):
+        """Read-only mmap des Segments; das aktive Segment wird neu gemappt, sobald es gewachsen ist"""
+        # Lock muss gehalten werden
+        size = self._sizes[segment]
+        cached = self._maps.get(segment)
+        if cached and cached[1] >= size:
+            return cached[0]
+        with open(self._path(segment), 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        self._maps[segment] = (mapped, size)
+        return mapped
+
+    def _scan(self, data, size):
+        """(Offset, Länge, Flags) aller gültigen Records; endet beim ersten unvollständigen/defekten"""
+        offset = 0
+        while offset + RECORD.size <= size:
+            length, crc = RECORD.unpack_from(data, offset)
+            end = offset + RECORD.size + length
+            if length < PAYLOAD.size or end > size or zlib.crc32(data[offset + RECORD.size:end]) != crc:
+                return
+            yield offset, length, PAYLOAD.unpack_from(data, offset + RECORD.size)[3]
+            offset = end
+
+    def _load(self):
+        """Index aus allen Segmenten aufbauen; abgerissenen Rest am Ende abschneiden"""
+        started = time.monotonic()
+        for name in os.listdir(self.directory):
+            if name.endswith('.compact'):
+                os.remove(os.path.join(self.directory, name))  # abgebrochene Kompaktierung
+        segments = sorted(int(name[8:14]) for name in os.listdir(self.directory)
+                          if name.startswith('segment-') and name.endswith('.log'))
+        for segment in segments:
+            size = os.path.getsize(self._path(segment))
+            self._sizes[segment], self._live[segment] = size, 0
+            if not size:
+                continue
+            data = self._map(segment)
+            valid = 0
+            for offset, length, flags in self._scan(data, size):
+                _, _, _, _, sid_length = PAYLOAD.unpack_from(data, offset + RECORD.size)
+                start = offset + RECORD.size + PAYLOAD.size
+                session_id = str(data[start:start + sid_length], 'utf-8')
+                if flags & TOMBSTONE:
+                    for position in self._index.pop(session_id, ()):
+                        dead = position & OFFSET_MASK
+                        old_segment = position >> OFFSET_BITS
+                        self._live[old_segment] -= RECORD.size + RECORD.unpack_from(self._map(old_segment), dead)[0]
+                else:
+                    self._index.setdefault(session_id, array('Q')).append(segment << OFFSET_BITS | offset)
+                    self._live[segment] += RECORD.size + length
+                valid = offset + RECORD.size + length
+            if valid < size:
+                # Absturz mitten im write(): Rest verwerfen, damit neue Records lesbar anschliessen
+                print(f"⚠️ Transkript-Segment {segment}: {size - valid} Bytes unvollständig, abgeschnitten")
+                self._maps.pop(segment, None)
+                os.truncate(self._path(segment), valid)
+                self._sizes[segment] = valid
+                self._stats['truncated_bytes'] += size - valid
+        if segments:
+            print(f"📜 Transkript-Log geladen: {len(self._index)} Sessions, {len(segments)} Segmente "
+                  f"in {time.monotonic() - started:.2f}s")
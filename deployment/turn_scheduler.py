@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Turn-Scheduler: pro Session läuft höchstens ein Run, Nachrichten währenddessen werden gebündelt
+
+Schickt ein Coachee mehrere Nachrichten kurz hintereinander, würde jede einen eigenen Run im selben
+Thread starten - der zweite scheitert, solange der erste aktiv ist. Der Scheduler hält die Turns
+einer Session an und beantwortet alles, was während eines Runs eingeht, mit einem einzigen
+Folge-Run. Ausgeführt wird dieser vom Turn der neuesten Nachricht (leader); die übrigen Turns
+des Bündels bekommen dessen Ergebnis mit coalesced=True.
+
+Gebündelt wird pro Prozess. Mit mehreren gunicorn-Workern gibt `shared` (shared_state.SharedState)
+die Serialisierung über alle Worker: der leader hält während seines Runs eine Redis-Sperre pro
+Session und lädt die Session nach dem Warten darauf mit `refresh` neu (ein anderer Worker kann
+inzwischen einen Turn gespeichert haben). Ohne `shared` ist nur ein Worker pro Session sicher.
+
+    with turn_scheduler.turn(session, message) as turn:
+        if turn.leader:
+            turn.result = run_chat_turn(session, turn.text)
+    turn.result, turn.coalesced
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Turn:
+    """Ein angemeldeter Turn; nach dem Eintritt führt er selbst aus (leader) oder hat das Ergebnis"""
+
+    def __init__(self, message):
+        self.message = message
+        self.messages = [message]  # beim leader: alle Nachrichten des Bündels
+        self.leader = False
+        self.coalesced = False
+        self.result = None
+        self.done = False
+
+    @property
+    def text(self):
+        """Nachrichten des Bündels als ein User-Turn"""
+        return '\n\n'.join(self.messages)
+
+
+class TurnScheduler:
+    """Serialisiert Turns pro Session und bündelt wartende Nachrichten"""
+
+    def __init__(self, shared=None, lock_ttl=120, refresh=None):
+        self.shared = shared
+        self.lock_ttl = lock_ttl  # länger als die Run-Deadline
+        self.refresh = refresh  # (session) -> frischer Stand aus dem gemeinsamen Store (oder die Session selbst)
+        self._lock = threading.Lock()
+        self._sessions = {}  # session_id -> {'cond', 'pending', 'running', 'users'}
+        self._stats = {'turns': 0, 'runs': 0, 'coalesced': 0, 'waited': 0, 'wait_s': 0.0, 'requeued': 0,
+                       'max_batch': 0, 'lock_waited': 0, 'lock_wait_s': 0.0}
+
+    @contextmanager
+    def turn(self, session, message):
+        state = self._enter(session['id'])
+        ticket = Turn(message)
+        started = time.monotonic()
+        try:
+            with state['cond']:
+                state['pending'].append(ticket)
+                waited = state['running']
+                while not ticket.done:
+                    # Nur die neueste wartende Nachricht startet den Folge-Run und nimmt alle anderen mit
+                    if not state['running'] and state['pending'][-1] is ticket:
+                        batch, state['pending'] = state['pending'], []
+                        state['running'] = True
+                        ticket.leader = True
+                        ticket.messages = [t.message for t in batch]
+                        break
+                    waited = True
+                    state['cond'].wait()
+            self._count(waited, time.monotonic() - started, len(ticket.messages) if ticket.leader else 0)
+
+            if not ticket.leader:
+                yield ticket
+                return
+            try:
+                with self._shared_lock(session):
+                    yield ticket
+            except BaseException:
+                # Leader abgebrochen oder fehlgeschlagen: die mitgenommenen Nachrichten erneut einreihen
+                self._finish(state, [t for t in batch if t is not ticket], requeue=True)
+                raise
+            self._finish(state, batch, result=ticket.result, leader=ticket)
+        finally:
+            self._leave(session['id'])
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats, wait_s=round(self._stats['wait_s'], 2),
+                         lock_wait_s=round(self._stats['lock_wait_s'], 2))
+            stats['active_sessions'] = sum(1 for s in self._sessions.values() if s['running'])
+        stats['calls_saved'] = stats['turns'] - stats['runs']
+        stats['shared_lock'] = self.shared is not None
+        return stats
+
+    @contextmanager
+    def _shared_lock(self, session):
+        """Redis-Sperre der Session für den Run des leaders (ohne `shared` nichts)"""
+        if self.shared is None:
+            yield
+            return
+        with self.shared.session_lock(session['id'], self.lock_ttl) as waited:
+            if waited >= 0.05:
+                with self._lock:
+                    self._stats['lock_waited'] += 1
+                    self._stats['lock_wait_s'] += waited
+            if self.refresh:
+                # Ein anderer Worker kann seit dem Laden einen Turn gespeichert haben. Liefert der Store ein
+                # neues Objekt statt das vorhandene zu aktualisieren, Stand in die Session des Aufrufers übernehmen
+                fresh = self.refresh(session)
+                if fresh is not None and fresh is not session:
+                    for key in [key for key in session if key not in fresh]:
+                        del session[key]
+                    session.update(fresh)
+            yield
+
+    def _finish(self, state, batch, result=None, leader=None, requeue=False):
+        with state['cond']:
+            if requeue:
+                state['pending'][:0] = batch
+                with self._lock:
+                    self._stats['requeued'] += len(batch)
+            else:
+                for t in batch:
+                    t.result = result
+                    t.coalesced = t is not leader
+                    t.done = True
+            state['running'] = False
+            state['cond'].notify_all()
+
+    def _count(self, waited, seconds, batch_size):
+        with self._lock:
+            self._stats['turns'] += 1
+            if waited:
+                self._stats['waited'] += 1
+                self._stats['wait_s'] += seconds
+            if batch_size:
+                self._stats['runs'] += 1
+                if batch_size > 1:
+                    self._stats['coalesced'] += batch_size - 1
+                self._stats['max_batch'] = max(self._stats['max_batch'], batch_size)
+
+    def _enter(self, session_id):
+        # Zustand pro Session nur so lange halten, wie Turns dafür unterwegs sind
+        with self._lock:
+            state = self._sessions.setdefault(session_id, {'cond': threading.Condition(), 'pending': [],
+                                                           'running': False, 'users': 0})
+            state['users'] += 1
+            return state
+
+    def _leave(self, session_id):
+        with self._lock:
+            state = self._sessions[session_id]
+            state['users'] -= 1
+            if not state['users']:
+                del self._sessions[session_id]
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Token-Verbrauch und Kosten pro Session, Phase, Kanal, Modell und Tag
+
+Die Backends melden nach jedem Run die Usage (Prompt-/Completion-Tokens, Modell, Dauer); hier wird
+sie laufend aufsummiert. Der Kanal (web, email, summary) kommt aus dem contextvars-Kontext:
+
+    with usage_tracker.channel('email'):
+        get_ai_response(...)
+"""
+import contextvars
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date
+
+# USD pro 1 Mio. Tokens (Input, Output); Zuordnung über das längste passende Modell-Präfix
+PRICES = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4-turbo': (10.00, 30.00),
+    'gpt-4': (30.00, 60.00),
+    'gpt-3.5-turbo': (0.50, 1.50)
+}
+
+_current_channel = contextvars.ContextVar('usage_channel', default='web')
+
+
+def current_channel():
+    """Kanal des laufenden Kontexts ('web', 'email', 'summary')"""
+    return _current_channel.get()
+
+
+def in_channel(channel, func):
+    """func so verpacken, dass ihre Runs dem angegebenen Kanal zugerechnet werden"""
+    def wrapper(*args, **kwargs):
+        token = _current_channel.set(channel)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current_channel.reset(token)
+    return wrapper
+
+
+def _bucket():
+    return {'runs': 0, 'cached': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0,
+            'cost_usd': 0.0, 'latency_s': 0.0}
+
+
+def _summary(bucket):
+    runs = bucket['runs']
+    return dict(bucket,
+                cost_usd=round(bucket['cost_usd'], 4),
+                latency_s=round(bucket['latency_s'], 2),
+                avg_tokens=round(bucket['total_tokens'] / runs) if runs else 0,
+                avg_latency_s=round(bucket['latency_s'] / runs, 2) if runs else 0)
+
+
+class UsageTracker:
+    """Inkrementelle Summen; record() pro Run, record_cached() pro Cache-Treffer"""
+
+    def __init__(self, prices=None, days=30, max_sessions=10000):
+        self.prices = dict(PRICES if prices is None else prices)
+        self.days = days  # so viele Tage bleiben in by_day
+        self.max_sessions = max_sessions  # so viele zuletzt aktive Sessions behalten eigene Summen
+        self._lock = threading.Lock()
+        self._total = _bucket()
+        self._groups = {'session': OrderedDict(), 'phase': {}, 'channel': {}, 'model': {}, 'day': {}}
+
+    # ---------- Kanal ----------
+
+    @contextmanager
+    def channel(self, name):
+        """Alle Runs im Block zählen für diesen Kanal"""
+        token = _current_channel.set(name)
+        try:
+            yield
+        finally:
+            _current_channel.reset(token)
+
+    # ---------- Erfassen ----------
+
+    def price(self, model):
+        """(Input, Output) in USD pro 1 Mio. Tokens; unbekannte Modelle kosten 0"""
+        matches = [prefix for prefix in self.prices if (model or '').startswith(prefix)]
+        return self.prices[max(matches, key=len)] if matches else (0.0, 0.0)
+
+    def record(self, session_id, phase, model, prompt_tokens, completion_tokens, seconds=0.0, channel=None):
+        price_in, price_out = self.price(model)
+        cost = (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+        with self._lock:
+            for bucket in self._buckets(session_id, phase, channel, model):
+                bucket['runs'] += 1
+                bucket['prompt_tokens'] += prompt_tokens
+                bucket['completion_tokens'] += completion_tokens
+                bucket['total_tokens'] += prompt_tokens + completion_tokens
+                bucket['cost_usd'] += cost
+                bucket['latency_s'] += seconds
+
+    def record_cached(self, session_id, phase, channel=None):
+        """Antwort ohne Run (Cache) - zeigt, wie viele Runs der Cache spart"""
+        with self._lock:
+            for bucket in self._buckets(session_id, phase, channel, None):
+                bucket['cached'] += 1
+
+    def forget(self, session_id):
+        """Session-Summen entfernen (Phasen-, Kanal- und Tagessummen bleiben)"""
+        with self._lock:
+            self._groups['session'].pop(session_id, None)
+
+    # ---------- Auswerten ----------
+
+    def session_usage(self, session_id):
+        with self._lock:
+            bucket = self._groups['session'].get(session_id)
+            return _summary(bucket) if bucket else None
+
+    def report(self, top_sessions=10):
+        with self._lock:
+            groups = {name: {key: _summary(bucket) for key, bucket in group.items()}
+                      for name, group in self._groups.items()}
+            total = _summary(self._total)
+        sessions = sorted(groups.pop('session').items(), key=lambda item: -item[1]['cost_usd'])
+        return {
+            'total': total,
+            'by_phase': dict(sorted(groups['phase'].items(), key=lambda item: str(item[0]))),
+            'by_channel': groups['channel'],
+            'by_model': groups['model'],
+            'by_day': dict(sorted(groups['day'].items())),
+            'sessions': len(sessions),
+            'top_sessions': [{'session_id': sid, **usage} for sid, usage in sessions[:top_sessions]]
+        }
+
+    def _buckets(self, session_id, phase, channel, model):
+        # Lock muss gehalten werden
+        today = date.today().isoformat()
+        keys = {'session': session_id, 'phase': phase, 'channel': channel or _current_channel.get(),
+                'model': model, 'day': today}
+        buckets = [self._total]
+        for name, key in keys.items():
+            if key is not None:
+                buckets.append(self._groups[name].setdefault(key, _bucket()))
+        days = self._groups['day']
+        while len(days) > self.days:
+            del days[min(days)]
+        sessions = self._groups['session']
+        if session_id is not None:
+            sessions.move_to_end(session_id)
+        while len(sessions) > self.max_sessions:
+            sessions.popitem(last=False)
+        return buckets
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import os
 from flask import Flask, request, jsonify
-from openai import OpenAI
+from openai_client import create_client
 from dotenv import load_dotenv
 import uuid, time, re
 from datetime import datetime
@@ -15,7 +15,7 @@ load_dotenv()
 app = Flask(__name__)
 sessions = {}
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = create_client()
 ASSISTANT_ID = os.getenv("ASSISTANT_ID")
 
 # E-Mail-Konfiguration
@@ -705,7 +705,7 @@ if __name__ == "__main__":
 #!/usr/bin/env python3
 import os
 from flask import Flask, request, jsonify
-from openai import OpenAI
+from openai_client import create_client
 from dotenv import load_dotenv
 import uuid, time, re
 from datetime import datetime
@@ -714,7 +714,7 @@ load_dotenv()
 app = Flask(__name__)
 sessions = {}
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = create_client()
 ASSISTANT_ID = os.getenv("ASSISTANT_ID")
 
 # Intelligente Phase-Definitionen